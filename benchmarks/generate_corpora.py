@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Generate the benchmark corpora.
+
+The corpora are generated once and committed, so that every benchmark run
+solves exactly the same puzzles. They only depend on the seed and on the
+solution count: a solved grid is drawn by shuffling a pattern grid, and its
+clues are removed in a random order as long as the solution stays unique,
+so that changes to the application generator or to the searches don't
+change them. The pathological corpus is a list of well known puzzles which
+are hard for backtracking.
+
+Usage::
+
+    python benchmarks/generate_corpora.py
+    python benchmarks/generate_corpora.py --check
+
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sudoku_csp.algorithms import count_solutions
+from sudoku_csp.batch import format_puzzle
+from sudoku_csp.csp import BitSudokuCSP
+from sudoku_csp.generator import SudokuDifficulty
+
+CORPORA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+
+SEED = 2021
+
+# The share of the cells emptied for each difficulty, as in the Generator.
+EMPTIED = {
+    SudokuDifficulty.EASY: 0.5,
+    SudokuDifficulty.MEDIUM: 0.6,
+    SudokuDifficulty.HARD: 0.7,
+}
+
+GENERATED_CORPORA = {
+    "easy_9x9": (3, SudokuDifficulty.EASY, 10),
+    "medium_9x9": (3, SudokuDifficulty.MEDIUM, 10),
+    "hard_9x9": (3, SudokuDifficulty.HARD, 10),
+    "medium_16x16": (4, SudokuDifficulty.MEDIUM, 3),
+    "easy_25x25": (5, SudokuDifficulty.EASY, 3),
+}
+
+# The corpora drawn with another seed. With SEED, the first 25x25 puzzle
+# takes every CSP search but the bitmask one past the benchmark timeout.
+CORPUS_SEEDS = {"easy_25x25": 5}
+
+PATHOLOGICAL_9X9 = [
+    # Arto Inkala's "hardest sudoku".
+    "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+    # Designed against brute force: the first row of the solution is 987654321.
+    "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+    # Easter Monster.
+    "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    # Peter Norvig's "hard1", which has many solutions and very few clues.
+    ".....6....59.....82....8....45........3........6..3.54...325..6..................",
+]
+
+
+def solved_grid(size: int, rng: random.Random) -> np.ndarray:
+    """
+    Draw a solved grid by shuffling the values, the bands, the rows of each
+    band, the stacks and the columns of each stack of a pattern grid.
+    """
+    length = size ** 2
+
+    def shuffled_lines():
+        return [
+            band * size + line
+            for band in rng.sample(range(size), size)
+            for line in rng.sample(range(size), size)
+        ]
+
+    values = rng.sample(range(1, length + 1), length)
+    rows, cols = shuffled_lines(), shuffled_lines()
+    return np.array(
+        [
+            [values[(size * (row % size) + row // size + col) % length] for col in cols]
+            for row in rows
+        ]
+    )
+
+
+def generate_puzzle(
+    size: int, difficulty: SudokuDifficulty, rng: random.Random
+) -> np.ndarray:
+    """
+    Remove the clues of a solved grid in a random order, undoing a removal
+    when the puzzle gets a second solution, until the share of empty cells
+    of the difficulty is reached or no clue can be removed.
+    """
+    sudoku_map = solved_grid(size, rng)
+    length = size ** 2
+    to_empty = int(EMPTIED[difficulty] * length ** 2)
+    cells = [(x, y) for x in range(length) for y in range(length)]
+    rng.shuffle(cells)
+    for x, y in cells:
+        if not to_empty:
+            break
+        value = sudoku_map[x, y]
+        sudoku_map[x, y] = 0
+        if count_solutions(BitSudokuCSP(sudoku_map), limit=2) == 1:
+            to_empty -= 1
+        else:
+            sudoku_map[x, y] = value
+    return sudoku_map
+
+
+def corpora() -> dict:
+    """
+    Generate the lines of every corpus.
+    """
+    lines = dict()
+    for name, (size, difficulty, count) in GENERATED_CORPORA.items():
+        rng = random.Random(CORPUS_SEEDS.get(name, SEED))
+        lines[name] = [
+            format_puzzle(generate_puzzle(size, difficulty, rng)) for _ in range(count)
+        ]
+    lines["pathological_9x9"] = [line.replace(".", "0") for line in PATHOLOGICAL_9X9]
+    return lines
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Generate the benchmark corpora.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare the committed corpora with the generated ones instead",
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(CORPORA_DIRECTORY, exist_ok=True)
+    mismatches = 0
+    for name, lines in corpora().items():
+        path = os.path.join(CORPORA_DIRECTORY, f"{name}.txt")
+        content = "\n".join(lines) + "\n"
+        if args.check:
+            with open(path) as corpus:
+                if corpus.read() != content:
+                    mismatches += 1
+                    print(f"{name}: differs from the generated corpus.")
+            continue
+        with open(path, "w") as corpus:
+            corpus.write(content)
+        print(f"{name}: {len(lines)} puzzles.")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""Benchmark every algorithm type on the committed corpora.
+
+Each (algorithm, corpus) pair runs in its own process, with a fixed hash
+seed so that the search order, and thus the counters, are reproducible. The
+corpus is solved a few times within the timeout and the best wall time is
+kept, together with the expanded nodes and constraint checks. The peak
+traced memory is measured by another process, so that the slowdown of the
+tracing doesn't count against the timeout. The results are compared with
+the stored baseline, and the script exits with an error when a result
+regresses past the tolerances. Results which finish where the baseline
+timed out are reported as improvements.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --update-baseline
+
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from sudoku_csp.batch import parse_puzzle
+from sudoku_csp.interfaces import AlgorithmType, SearchStatistics
+from sudoku_csp.solver import solve
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+CORPORA_DIRECTORY = os.path.join(BENCHMARKS_DIRECTORY, "corpora")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIRECTORY, "baseline.json")
+
+SEED = 2021
+
+# The counters of the searches racing over processes depend on the timing.
+NONDETERMINISTIC = ("PORTFOLIO", "PARALLEL")
+
+
+def load_corpus(corpus: str) -> list:
+    with open(os.path.join(CORPORA_DIRECTORY, f"{corpus}.txt")) as corpus_file:
+        return [parse_puzzle(line) for line in corpus_file if line.strip()]
+
+
+def start_run():
+    # The portfolio and parallel searches start their own processes, which
+    # must be killed with this one on timeout.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def run_corpus(
+    algorithm_name: str, corpus: str, repeat: int, time_limit: float, results
+):
+    """
+    Solve all the puzzles of a corpus up to repeat times, as long as the
+    next pass is expected to end within time_limit, and send the results
+    after each pass with the best wall time so far.
+    """
+    start_run()
+    puzzles = load_corpus(corpus)
+    algorithm_type = AlgorithmType[algorithm_name]
+
+    result = None
+    elapsed = 0.0
+    for _ in range(repeat):
+        random.seed(SEED)
+        np.random.seed(SEED)
+        statistics = SearchStatistics()
+        solved = 0
+        start = time.perf_counter()
+        for puzzle in puzzles:
+            solved += solve(puzzle, algorithm_type, statistics=statistics) is not None
+        wall_time = time.perf_counter() - start
+        elapsed += wall_time
+
+        if result is None:
+            result = {
+                "status": "ok",
+                "puzzles": len(puzzles),
+                "solved": solved,
+                "wall_time": wall_time,
+                "nodes": statistics.nodes,
+                "checks": statistics.checks,
+            }
+        result["wall_time"] = min(result["wall_time"], wall_time)
+        results.put(dict(result))
+        if elapsed + wall_time > time_limit:
+            break
+
+
+def trace_memory(algorithm_name: str, corpus: str, results):
+    """
+    Solve all the puzzles of a corpus once more while tracing the memory,
+    and send the peak.
+    """
+    start_run()
+    puzzles = load_corpus(corpus)
+    algorithm_type = AlgorithmType[algorithm_name]
+
+    # The caches filled by a first solve, like the constraint graph of the
+    # grid size, are left out of the peak, as in the timed passes.
+    solve(puzzles[0], algorithm_type)
+    random.seed(SEED)
+    np.random.seed(SEED)
+    tracemalloc.start()
+    for puzzle in puzzles:
+        solve(puzzle, algorithm_type)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.put(peak_memory)
+
+
+def run_process(target, args: tuple, timeout: float) -> tuple:
+    """
+    Run a function in a new process, killed with its children if it isn't
+    done within the timeout.
+
+    Returns
+    -------
+    tuple[str, list]
+        The status, "ok", "timeout" or "error", and everything the function
+        sent, the latest last.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=target, args=args + (results,))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError):
+            process.terminate()
+        process.join()
+        status = "timeout"
+    else:
+        status = "ok" if process.exitcode == 0 else "error"
+
+    sent = list()
+    while True:
+        try:
+            sent.append(results.get(timeout=0.1))
+        except queue.Empty:
+            break
+    return status, sent
+
+
+def benchmark(
+    algorithm_name: str,
+    corpus: str,
+    timeout: float,
+    memory_timeout: float,
+    repeat: int,
+) -> dict:
+    # The repetitions stop by themselves before the timeout, so a run is
+    # only a timeout when its first pass doesn't end in time.
+    status, sent = run_process(
+        run_corpus, (algorithm_name, corpus, repeat, timeout), timeout
+    )
+    if not sent:
+        return {"status": "timeout" if status == "timeout" else "error"}
+    result = sent[-1]
+
+    status, sent = run_process(trace_memory, (algorithm_name, corpus), memory_timeout)
+    result["peak_memory"] = sent[-1] if sent else None
+    return result
+
+
+def regressions(algorithm_name: str, result: dict, baseline: dict, args) -> list:
+    """
+    Compare a result with its baseline.
+
+    Returns
+    -------
+    list[str]
+        The description of each regression.
+    """
+    if result["status"] != "ok":
+        return [result["status"]] if baseline["status"] == "ok" else []
+    if baseline["status"] != "ok":
+        return []
+
+    found = list()
+    if result["solved"] < baseline["solved"]:
+        found.append(f"solved {result['solved']} < {baseline['solved']}")
+    if (
+        result["wall_time"] > baseline["wall_time"] * (1 + args.time_tolerance)
+        and result["wall_time"] - baseline["wall_time"] > args.min_time_delta
+    ):
+        found.append(
+            f"wall time {result['wall_time']:.3f}s > {baseline['wall_time']:.3f}s"
+        )
+    for counter in ("nodes", "checks"):
+        if algorithm_name in NONDETERMINISTIC:
+            break
+        if result[counter] > baseline[counter] * (1 + args.count_tolerance):
+            found.append(f"{counter} {result[counter]} > {baseline[counter]}")
+    if (
+        result["peak_memory"] is not None
+        and baseline.get("peak_memory") is not None
+        and result["peak_memory"]
+        > baseline["peak_memory"] * (1 + args.memory_tolerance)
+    ):
+        found.append(f"peak memory {result['peak_memory']} > {baseline['peak_memory']}")
+    return found
+
+
+def improvements(result: dict, baseline: dict) -> list:
+    """
+    Find what a result does which its baseline didn't.
+
+    Returns
+    -------
+    list[str]
+        The description of each improvement.
+    """
+    if result["status"] != "ok":
+        return []
+    if baseline["status"] != "ok":
+        return [f"finished where the baseline got a {baseline['status']}"]
+    if result["solved"] > baseline["solved"]:
+        return [f"solved {result['solved']} > {baseline['solved']}"]
+    return []
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Benchmark the sudoku algorithms.")
+    parser.add_argument(
+        "-a",
+        "--algorithms",
+        nargs="+",
+        default=[algorithm_type.name for algorithm_type in AlgorithmType],
+        choices=[algorithm_type.name for algorithm_type in AlgorithmType],
+    )
+    parser.add_argument(
+        "-c",
+        "--corpora",
+        nargs="+",
+        default=sorted(name[:-4] for name in os.listdir(CORPORA_DIRECTORY)),
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=60,
+        help="seconds per algorithm and corpus",
+    )
+    parser.add_argument(
+        "--memory-timeout",
+        type=float,
+        default=120,
+        help="seconds per algorithm and corpus for the memory tracing run",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="passes kept for the best wall time"
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument("--min-time-delta", type=float, default=0.1)
+    parser.add_argument("--count-tolerance", type=float, default=0.1)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing them",
+    )
+    args = parser.parse_args(argv)
+
+    # The spawned processes inherit a fixed hash seed, which makes the
+    # iteration order of the sets, and thus the search, reproducible.
+    os.environ["PYTHONHASHSEED"] = "0"
+
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = dict()
+    failures = improved = 0
+    for algorithm_name in args.algorithms:
+        for corpus in args.corpora:
+            result = benchmark(
+                algorithm_name, corpus, args.timeout, args.memory_timeout, args.repeat
+            )
+            results.setdefault(algorithm_name, dict())[corpus] = result
+
+            line = f"{algorithm_name:<22}{corpus:<20}"
+            if result["status"] == "ok":
+                line += (
+                    f"{result['solved']:>3}/{result['puzzles']:<3}"
+                    f"{result['wall_time']:>10.3f}s"
+                    f"{result['nodes']:>12} nodes"
+                    f"{result['checks']:>12} checks"
+                )
+                if result["peak_memory"] is None:
+                    line += "    memory timeout"
+                else:
+                    line += f"{result['peak_memory'] / 1024:>10.0f} KiB"
+            else:
+                line += result["status"]
+
+            expected = baseline.get(algorithm_name, dict()).get(corpus)
+            if expected is not None and not args.update_baseline:
+                found = regressions(algorithm_name, result, expected, args)
+                if found:
+                    failures += 1
+                    line += "  REGRESSION: " + ", ".join(found)
+                better = improvements(result, expected)
+                if better:
+                    improved += 1
+                    line += "  IMPROVEMENT: " + ", ".join(better)
+            print(line, flush=True)
+
+    if args.update_baseline:
+        for algorithm_name, corpora in results.items():
+            baseline.setdefault(algorithm_name, dict()).update(corpora)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Baseline written to {args.baseline}.")
+        return
+    if improved:
+        print(f"{improved} improvement(s) found, update the baseline to record them.")
+    if failures:
+        print(f"{failures} regression(s) found.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,90 @@
 """
 Main application program.
 """
+import os
+import threading
 import traceback
 import sys
 
 from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Signal
 import numpy as np
+import requests
 
-from sudoku_csp.interfaces import AlgorithmType, Resolver
-from sudoku_csp.gui import MainWindow
-from sudoku_csp.csp import SudokuCSP
-from sudoku_csp.algorithms import (
-    backtracking_search,
-    most_constrained_variable,
-    minimum_remaining_value,
-    least_constraining_value,
-    AC3
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchStatus,
+    SearchStatistics,
+    SearchBudget,
 )
+from sudoku_csp.generator import Generator, SudokuDifficulty
+from sudoku_csp.gui import MainWindow, Resolver
+from sudoku_csp.online import OnlineGenerator
+from sudoku_csp.pool import PuzzlePool
+from sudoku_csp.solver import solve
 
 
 class SudokuResolver(Resolver):
     """
     A worker who manage the resolving of the sudoku.
+
+    Each solve gets its own SearchBudget, with the time and node limits of
+    the resolver, which cancel stops from any thread. A cancel also applies
+    to the solves which were requested but haven't started yet.
     """
 
-    result_ready = Signal((AlgorithmType, np.ndarray))
+    result_ready = Signal((AlgorithmType, np.ndarray, object))
     error = Signal(str)
 
+    def __init__(self, time_limit: float = None, node_limit: int = None):
+        """
+        Create a SudokuResolver instance.
+
+        Parameters
+        ----------
+        time_limit : float
+            The seconds allowed to each solve, unlimited by default.
+        node_limit : int
+            The number of nodes allowed to each solve, unlimited by default.
+        """
+        super().__init__()
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.budget = None
+        # The solves are numbered in the order they are requested, and the
+        # ones up to cancelled are stopped as soon as they start.
+        self.lock = threading.Lock()
+        self.requested = 0
+        self.started = 0
+        self.cancelled = 0
+
+    def request(self):
+        """
+        Count a solve asked to the worker thread, before its do_work call is
+        queued.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            self.requested += 1
+
+    def cancel(self):
+        """
+        Stop the running solve and the requested ones, if any. It is meant to
+        be called directly from another thread, as the worker thread is busy
+        while solving.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            self.cancelled = self.requested
+            if self.budget is not None:
+                self.budget.cancel()
+
     def do_work(
         self,
         algorithm_type: AlgorithmType = AlgorithmType.BACKTRACKING,
@@ -36,6 +93,9 @@ class SudokuResolver(Resolver):
         """
         Do the asked work using the choosen algorithm.
 
+        The resolved map is sent with the SearchStatistics of the solve,
+        whose status tells whether the budget stopped it.
+
         Parameters
         ----------
         algorithm_type : AlgorithmType
@@ -47,34 +107,31 @@ class SudokuResolver(Resolver):
         -------
         None
         """
+        statistics = SearchStatistics()
+        budget = SearchBudget(self.time_limit, self.node_limit)
+        with self.lock:
+            self.started += 1
+            if self.started <= self.cancelled:
+                budget.cancel()
+            self.budget = budget
         try:
             algorithm_type = AlgorithmType[algorithm_type.name]
 
-            csp = SudokuCSP(sudoku_map)
-            assignment = None
+            result = solve(
+                sudoku_map,
+                algorithm_type,
+                verbose=True,
+                statistics=statistics,
+                budget=budget,
+            )
 
-            if algorithm_type is AlgorithmType.BACKTRACKING:
-                assignment = backtracking_search(csp)
-            elif algorithm_type == AlgorithmType.MRV:
-                assignment = backtracking_search(
-                    csp, select_unassigned_variable=minimum_remaining_value
-                )
-            elif algorithm_type == AlgorithmType.DEGREE_H:
-                assignment = backtracking_search(
-                    csp, select_unassigned_variable=most_constrained_variable
-                )
-            elif algorithm_type == AlgorithmType.LEAST_CONSTRAINING_H:
-                assignment = backtracking_search(
-                    csp, order_domain_values=least_constraining_value
-                )
-            elif algorithm_type == AlgorithmType.AC3:
-                csp = AC3(csp)
-                assignment = backtracking_search(
-                    csp
-                )
-
-            if assignment is not None:
-                sudoku_map = csp.get_resulted_map(assignment)
+            if result is not None:
+                sudoku_map = result
+            elif statistics.status in (
+                SearchStatus.BUDGET_EXCEEDED,
+                SearchStatus.CANCELLED,
+            ):
+                print(f"Solve stopped: {statistics.status.value}.")
             else:
                 self.error.emit(
                     f"Can't find a solution using {algorithm_type.value} algorithm."
@@ -82,14 +139,73 @@ class SudokuResolver(Resolver):
         except Exception:
             print(traceback.format_exc())
             self.error.emit(traceback.format_exc())
-        self.result_ready.emit(algorithm_type, sudoku_map)
+        with self.lock:
+            self.budget = None
+        self.result_ready.emit(algorithm_type, sudoku_map, statistics)
+
+
+class BoardFetcher(Resolver):
+    """
+    A worker who fetches the online puzzles, then prefetches the next ones
+    while the user plays.
+    """
+
+    result_ready = Signal(np.ndarray)
+    error = Signal(str)
+
+    def __init__(self, online_generator: OnlineGenerator):
+        """
+        Create a BoardFetcher instance.
+
+        Parameters
+        ----------
+        online_generator : OnlineGenerator
+            The client of the sudoku web service.
+        """
+        super().__init__()
+        self.online_generator = online_generator
+
+    def do_work(self, difficulty: SudokuDifficulty = SudokuDifficulty.MEDIUM):
+        """
+        Fetch a board of the given difficulty.
+
+        Parameters
+        ----------
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        None
+        """
+        difficulty = SudokuDifficulty(difficulty.value)
+        try:
+            self.result_ready.emit(self.online_generator.fetch(difficulty))
+        except Exception:
+            print(traceback.format_exc())
+            self.error.emit(traceback.format_exc())
+            return
+
+        try:
+            self.online_generator.prefetch(difficulty)
+        except requests.RequestException as error:
+            print(f"Prefetch failed: {error}.")
 
 
 if __name__ == "__main__":
     app = QApplication([])
 
-    sudoku_solver = SudokuResolver()
-    main_window = MainWindow("Sudoku solver", sudoku_solver)
+    sudoku_solver = SudokuResolver(time_limit=120)
+    puzzle_pool = PuzzlePool(
+        stocks=[(3, difficulty) for difficulty in SudokuDifficulty],
+    )
+    app.aboutToQuit.connect(puzzle_pool.close)
+    online_generator = OnlineGenerator(
+        os.environ.get("SUDOKU_CSP_GENERATOR_URL", Generator.generator_url)
+    )
+    app.aboutToQuit.connect(online_generator.close)
+    main_window = MainWindow(
+        "Sudoku solver", sudoku_solver, puzzle_pool, BoardFetcher(online_generator)
+    )
     main_window.resize(1000, 700)
     main_window.show()
 
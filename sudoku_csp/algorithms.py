@@ -2,10 +2,21 @@
 """Solver algorithms.
 
 """
+import heapq
+import math
+from collections import OrderedDict, deque
+
 import numpy as np
 
-from sudoku_csp.csp import CSP
-from sudoku_csp.interfaces import Constraint
+from sudoku_csp.csp import CSP, SudokuCSP, BitSudokuCSP
+from sudoku_csp.interfaces import (
+    Constraint,
+    AllDifferent,
+    VariableSelector,
+    SearchStatus,
+    SearchStatistics,
+    SearchBudget,
+)
 
 
 def unorder_domain_values(var: any, assignment: dict, csp: CSP):
@@ -44,6 +55,42 @@ def random_domain_values(var: any, assignment: dict, csp: CSP):
     return domain
 
 
+class RandomDomainValues:
+    """
+    Domain ordering in a random order drawn from its own generator, so that
+    a seeded search doesn't touch the global NumPy random state.
+    """
+
+    def __init__(self, seed: int = None):
+        """
+        Create a RandomDomainValues instance.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the generator, drawn from the system by default.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, var: any, assignment: dict, csp: CSP):
+        """
+        Get the domain values of a variable in a random order.
+
+        Parameters
+        ----------
+        var : any
+        assignment : dict
+        csp : CSP
+
+        Returns
+        -------
+        List[any]
+        """
+        domain = list(csp.domains[var])
+        self.rng.shuffle(domain)
+        return domain
+
+
 def first_unassigned_variable(assignment: dict, csp: CSP):
     """
     Get the first unselected variable.
@@ -68,6 +115,8 @@ def legal_values_count(csp: CSP, assignment, var):
     for val in csp.domains[var]:
         for constraint in related_constraints:
             if all(v in assignment for v in constraint.scope):
+                if csp.counting:
+                    csp.checks += 1
                 if not constraint.satisfied(assignment | {var: val}):
                     var_domain.remove(val)
     return len(var_domain)
@@ -85,33 +134,849 @@ def minimum_remaining_value(assignment, csp: CSP):
     return selected_var
 
 
-def AC3(csp: CSP) -> CSP:
-    def remove_inconsistent_values(v, associated_constraint: Constraint) -> bool:
-        removed = False
-        for value in csp.domains[v].copy():
-            for other_var in associated_constraint.scope:
-                if other_var != v:
-                    violated = True
-                    for other_value in csp.domains[other_var]:
-                        if associated_constraint.satisfied(
-                            {v: value, other_var: other_value}
+class MinimumRemainingValues(VariableSelector):
+    """
+    MRV variable ordering maintained incrementally in a bucket queue.
+
+    For every unassigned variable and every value of its domain, the selector
+    counts the assigned neighbours the value conflicts with. A variable's remaining
+    values are the values of its domain without conflict, and the unassigned
+    variables are stored in buckets indexed by this count, each one split in
+    sub-buckets indexed by the number of unassigned neighbours. Ties in the
+    lowest bucket are broken by the dom/deg rule, i.e. by taking a variable
+    from its highest sub-bucket, so a selection only scans the bucket and
+    sub-bucket indexes, whatever the number of variables.
+    """
+
+    def __init__(self):
+        self.conflicts = dict()
+        self.remaining = dict()
+        self.degree = dict()
+        self.neighbours = dict()
+        self.buckets = list()
+        self.sizes = list()
+        # The value of each assigned variable.
+        self.assigned = dict()
+
+    def setup(self, assignment: dict, csp: CSP):
+        self.neighbours = csp.neighbours
+        self.conflicts = {
+            var: {value: 0 for value in csp.domains[var]} for var in csp.variables
+        }
+        self.remaining = {var: len(csp.domains[var]) for var in csp.variables}
+        self.degree = {var: len(self.neighbours[var]) for var in csp.variables}
+        # The degrees only go down from here, and back.
+        max_degree = max(self.degree.values(), default=0)
+        self.buckets = [
+            [set() for _ in range(max_degree + 1)]
+            for _ in range(max(self.remaining.values(), default=0) + 1)
+        ]
+        self.sizes = [0] * len(self.buckets)
+        self.assigned = dict()
+        for var in csp.variables:
+            self._insert(var)
+        # The initial assignment is replayed as the search would make it.
+        for var, value in assignment.items():
+            self.assign(var, value, csp)
+
+    def __call__(self, assignment: dict, csp: CSP):
+        for remaining, size in enumerate(self.sizes):
+            if size:
+                for bucket in reversed(self.buckets[remaining]):
+                    if bucket:
+                        return next(iter(bucket))
+        return None
+
+    def _insert(self, var):
+        remaining = self.remaining[var]
+        self.buckets[remaining][self.degree[var]].add(var)
+        self.sizes[remaining] += 1
+
+    def _remove(self, var):
+        remaining = self.remaining[var]
+        self.buckets[remaining][self.degree[var]].remove(var)
+        self.sizes[remaining] -= 1
+
+    def _move(self, var, remaining: int):
+        old_remaining = self.remaining[var]
+        degree = self.degree[var]
+        self.buckets[old_remaining][degree].remove(var)
+        self.buckets[remaining][degree].add(var)
+        self.sizes[old_remaining] -= 1
+        self.sizes[remaining] += 1
+        self.remaining[var] = remaining
+
+    def _shift_degrees(self, var, step: int):
+        degree = self.degree
+        for other_var in self.neighbours[var]:
+            old_degree = degree[other_var]
+            degree[other_var] = old_degree + step
+            if other_var not in self.assigned:
+                bucket = self.buckets[self.remaining[other_var]]
+                bucket[old_degree].remove(other_var)
+                bucket[old_degree + step].add(other_var)
+
+    def _count_conflicts(self, var, value, csp: CSP, step: int):
+        counting = csp.counting
+        checks = 0
+        for constraint in csp.var_to_const[var]:
+            if constraint.not_equal:
+                other_var = constraint.other(var)
+                if other_var in self.assigned:
+                    continue
+                if counting:
+                    checks += 1
+                if value in csp.domains[other_var]:
+                    conflicts = self.conflicts[other_var]
+                    conflicts[value] += step
+                    if step > 0 and conflicts[value] == 1:
+                        self._move(other_var, self.remaining[other_var] - 1)
+                    elif step < 0 and conflicts[value] == 0:
+                        self._move(other_var, self.remaining[other_var] + 1)
+                continue
+            # A partial or binary constraint is checked on the pair, a larger
+            # one only once all its other variables are assigned.
+            pairwise = constraint.partial or len(constraint.scope) == 2
+            for other_var in constraint.scope:
+                if other_var == var or other_var in self.assigned:
+                    continue
+                if not pairwise and any(
+                    v != other_var and v not in self.assigned for v in constraint.scope
+                ):
+                    continue
+                conflicts = self.conflicts[other_var]
+                remaining = self.remaining[other_var]
+                if counting:
+                    checks += len(csp.domains[other_var])
+                for other_value in csp.domains[other_var]:
+                    if not (
+                        constraint.satisfied({var: value, other_var: other_value})
+                        if pairwise
+                        else constraint.satisfied_with(
+                            self.assigned, other_var, other_value
+                        )
+                    ):
+                        conflicts[other_value] += step
+                        if step > 0 and conflicts[other_value] == 1:
+                            remaining -= 1
+                        elif step < 0 and conflicts[other_value] == 0:
+                            remaining += 1
+                self._move(other_var, remaining)
+        if counting:
+            csp.checks += checks
+
+    def assign(self, var, value, csp: CSP):
+        self._remove(var)
+        self.assigned[var] = value
+        self._shift_degrees(var, -1)
+        self._count_conflicts(var, value, csp, 1)
+
+    def unassign(self, var, value, csp: CSP):
+        self._count_conflicts(var, value, csp, -1)
+        self._shift_degrees(var, 1)
+        del self.assigned[var]
+        self._insert(var)
+
+    def prune(self, var, value, csp: CSP):
+        if var not in self.assigned and not self.conflicts[var][value]:
+            self._move(var, self.remaining[var] - 1)
+
+    def restore(self, var, value, csp: CSP):
+        if var not in self.assigned and not self.conflicts[var][value]:
+            self._move(var, self.remaining[var] + 1)
+
+
+class WeightedDegree(VariableSelector):
+    """
+    Weighted degree variable ordering maintained incrementally in a lazy
+    heap.
+
+    Every constraint has a weight, starting at 1 and increased each time the
+    constraint rejects a value or wipes out a domain. The weighted degree of
+    a variable is the sum of the weights of its constraints with another
+    unassigned variable. The variable with the smallest domain is selected,
+    and among them the one with the highest weighted degree, so that the
+    search is drawn to the hard part of the problem as it learns where the
+    failures come from. Ordering by the domain size to weighted degree ratio
+    instead lets the weights override the domain sizes, which sends the
+    search astray on 16x16 grids.
+
+    The variables whose domain or weighted degree changes are only marked,
+    and a new heap entry is pushed for each of them at the next selection.
+    The outdated entries are skipped when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self.weights = list()
+        self.free = list()
+        self.wdeg = dict()
+        self.assigned = set()
+        self.version = dict()
+        self.dirty = set()
+        self.heap = list()
+        self.pushes = 0
+
+    def setup(self, assignment: dict, csp: CSP):
+        self.weights = [1] * len(csp.constraints)
+        self.assigned = set(assignment)
+        # The number of unassigned variables in the scope of each constraint.
+        self.free = [
+            sum(1 for var in constraint.scope if var not in self.assigned)
+            for constraint in csp.constraints
+        ]
+        self.wdeg = dict.fromkeys(csp.variables, 0)
+        for constraint in csp.constraints:
+            for var in constraint.scope:
+                if self._others(constraint, var):
+                    self.wdeg[var] += 1
+        self.version = dict.fromkeys(csp.variables, 0)
+        self.dirty = {var for var in csp.variables if var not in self.assigned}
+        self.heap = list()
+        self.pushes = 0
+
+    def __call__(self, assignment: dict, csp: CSP):
+        self._push_dirty(csp)
+        heap = self.heap
+        while heap:
+            _, _, _, var, version = heap[0]
+            if var not in self.assigned and version == self.version[var]:
+                return var
+            heapq.heappop(heap)
+        return None
+
+    def _others(self, constraint: Constraint, var) -> int:
+        """
+        Get the number of unassigned variables of a constraint besides var.
+        """
+        return self.free[constraint.id] - (var not in self.assigned)
+
+    def _push_dirty(self, csp: CSP):
+        if len(self.heap) > 4 * len(self.version):
+            # Too many outdated entries, the heap is rebuilt from scratch.
+            self.heap = list()
+            self.dirty = {var for var in self.version if var not in self.assigned}
+        for var in self.dirty:
+            if var in self.assigned:
+                continue
+            self.version[var] += 1
+            self.pushes += 1
+            heapq.heappush(
+                self.heap,
+                (
+                    len(csp.domains[var]),
+                    -self.wdeg[var],
+                    self.pushes,
+                    var,
+                    self.version[var],
+                ),
+            )
+        self.dirty.clear()
+
+    def assign(self, var, value, csp: CSP):
+        for constraint in csp.var_to_const[var]:
+            for other_var in constraint.scope:
+                if other_var != var and self._others(constraint, other_var) == 1:
+                    self.wdeg[other_var] -= self.weights[constraint.id]
+                    self.dirty.add(other_var)
+            self.free[constraint.id] -= 1
+        self.assigned.add(var)
+
+    def unassign(self, var, value, csp: CSP):
+        self.assigned.discard(var)
+        for constraint in csp.var_to_const[var]:
+            self.free[constraint.id] += 1
+            for other_var in constraint.scope:
+                if other_var != var and self._others(constraint, other_var) == 1:
+                    self.wdeg[other_var] += self.weights[constraint.id]
+                    self.dirty.add(other_var)
+        self.dirty.add(var)
+
+    def prune(self, var, value, csp: CSP):
+        self.dirty.add(var)
+
+    def restore(self, var, value, csp: CSP):
+        self.dirty.add(var)
+
+    def fail(self, constraint: Constraint, csp: CSP):
+        if constraint is None:
+            return
+        self.weights[constraint.id] += 1
+        for var in constraint.scope:
+            if self._others(constraint, var):
+                self.wdeg[var] += 1
+                self.dirty.add(var)
+
+
+def no_inference(csp: CSP, var: any, value: any, assignment: dict, removals: list):
+    """
+    Don't infer anything from a new assignment.
+
+    Parameters
+    ----------
+    csp : CSP
+    var : any
+    value : any
+    assignment : dict
+    removals : list
+
+    Returns
+    -------
+    bool
+    """
+    return True
+
+
+def forward_checking(
+    csp: CSP, var: any, value: any, assignment: dict, removals: list
+):
+    """
+    Remove the values of the unassigned neighbours of a variable that
+    conflict with its new value.
+
+    Parameters
+    ----------
+    csp : CSP
+    var : any
+        The variable which has just been assigned.
+    value : any
+        Its new value.
+    assignment : dict
+    removals : list
+        The trail where the pruned values are recorded.
+
+    Returns
+    -------
+    bool
+        False if the domain of a neighbour has been wiped out, the constraint
+        which wiped it out being kept in csp.conflict.
+    """
+    counting = csp.counting
+    checks = 0
+    try:
+        for constraint in csp.var_to_const[var]:
+            if constraint.not_equal:
+                other_var = constraint.other(var)
+                if other_var not in assignment:
+                    if counting:
+                        checks += 1
+                    if value in csp.domains[other_var]:
+                        csp.prune(other_var, value, removals)
+                        if not csp.domains[other_var]:
+                            csp.conflict = constraint
+                            return False
+                continue
+            # A partial or binary constraint is checked on the pair, a larger
+            # one only once all its other variables are assigned.
+            pairwise = constraint.partial or len(constraint.scope) == 2
+            for other_var in constraint.scope:
+                if other_var != var and other_var not in assignment:
+                    if not pairwise and any(
+                        v != other_var and v not in assignment for v in constraint.scope
+                    ):
+                        continue
+                    if counting:
+                        checks += len(csp.domains[other_var])
+                    for other_value in list(csp.domains[other_var]):
+                        if not (
+                            constraint.satisfied({var: value, other_var: other_value})
+                            if pairwise
+                            else constraint.satisfied_with(
+                                assignment, other_var, other_value
+                            )
                         ):
-                            violated = False
+                            csp.prune(other_var, other_value, removals)
+                    if not csp.domains[other_var]:
+                        csp.conflict = constraint
+                        return False
+        return True
+    finally:
+        if counting:
+            csp.checks += checks
+
+
+def _revise_not_equal(csp: CSP, var: any, other_var: any, removals: list) -> bool:
+    """
+    Revise an arc of a NotEqual constraint: a value of var only loses its
+    support when the domain of other_var is reduced to this very value.
+    """
+    if csp.counting:
+        csp.checks += 1
+    other_domain = csp.domains[other_var]
+    if len(other_domain) == 1:
+        (other_value,) = other_domain
+        if other_value in csp.domains[var]:
+            csp.prune(var, other_value, removals)
+            return True
+    return False
+
+
+def revise(csp: CSP, var: any, other_var: any, constraint: Constraint, removals: list):
+    """
+    Remove the values of a variable without support in the domain of the
+    other variable of a binary constraint.
+
+    Parameters
+    ----------
+    csp : CSP
+    var : any
+        The variable whose domain is revised.
+    other_var : any
+        The other variable of the constraint.
+    constraint : Constraint
+    removals : list
+        The trail where the pruned values are recorded.
+
+    Returns
+    -------
+    bool
+        True if the domain of var has been revised.
+    """
+    if constraint.not_equal:
+        return _revise_not_equal(csp, var, other_var, removals)
+    revised = False
+    checks = 0
+    for value in list(csp.domains[var]):
+        for other_value in csp.domains[other_var]:
+            checks += 1
+            if constraint.satisfied({var: value, other_var: other_value}):
+                break
+        else:
+            csp.prune(var, value, removals)
+            revised = True
+    if csp.counting:
+        csp.checks += checks
+    return revised
+
+
+class ResidualSupports:
+    """
+    Revision function of AC-2001.
+
+    The last support found for each (arc, value) pair is cached, and it is
+    only searched again once it has left the domain of the other variable.
+    """
+
+    def __init__(self):
+        self.last = dict()
+
+    def __call__(
+        self,
+        csp: CSP,
+        var: any,
+        other_var: any,
+        constraint: Constraint,
+        removals: list,
+    ):
+        """
+        Remove the values of a variable without support in the domain of the
+        other variable of a binary constraint.
+
+        Parameters
+        ----------
+        csp : CSP
+        var : any
+            The variable whose domain is revised.
+        other_var : any
+            The other variable of the constraint.
+        constraint : Constraint
+        removals : list
+            The trail where the pruned values are recorded.
+
+        Returns
+        -------
+        bool
+            True if the domain of var has been revised.
+        """
+        if constraint.not_equal:
+            return _revise_not_equal(csp, var, other_var, removals)
+        revised = False
+        checks = 0
+        other_domain = csp.domains[other_var]
+        for value in list(csp.domains[var]):
+            key = (var, constraint.id, value)
+            if key in self.last and self.last[key] in other_domain:
+                continue
+            for other_value in other_domain:
+                checks += 1
+                if constraint.satisfied({var: value, other_var: other_value}):
+                    self.last[key] = other_value
+                    break
+            else:
+                csp.prune(var, value, removals)
+                revised = True
+        if csp.counting:
+            csp.checks += checks
+        return revised
+
+
+def binary_arcs(csp: CSP):
+    """
+    Get all the arcs of the binary constraints of a CSP.
+
+    Parameters
+    ----------
+    csp : CSP
+
+    Returns
+    -------
+    deque
+        A queue of (var, other_var, constraint) arcs.
+    """
+    return deque(
+        (var, other_var, constraint)
+        for constraint in csp.constraints
+        for var in constraint.scope
+        for other_var in constraint.scope
+        if other_var != var
+    )
+
+
+def propagate_arcs(
+    csp: CSP,
+    queue: deque,
+    removals: list,
+    revise_arc=revise,
+    budget: SearchBudget = None,
+) -> tuple[bool, int]:
+    """
+    Revise the arcs of a queue until all of them are consistent.
+
+    Each arc is queued at most once at a time: an arc which is already
+    waiting in the queue isn't added again when a neighbour domain shrinks.
+    When the budget is exceeded, the propagation stops with the remaining
+    arcs left in the queue.
+
+    Parameters
+    ----------
+    csp : CSP
+    queue : deque
+        The (var, other_var, constraint) arcs to revise.
+    removals : list
+        The trail where the pruned values are recorded.
+    revise_arc : callable
+        The revision function.
+    budget : SearchBudget
+        The limits of the propagation, if any.
+
+    Returns
+    -------
+    tuple[bool, int]
+        False if a domain has been wiped out, and the number of revisions.
+    """
+    # The arcs are identified by the constraint ids, which hash faster.
+    pending = {(var, other_var, constraint.id) for var, other_var, constraint in queue}
+    revisions = 0
+    while queue:
+        if budget is not None and budget.exceeded():
+            break
+        (var, other_var, constraint) = queue.popleft()
+        pending.discard((var, other_var, constraint.id))
+        revisions += 1
+        if revise_arc(csp, var, other_var, constraint, removals):
+            if not csp.domains[var]:
+                csp.conflict = constraint
+                return False, revisions
+            for affected_constraint in csp.var_to_const[var]:
+                # Only the reverse of the arc just revised is left out, as
+                # other_var may share other constraints with var.
+                skipped = other_var if affected_constraint is constraint else var
+                for affected in affected_constraint.scope:
+                    if affected != var and affected != skipped:
+                        key = (affected, var, affected_constraint.id)
+                        if key not in pending:
+                            pending.add(key)
+                            queue.append((affected, var, affected_constraint))
+    return True, revisions
+
+
+def AC3(csp: CSP, budget: SearchBudget = None) -> tuple[CSP, int]:
+    """
+    Make all the arcs of a CSP consistent using AC-3.
+
+    Parameters
+    ----------
+    csp : CSP
+    budget : SearchBudget
+        The limits of the propagation, which stops early when exceeded.
+
+    Returns
+    -------
+    tuple[CSP, int]
+        The reduced CSP and the number of revisions.
+    """
+    _, revisions = propagate_arcs(csp, binary_arcs(csp), list(), budget=budget)
+    return csp, revisions
+
+
+def AC2001(csp: CSP, budget: SearchBudget = None) -> tuple[CSP, int]:
+    """
+    Make all the arcs of a CSP consistent using AC-2001.
+
+    Parameters
+    ----------
+    csp : CSP
+    budget : SearchBudget
+        The limits of the propagation, which stops early when exceeded.
+
+    Returns
+    -------
+    tuple[CSP, int]
+        The reduced CSP and the number of revisions.
+    """
+    _, revisions = propagate_arcs(
+        csp, binary_arcs(csp), list(), revise_arc=ResidualSupports(), budget=budget
+    )
+    return csp, revisions
+
+
+def maintain_arc_consistency(
+    csp: CSP, var: any, value: any, assignment: dict, removals: list
+):
+    """
+    Propagate a new assignment by making the arcs pointing to the variable
+    consistent, and then the arcs affected by each revision.
+
+    Parameters
+    ----------
+    csp : CSP
+    var : any
+        The variable which has just been assigned.
+    value : any
+        Its new value.
+    assignment : dict
+    removals : list
+        The trail where the pruned values are recorded.
+
+    Returns
+    -------
+    bool
+        False if a domain has been wiped out.
+    """
+    csp.suppose(var, value, removals)
+    queue = deque(
+        (other_var, var, constraint)
+        for constraint in csp.var_to_const[var]
+        for other_var in constraint.scope
+        if other_var != var
+    )
+    consistent, _ = propagate_arcs(csp, queue, removals)
+    return consistent
+
+
+def _augment(
+    var: any, domains: dict, matched_var: dict, matched_value: dict, visited: set
+):
+    """
+    Look for an augmenting path of the value matching starting from a
+    variable, and flip it if there is one.
+    """
+    for value in domains[var]:
+        if value not in visited:
+            visited.add(value)
+            other_var = matched_var.get(value)
+            if other_var is None or _augment(
+                other_var, domains, matched_var, matched_value, visited
+            ):
+                matched_var[value] = var
+                matched_value[var] = value
+                return True
+    return False
+
+
+def _strongly_connected_components(graph: dict) -> dict:
+    """
+    Get the strongly connected components of a directed graph with Tarjan's
+    algorithm, iteratively.
+
+    Returns
+    -------
+    dict
+        The root of the component of each node.
+    """
+    index = dict()
+    low = dict()
+    stack = list()
+    on_stack = set()
+    component = dict()
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component[member] = node
+                        if member == node:
                             break
-                    if violated:
-                        csp.domains[v].remove(value)
-                        removed = True
-        return removed
+    return component
+
+
+def all_different_filter(
+    csp: CSP, constraint: AllDifferent, removals: list
+) -> tuple[bool, list]:
+    """
+    Remove the values which can't be part of any solution of an AllDifferent
+    constraint, using Régin's matching-based filtering.
+
+    A maximum matching between the variables and the values is searched. If
+    it doesn't cover all the variables, the constraint can't be satisfied.
+    Otherwise, a value is kept in a domain if it is matched to the variable,
+    if it lies on an alternating cycle with it, or if it can be reached by an
+    alternating path from a free value.
+
+    Parameters
+    ----------
+    csp : CSP
+    constraint : AllDifferent
+    removals : list
+        The trail where the pruned values are recorded.
+
+    Returns
+    -------
+    tuple[bool, list]
+        False if the constraint can't be satisfied, and the variables whose
+        domain has been reduced.
+    """
+    domains = csp.domains
+    variables = list(constraint.scope)
+    if csp.counting:
+        csp.checks += sum(len(domains[var]) for var in variables)
+
+    matched_var = dict()
+    matched_value = dict()
+    for var in variables:
+        if not _augment(var, domains, matched_var, matched_value, set()):
+            return False, []
+
+    # The matching edges go from the variables to the values and the other
+    # edges from the values to the variables, so that the directed paths are
+    # the alternating paths. The nodes are tagged, as variables and values
+    # may look the same.
+    graph = {(0, var): [(1, matched_value[var])] for var in variables}
+    for var in variables:
+        for value in domains[var]:
+            if value != matched_value[var]:
+                graph.setdefault((1, value), list()).append((0, var))
+            else:
+                graph.setdefault((1, value), list())
+
+    reachable = {
+        node for node in graph if node[0] == 1 and node[1] not in matched_var
+    }
+    queue = deque(reachable)
+    while queue:
+        for successor in graph[queue.popleft()]:
+            if successor not in reachable:
+                reachable.add(successor)
+                queue.append(successor)
+
+    component = _strongly_connected_components(graph)
+    revised = list()
+    for var in variables:
+        for value in list(domains[var]):
+            if (
+                value != matched_value[var]
+                and (1, value) not in reachable
+                and component[(0, var)] != component[(1, value)]
+            ):
+                csp.prune(var, value, removals)
+                if not revised or revised[-1] != var:
+                    revised.append(var)
+    return True, revised
 
-    arcs = csp.var_to_const.copy()
-    while len(arcs) > 0:
-        (var, associated_constraints) = arcs.popitem()
-        for constraint in associated_constraints:
-            if remove_inconsistent_values(var, constraint):
-                for affected in csp.neighbour(var):
-                    arcs[affected] = csp.var_to_const[affected]
 
-    return csp
+def propagate_all_different(
+    csp: CSP, queue: deque, removals: list, budget: SearchBudget = None
+) -> bool:
+    """
+    Filter the AllDifferent constraints of a queue, and then the ones
+    sharing a variable whose domain has been reduced, until none of them
+    removes anything, or until the budget is exceeded.
+
+    Parameters
+    ----------
+    csp : CSP
+    queue : deque
+        The AllDifferent constraints to filter.
+    removals : list
+        The trail where the pruned values are recorded.
+    budget : SearchBudget
+        The limits of the propagation, if any.
+
+    Returns
+    -------
+    bool
+        False if a constraint can't be satisfied anymore.
+    """
+    pending = {constraint.id for constraint in queue}
+    while queue:
+        if budget is not None and budget.exceeded():
+            break
+        constraint = queue.popleft()
+        pending.discard(constraint.id)
+        consistent, revised = all_different_filter(csp, constraint, removals)
+        if not consistent:
+            csp.conflict = constraint
+            return False
+        for var in revised:
+            for affected in csp.var_to_const[var]:
+                if isinstance(affected, AllDifferent) and affected.id not in pending:
+                    pending.add(affected.id)
+                    queue.append(affected)
+    return True
+
+
+def maintain_all_different(
+    csp: CSP, var: any, value: any, assignment: dict, removals: list
+):
+    """
+    Propagate a new assignment through the AllDifferent constraints of the
+    variable, and then through the ones affected by each filtering. The
+    other constraints are only checked by the search.
+
+    Parameters
+    ----------
+    csp : CSP
+    var : any
+        The variable which has just been assigned.
+    value : any
+        Its new value.
+    assignment : dict
+    removals : list
+        The trail where the pruned values are recorded.
+
+    Returns
+    -------
+    bool
+        False if a constraint can't be satisfied anymore.
+    """
+    csp.suppose(var, value, removals)
+    queue = deque(
+        constraint
+        for constraint in csp.var_to_const[var]
+        if isinstance(constraint, AllDifferent)
+    )
+    return propagate_all_different(csp, queue, removals)
 
 
 def most_constrained_variable(assignment: dict, csp: CSP):
@@ -155,18 +1020,240 @@ def least_constraining_value(var: any, assignment: dict, csp: CSP):
         """
         values_count = 0
         for constraint in csp.var_to_const[var]:
+            if constraint.not_equal:
+                var2 = constraint.other(var)
+                if var2 in assignment:
+                    if csp.counting:
+                        csp.checks += 1
+                    values_count += assignment[var2] == value
+                continue
             for var2 in constraint.scope:
-                if var is not var2 and var2 in assignment and not constraint.satisfied(assignment | {var: value}):
-                    values_count += 1
+                if var is not var2 and var2 in assignment:
+                    if csp.counting:
+                        csp.checks += 1
+                    if not constraint.satisfied(assignment | {var: value}):
+                        values_count += 1
         return values_count
 
     return sorted(csp.domains[var], key=conflicts_count)
 
 
+class SearchFrame:
+    """
+    A level of the explicit stack of a BacktrackingSearch.
+    """
+
+    __slots__ = ("var", "values", "index", "value", "removals")
+
+    def __init__(self, var: any, values: list):
+        self.var = var
+        self.values = values
+        self.index = 0
+        self.value = None
+        self.removals = None
+
+
+class BacktrackingSearch:
+    """
+    Backtracking search driven by an explicit stack instead of recursion.
+
+    Each level of the stack records the variable, its ordered values, the
+    next value to try and the trail of the current value, so the search can
+    be paused after a given number of nodes and resumed later, or pickled
+    and resumed in another process.
+    """
+
+    def __init__(
+        self,
+        csp: CSP,
+        select_unassigned_variable=first_unassigned_variable,
+        order_domain_values=unorder_domain_values,
+        inference=no_inference,
+        budget: SearchBudget = None,
+    ):
+        """
+        Create a BacktrackingSearch instance.
+
+        Parameters
+        ----------
+        csp : CSP
+            The constraint satisfaction problem.
+        select_unassigned_variable : callable
+            How the variables are sorted.
+        order_domain_values : callable
+            How the domain ise sorted.
+        inference : callable
+            What is inferred from each new assignment.
+        budget : SearchBudget
+            The limits of the search, checked at each node.
+        """
+        self.csp = csp
+        self.select_unassigned_variable = select_unassigned_variable
+        self.order_domain_values = order_domain_values
+        self.inference = inference
+        self.budget = budget
+        self.selector = (
+            select_unassigned_variable
+            if isinstance(select_unassigned_variable, VariableSelector)
+            else None
+        )
+
+        self.assignment = csp.apply_constraints()
+        self.removals = list()
+        self.stack = list()
+        self.nodes = 0
+        self.backtracks = 0
+        self.pruned = 0
+        self.max_depth = 0
+        self.solution = None
+        self.status = SearchStatus.RUNNING
+        self.started = False
+
+        if all(
+            inference(csp, var, value, self.assignment, self.removals)
+            for var, value in self.assignment.copy().items()
+        ):
+            self.pruned = len(self.removals)
+            if self.selector:
+                self.selector.setup(self.assignment, csp)
+        else:
+            self.close()
+
+    def _expand(self):
+        if len(self.assignment) == len(self.csp.variables):
+            self.solution = self.assignment.copy()
+            self.status = SearchStatus.SOLVED
+            return
+        var = self.select_unassigned_variable(self.assignment, self.csp)
+        values = list(self.order_domain_values(var, self.assignment, self.csp))
+        self.stack.append(SearchFrame(var, values))
+
+    def _assign(self, frame: SearchFrame, value: any) -> bool:
+        self.assignment[frame.var] = value
+        frame.value = value
+        frame.removals = list()
+        if self.selector:
+            self.selector.assign(frame.var, value, self.csp)
+        consistent = self.inference(
+            self.csp, frame.var, value, self.assignment, frame.removals
+        )
+        self.pruned += len(frame.removals)
+        if self.selector:
+            for pruned_var, pruned_value in frame.removals:
+                self.selector.prune(pruned_var, pruned_value, self.csp)
+            if not consistent:
+                self.selector.fail(self.csp.conflict, self.csp)
+        return consistent
+
+    def _unassign(self, frame: SearchFrame):
+        if self.selector:
+            for pruned_var, pruned_value in reversed(frame.removals):
+                self.selector.restore(pruned_var, pruned_value, self.csp)
+        self.csp.restore(frame.removals)
+        del self.assignment[frame.var]
+        if self.selector:
+            self.selector.unassign(frame.var, frame.value, self.csp)
+        frame.removals = None
+
+    def step(self, max_nodes: int = None) -> SearchStatus:
+        """
+        Run the search until a solution is found, the search space is
+        exhausted or max_nodes new nodes have been expanded.
+
+        When called after a solution has been found, the search goes on
+        looking for the next one.
+
+        Parameters
+        ----------
+        max_nodes : int
+            The number of nodes to expand before pausing, unlimited by
+            default.
+
+        Returns
+        -------
+        SearchStatus
+            RUNNING if the search has been paused, BUDGET_EXCEEDED or
+            CANCELLED if the budget stopped it. In any of these cases, the
+            search can be resumed by calling step again.
+        """
+        if self.status is SearchStatus.SOLVED:
+            self.status = SearchStatus.RUNNING
+        elif not self.started and self.status is SearchStatus.RUNNING:
+            self.started = True
+            self._expand()
+
+        nodes = 0
+        while self.status is SearchStatus.RUNNING:
+            if not self.stack:
+                self.close()
+                break
+
+            frame = self.stack[-1]
+            if frame.removals is not None:
+                self._unassign(frame)
+            if frame.index == len(frame.values):
+                self.stack.pop()
+                self.backtracks += 1
+                continue
+            if max_nodes is not None and nodes >= max_nodes:
+                break
+
+            value = frame.values[frame.index]
+            frame.index += 1
+            if not self.csp.consistent_value(self.assignment, frame.var, value):
+                if self.selector:
+                    self.selector.fail(self.csp.conflict, self.csp)
+                continue
+            if self.budget is not None and not self.budget.spend_node():
+                frame.index -= 1
+                return self.budget.status
+
+            nodes += 1
+            self.nodes += 1
+            if len(self.stack) > self.max_depth:
+                self.max_depth = len(self.stack)
+            if self._assign(frame, value):
+                self._expand()
+
+        return self.status
+
+    def run(self):
+        """
+        Run the search until the next solution.
+
+        Returns
+        -------
+        dict
+            The solution, or None if there isn't any other solution.
+        """
+        if self.step() is SearchStatus.SOLVED:
+            return self.solution
+        return None
+
+    def close(self):
+        """
+        Stop the search and put back the domains of the CSP as they were
+        before the search.
+
+        Returns
+        -------
+        None
+        """
+        while self.stack:
+            frame = self.stack.pop()
+            if frame.removals is not None:
+                self._unassign(frame)
+        self.csp.restore(self.removals)
+        self.status = SearchStatus.EXHAUSTED
+
+
 def backtracking_search(
     csp: CSP,
     select_unassigned_variable=first_unassigned_variable,
     order_domain_values=unorder_domain_values,
+    inference=no_inference,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
 ):
     """
     Implementation of the backtracking search algorithm.
@@ -179,14 +1266,642 @@ def backtracking_search(
         How the variables are sorted.
     order_domain_values : callable
         How the domain ise sorted.
+    inference : callable
+        What is inferred from each new assignment.
+    statistics : SearchStatistics
+        Where the search counters are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any.
 
     Returns
     -------
     dict
+        The solution, or None if there isn't any or the budget stopped the
+        search.
+    """
+    counting = csp.counting
+    if statistics is not None:
+        csp.count_checks()
+    checks = csp.checks
+    search = BacktrackingSearch(
+        csp, select_unassigned_variable, order_domain_values, inference, budget
+    )
+    solution = search.run()
+    search.close()
+    csp.count_checks(counting)
+    if statistics is not None:
+        statistics.nodes += search.nodes
+        statistics.backtracks += search.backtracks
+        statistics.checks += csp.checks - checks
+        statistics.pruned += search.pruned
+        statistics.max_depth = max(statistics.max_depth, search.max_depth)
+    return solution
+
+
+def backtracking_solutions(
+    csp: CSP,
+    select_unassigned_variable=first_unassigned_variable,
+    order_domain_values=unorder_domain_values,
+    inference=no_inference,
+    limit: int = None,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
+):
     """
-    return recursive_backtracking(
-        csp.apply_constraints(), csp, select_unassigned_variable, order_domain_values
+    Enumerate the solutions of a CSP lazily.
+
+    A single BacktrackingSearch is resumed after each solution, so only the
+    current search path is held in memory and nothing is explored twice.
+    The domains of the CSP are put back when the enumeration ends or is
+    closed.
+
+    Parameters
+    ----------
+    csp : CSP
+        The constraint satisfaction problem.
+    select_unassigned_variable : callable
+        How the variables are sorted.
+    order_domain_values : callable
+        How the domain ise sorted.
+    inference : callable
+        What is inferred from each new assignment.
+    limit : int
+        The number of solutions after which the enumeration stops, unlimited
+        by default.
+    statistics : SearchStatistics
+        Where the search counters are added when the enumeration ends, if
+        given.
+    budget : SearchBudget
+        The limits of the search, which ends the enumeration when exceeded.
+
+    Returns
+    -------
+    Iterator[dict]
+        The solutions, in the same format as backtracking_search results.
+    """
+    counting = csp.counting
+    if statistics is not None:
+        csp.count_checks()
+    checks = csp.checks
+    search = BacktrackingSearch(
+        csp, select_unassigned_variable, order_domain_values, inference, budget
     )
+    count = 0
+    try:
+        while limit is None or count < limit:
+            if search.step() is not SearchStatus.SOLVED:
+                return
+            count += 1
+            yield search.solution
+    finally:
+        search.close()
+        csp.count_checks(counting)
+        if statistics is not None:
+            statistics.nodes += search.nodes
+            statistics.backtracks += search.backtracks
+            statistics.checks += csp.checks - checks
+            statistics.pruned += search.pruned
+            statistics.max_depth = max(statistics.max_depth, search.max_depth)
+
+
+class NogoodStore:
+    """
+    A bounded store of nogoods, the sets of (variable, value) assignments
+    found to have no solution together.
+
+    Each nogood is indexed by its assignments, so that only the nogoods of a
+    new assignment are checked, and the least recently used nogood is
+    evicted once the store is full.
+    """
+
+    def __init__(self, limit: int = 128):
+        """
+        Create a NogoodStore instance.
+
+        Parameters
+        ----------
+        limit : int
+            The number of nogoods kept.
+        """
+        self.limit = limit
+        self.nogoods = OrderedDict()
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.nogoods)
+
+    def add(self, nogood: frozenset):
+        """
+        Record a nogood, evicting the least recently used one if the store is
+        full.
+
+        Parameters
+        ----------
+        nogood : frozenset[tuple]
+            The (variable, value) assignments.
+
+        Returns
+        -------
+        None
+        """
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+        self.nogoods[nogood] = None
+        for literal in nogood:
+            self.index.setdefault(literal, set()).add(nogood)
+        if len(self.nogoods) > self.limit:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for literal in evicted:
+                nogoods = self.index[literal]
+                nogoods.discard(evicted)
+                if not nogoods:
+                    del self.index[literal]
+
+    def violated(self, assignment: dict, var: any, value: any):
+        """
+        Find a nogood which giving a value to a variable would complete.
+
+        Parameters
+        ----------
+        assignment : dict
+        var : any
+            The variable to assign.
+        value : any
+            The value of the variable.
+
+        Returns
+        -------
+        frozenset
+            The nogood, or None if there isn't any.
+        """
+        for nogood in self.index.get((var, value), ()):
+            for other_var, other_value in nogood:
+                if other_var != var and assignment.get(other_var) != other_value:
+                    break
+            else:
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+
+class BackjumpFrame(SearchFrame):
+    """
+    A level of the stack of the conflict-directed backjumping, with the
+    conflict set of its variable.
+    """
+
+    __slots__ = ("conflicts",)
+
+    def __init__(self, var: any, values: list, conflicts: set):
+        super().__init__(var, values)
+        self.conflicts = conflicts
+
+
+def conflict_directed_backjumping(
+    csp: CSP,
+    select_unassigned_variable=first_unassigned_variable,
+    order_domain_values=unorder_domain_values,
+    nogood_limit: int = 128,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
+):
+    """
+    Forward checking search with conflict-directed backjumping and nogood
+    recording.
+
+    The conflict set of a variable gathers the earlier variables which
+    pruned its domain or ruled out one of its values. When all the values
+    of a variable fail, the search jumps back to the latest variable of its
+    conflict set, which inherits the rest of the set, instead of the
+    previous one. The assignments of the conflict set are also recorded as
+    a nogood, so that the same combination is rejected right away when it
+    comes back under other choices.
+
+    On the pathological benchmark corpus it visits fewer nodes than
+    forward checking with MRV for every hash seed tried, but the conflict
+    sets cost about as much time as the nodes they save, so both run in a
+    similar wall time.
+
+    Parameters
+    ----------
+    csp : CSP
+        The constraint satisfaction problem.
+    select_unassigned_variable : callable
+        How the variables are sorted.
+    order_domain_values : callable
+        How the domain is sorted.
+    nogood_limit : int
+        The number of nogoods kept, the least recently used ones being
+        forgotten first.
+    statistics : SearchStatistics
+        Where the search counters are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any.
+
+    Returns
+    -------
+    dict
+        The solution, or None if there isn't any or the budget stopped the
+        search.
+    """
+    counting = csp.counting
+    if statistics is not None:
+        csp.count_checks()
+    checks = csp.checks
+    nodes = backtracks = pruned = max_depth = 0
+    selector = (
+        select_unassigned_variable
+        if isinstance(select_unassigned_variable, VariableSelector)
+        else None
+    )
+
+    assignment = csp.apply_constraints()
+    root_removals = list()
+    # The variables whose assignment pruned each domain, the latest last.
+    reasons = {var: list() for var in csp.variables}
+    depth = dict()
+    stack = list()
+    nogoods = NogoodStore(nogood_limit)
+    solution = None
+
+    def unassign(frame: BackjumpFrame):
+        if selector:
+            for pruned_var, pruned_value in reversed(frame.removals):
+                selector.restore(pruned_var, pruned_value, csp)
+        for pruned_var in dict.fromkeys(var for var, _ in frame.removals):
+            reasons[pruned_var].pop()
+        csp.restore(frame.removals)
+        del assignment[frame.var]
+        if selector:
+            selector.unassign(frame.var, frame.value, csp)
+        frame.removals = None
+
+    consistent = all(
+        forward_checking(csp, var, value, assignment, root_removals)
+        for var, value in assignment.copy().items()
+    )
+    if consistent:
+        pruned = len(root_removals)
+        if selector:
+            selector.setup(assignment, csp)
+
+    while consistent and len(assignment) < len(csp.variables):
+        var = select_unassigned_variable(assignment, csp)
+        depth[var] = len(stack)
+        stack.append(
+            BackjumpFrame(
+                var, list(order_domain_values(var, assignment, csp)), set(reasons[var])
+            )
+        )
+        max_depth = max(max_depth, len(stack))
+
+        while True:
+            frame = stack[-1]
+            if frame.removals is not None:
+                unassign(frame)
+
+            if frame.index == len(frame.values):
+                stack.pop()
+                del depth[frame.var]
+                backtracks += 1
+                conflicts = frame.conflicts
+                if not conflicts:
+                    consistent = False
+                    break
+                nogoods.add(
+                    frozenset((other, assignment[other]) for other in conflicts)
+                )
+                target = max(conflicts, key=depth.__getitem__)
+                while stack[-1].var != target:
+                    skipped = stack.pop()
+                    unassign(skipped)
+                    del depth[skipped.var]
+                stack[-1].conflicts |= conflicts - {target}
+                continue
+
+            if budget is not None and not budget.spend_node():
+                consistent = False
+                break
+            value = frame.values[frame.index]
+            frame.index += 1
+            if not csp.consistent_value(assignment, frame.var, value):
+                if selector:
+                    selector.fail(csp.conflict, csp)
+                frame.conflicts.update(
+                    other for other in csp.neighbour(frame.var) if other in depth
+                )
+                continue
+            nogood = nogoods.violated(assignment, frame.var, value)
+            if nogood is not None:
+                frame.conflicts.update(
+                    other for other, _ in nogood if other != frame.var
+                )
+                continue
+
+            nodes += 1
+            assignment[frame.var] = value
+            frame.value = value
+            frame.removals = list()
+            if selector:
+                selector.assign(frame.var, value, csp)
+            consistent = forward_checking(
+                csp, frame.var, value, assignment, frame.removals
+            )
+            for pruned_var in dict.fromkeys(var for var, _ in frame.removals):
+                reasons[pruned_var].append(frame.var)
+            pruned += len(frame.removals)
+            if selector:
+                for pruned_var, pruned_value in frame.removals:
+                    selector.prune(pruned_var, pruned_value, csp)
+                if not consistent:
+                    selector.fail(csp.conflict, csp)
+            if consistent:
+                break
+            # The wiped out domain is the last one forward checking pruned.
+            wiped_var = frame.removals[-1][0]
+            frame.conflicts.update(
+                other for other in reasons[wiped_var] if other != frame.var
+            )
+            consistent = True
+
+    if consistent:
+        solution = assignment.copy()
+    while stack:
+        frame = stack.pop()
+        if frame.removals is not None:
+            unassign(frame)
+    csp.restore(root_removals)
+    csp.count_checks(counting)
+
+    if statistics is not None:
+        statistics.nodes += nodes
+        statistics.backtracks += backtracks
+        statistics.checks += csp.checks - checks
+        statistics.pruned += pruned
+        statistics.max_depth = max(statistics.max_depth, max_depth)
+    return solution
+
+
+def dancing_links_solutions(
+    csp: SudokuCSP, statistics: SearchStatistics = None, budget: SearchBudget = None
+):
+    """
+    Enumerate the solutions of a sudoku with Knuth's Algorithm X on dancing
+    links.
+
+    The sudoku is turned into an exact cover problem whose rows are the
+    (cell, value) candidates of the CSP domains and whose columns are the
+    cell, row-value, column-value and box-value constraints. The search uses
+    an explicit stack, so grids of any size can be solved.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+        The sudoku problem.
+    statistics : SearchStatistics
+        Where the number of selected rows is added, if given.
+    budget : SearchBudget
+        The limits of the search, which ends the enumeration when exceeded.
+
+    Returns
+    -------
+    Iterator[dict]
+        The solutions, in the same format as backtracking_search results.
+    """
+    length = len(csp.sudoku_map)
+    size = round(math.sqrt(length))
+    area = length ** 2
+
+    def rows():
+        for x in range(length):
+            for y in range(length):
+                box = (x // size) * size + y // size
+                for value in sorted(int(v) for v in csp.domains[f"{x}, {y}"]):
+                    if 1 <= value <= length:
+                        yield (x, y, value), (
+                            1 + x * length + y,
+                            1 + area + x * length + value - 1,
+                            1 + 2 * area + y * length + value - 1,
+                            1 + 3 * area + box * length + value - 1,
+                        )
+
+    for chosen in _exact_cover_solutions(4 * area, rows(), statistics, budget):
+        yield {f"{x}, {y}": value for x, y, value in chosen}
+
+
+def _exact_cover_solutions(
+    columns: int, rows, statistics: SearchStatistics, budget: SearchBudget
+):
+    """
+    Enumerate the solutions of an exact cover problem with Algorithm X on
+    dancing links.
+
+    Parameters
+    ----------
+    columns : int
+        The number of columns, numbered from 1.
+    rows : Iterable[tuple[any, tuple[int]]]
+        The candidate of each row and the columns it covers.
+    statistics : SearchStatistics
+    budget : SearchBudget
+
+    Returns
+    -------
+    Iterator[list]
+        The candidates of the rows of each solution.
+    """
+    # Node 0 is the root and nodes 1 to columns are the column headers.
+    left = [i - 1 for i in range(columns + 1)]
+    right = [i + 1 for i in range(columns + 1)]
+    left[0], right[columns] = columns, 0
+    up = list(range(columns + 1))
+    down = list(range(columns + 1))
+    column = list(range(columns + 1))
+    column_size = [0] * (columns + 1)
+    candidate = [None] * (columns + 1)
+
+    for row_candidate, row_columns in rows:
+        first = None
+        for col in row_columns:
+            node = len(column)
+            column.append(col)
+            candidate.append(row_candidate)
+            up.append(up[col])
+            down.append(col)
+            down[up[col]] = node
+            up[col] = node
+            column_size[col] += 1
+            if first is None:
+                first = node
+                left.append(node)
+                right.append(node)
+            else:
+                left.append(left[first])
+                right.append(first)
+                right[left[first]] = node
+                left[first] = node
+
+    def cover(col):
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                column_size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(col):
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                column_size[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def select_row(node):
+        chosen.append(node)
+        if statistics is not None:
+            statistics.nodes += 1
+            statistics.max_depth = max(statistics.max_depth, len(chosen))
+        j = right[node]
+        while j != node:
+            cover(column[j])
+            j = right[j]
+
+    chosen = list()
+    while True:
+        if budget is not None and not budget.spend_node():
+            return
+        backtrack = True
+        if right[0] == 0:
+            yield [candidate[node] for node in chosen]
+        else:
+            col, best_size = 0, len(column)
+            c = right[0]
+            while c != 0:
+                if column_size[c] < best_size:
+                    col, best_size = c, column_size[c]
+                    if best_size <= 1:
+                        break
+                c = right[c]
+            if best_size:
+                cover(col)
+                select_row(down[col])
+                backtrack = False
+            elif statistics is not None:
+                statistics.backtracks += 1
+
+        while backtrack:
+            if not chosen:
+                return
+            node = chosen.pop()
+            j = left[node]
+            while j != node:
+                uncover(column[j])
+                j = left[j]
+            node = down[node]
+            if node == column[node]:
+                uncover(node)
+                if statistics is not None:
+                    statistics.backtracks += 1
+            else:
+                select_row(node)
+                backtrack = False
+
+
+def dancing_links_search(
+    csp: SudokuCSP, statistics: SearchStatistics = None, budget: SearchBudget = None
+):
+    """
+    Solve a sudoku with the dancing links exact cover solver.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+        The sudoku problem.
+    statistics : SearchStatistics
+        Where the search counters are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any.
+
+    Returns
+    -------
+    dict
+    """
+    return next(dancing_links_solutions(csp, statistics, budget), None)
+
+
+def count_solutions(
+    csp: BitSudokuCSP, limit: int = None, budget: SearchBudget = None
+) -> int:
+    """
+    Count the solutions of a sudoku, stopping as soon as limit of them have
+    been found. With a limit of 2, this tells whether the solution is unique.
+
+    The count runs the dancing links search over the empty cells and the
+    unit values still missing: its choice of the most constrained cell or
+    unit value prunes the search much more than the bitmask search does,
+    which matters when the whole tree has to be explored.
+
+    Parameters
+    ----------
+    csp : BitSudokuCSP
+        The sudoku problem.
+    limit : int
+        The number of solutions after which the count stops, unlimited by
+        default.
+    budget : SearchBudget
+        The limits of the search, if any. Check its status to know whether
+        the count is complete.
+
+    Returns
+    -------
+    int
+    """
+    if not csp.valid:
+        return 0
+
+    length, area = csp.length, csp.length ** 2
+    empty = [cell for cell, value in enumerate(csp.cells) if not value]
+
+    # Only the constraints which the givens don't fulfill yet are columns.
+    columns = {cell: i for i, cell in enumerate(empty, 1)}
+    for offset, masks in enumerate((csp.rows, csp.cols, csp.boxes), 1):
+        for unit, mask in enumerate(masks):
+            for value in range(length):
+                if not mask >> value & 1:
+                    columns[offset * area + unit * length + value] = len(columns) + 1
+
+    def rows():
+        for cell in empty:
+            candidates = csp.candidates(cell)
+            for value in range(length):
+                if candidates >> value & 1:
+                    yield None, (
+                        columns[cell],
+                        columns[area + csp.row_of[cell] * length + value],
+                        columns[2 * area + csp.col_of[cell] * length + value],
+                        columns[3 * area + csp.box_of[cell] * length + value],
+                    )
+
+    count = 0
+    solutions = _exact_cover_solutions(len(columns), rows(), None, budget)
+    for _ in solutions:
+        count += 1
+        if count == limit:
+            break
+    solutions.close()
+    return count
 
 
 def recursive_backtracking(
@@ -194,10 +1909,14 @@ def recursive_backtracking(
     csp: CSP,
     select_unassigned_variable=first_unassigned_variable,
     order_domain_values=unorder_domain_values,
+    inference=no_inference,
 ):
     """
     Recursive backtracking function.
 
+    The values pruned by the inference are recorded on a trail and put back
+    in their domains when the search goes back up.
+
     Parameters
     ----------
     assignment : dict
@@ -208,6 +1927,8 @@ def recursive_backtracking(
         How the variables are sorted.
     order_domain_values : callable
         How the domain ise sorted.
+    inference : callable
+        What is inferred from each new assignment.
 
     Returns
     -------
@@ -217,17 +1938,188 @@ def recursive_backtracking(
         return assignment
 
     var = select_unassigned_variable(assignment, csp)
+    selector = (
+        select_unassigned_variable
+        if isinstance(select_unassigned_variable, VariableSelector)
+        else None
+    )
 
-    for value in order_domain_values(var, assignment, csp):
-        if csp.consistent_with(assignment, {var: value}):
+    for value in list(order_domain_values(var, assignment, csp)):
+        if csp.consistent_value(assignment, var, value):
             assignment[var] = value
-            result = recursive_backtracking(
-                assignment,
-                csp,
-                select_unassigned_variable=select_unassigned_variable,
-                order_domain_values=order_domain_values,
-            )
+            if selector:
+                selector.assign(var, value, csp)
+            removals = list()
+            consistent = inference(csp, var, value, assignment, removals)
+            if selector:
+                for pruned_var, pruned_value in removals:
+                    selector.prune(pruned_var, pruned_value, csp)
+                if not consistent:
+                    selector.fail(csp.conflict, csp)
+            result = None
+            if consistent:
+                result = recursive_backtracking(
+                    assignment,
+                    csp,
+                    select_unassigned_variable=select_unassigned_variable,
+                    order_domain_values=order_domain_values,
+                    inference=inference,
+                )
+            if selector:
+                for pruned_var, pruned_value in reversed(removals):
+                    selector.restore(pruned_var, pruned_value, csp)
+            csp.restore(removals)
             if result is not None:
                 return result
             assignment.pop(var)
+            if selector:
+                selector.unassign(var, value, csp)
+        elif selector:
+            selector.fail(csp.conflict, csp)
     return None
+
+
+def bitmask_search(
+    csp: BitSudokuCSP, statistics: SearchStatistics = None, budget: SearchBudget = None
+):
+    """
+    Backtracking search over a bitmask sudoku representation.
+
+    After each assignment, the naked singles (the cells left with a single
+    candidate) and the hidden singles (the values which fit a single cell of
+    a unit) are filled until there are none left, and the cells filled this
+    way are recorded on a trail to be emptied on backtrack. The empty cell
+    with the fewest candidates is then filled next, in the most filled units
+    on a tie. The search uses an explicit stack so that large grids don't
+    hit the recursion limit.
+
+    Parameters
+    ----------
+    csp : BitSudokuCSP
+        The sudoku problem.
+    statistics : SearchStatistics
+        Where the search counters are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any. The cells assigned when the budget
+        stops the search are left in the CSP.
+
+    Returns
+    -------
+    dict
+    """
+    if not csp.valid:
+        return None
+
+    candidates_of = csp.candidates
+    counting = statistics is not None
+    empty = {cell for cell, value in enumerate(csp.cells) if not value}
+    units = list(enumerate(csp.units))
+
+    def propagate(trail: list) -> bool:
+        while True:
+            singles = dict()
+            for cell in empty:
+                candidates = candidates_of(cell)
+                if not candidates & (candidates - 1):
+                    if not candidates:
+                        return False
+                    singles[cell] = candidates
+            if counting:
+                csp.checks += len(empty)
+
+            for unit, cells in units:
+                placed = placed_twice = 0
+                for cell in cells:
+                    if cell in empty:
+                        candidates = candidates_of(cell)
+                        placed_twice |= placed & candidates
+                        placed |= candidates
+                if placed != csp.full_mask & ~csp.unit_mask(unit):
+                    # A missing value doesn't fit any cell of the unit.
+                    return False
+                hidden = placed & ~placed_twice
+                if hidden:
+                    for cell in cells:
+                        if cell in empty and candidates_of(cell) & hidden:
+                            bit = candidates_of(cell) & hidden
+                            if bit & (bit - 1) or singles.get(cell, bit) != bit:
+                                return False
+                            singles[cell] = bit
+                if counting:
+                    csp.checks += len(cells)
+
+            if not singles:
+                return True
+            for cell, bit in singles.items():
+                if not candidates_of(cell) & bit:
+                    return False
+                csp.assign(cell, bit.bit_length())
+                empty.remove(cell)
+                trail.append(cell)
+
+    def undo(trail: list):
+        for cell in reversed(trail):
+            csp.unassign(cell)
+            empty.add(cell)
+
+    def select():
+        # Ties are broken by taking the cell whose units are the most filled.
+        best_cell, best_key = None, None
+        for cell in empty:
+            key = (
+                bin(candidates_of(cell)).count("1"),
+                -bin(csp.rows[csp.row_of[cell]]).count("1")
+                - bin(csp.cols[csp.col_of[cell]]).count("1")
+                - bin(csp.boxes[csp.box_of[cell]]).count("1"),
+            )
+            if best_key is None or key < best_key:
+                best_cell, best_key = cell, key
+        if counting:
+            csp.checks += len(empty)
+        empty.remove(best_cell)
+        return best_cell, candidates_of(best_cell)
+
+    def result(assignment):
+        if statistics is not None:
+            statistics.nodes += nodes
+            statistics.backtracks += backtracks
+            statistics.checks += csp.checks - checks
+            statistics.max_depth = max(statistics.max_depth, max_depth)
+        return assignment
+
+    nodes, backtracks, max_depth, checks = 0, 0, 0, csp.checks
+    root_trail = list()
+    if not propagate(root_trail):
+        undo(root_trail)
+        return result(None)
+    if not empty:
+        return result(csp.assignment())
+
+    stack = []
+    cell, candidates = select()
+    while True:
+        if candidates:
+            if budget is not None and not budget.spend_node():
+                return result(None)
+            bit = candidates & -candidates
+            csp.assign(cell, bit.bit_length())
+            nodes += 1
+            trail = list()
+            stack.append((cell, candidates ^ bit, trail))
+            if len(stack) > max_depth:
+                max_depth = len(stack)
+            if propagate(trail):
+                if not empty:
+                    return result(csp.assignment())
+                cell, candidates = select()
+                continue
+            cell, candidates, trail = stack.pop()
+        else:
+            empty.add(cell)
+            backtracks += 1
+            if not stack:
+                undo(root_trail)
+                return result(None)
+            cell, candidates, trail = stack.pop()
+        undo(trail)
+        csp.unassign(cell)
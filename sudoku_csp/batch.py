@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""Headless batch solving.
+
+Solve a file of puzzles, one puzzle per line, over a pool of processes. A
+puzzle is either written compactly, one character per cell ('0' or '.' for an
+empty cell, then '1' to '9' and 'A' to 'Z' for the values 1 to 35), or as a
+list of integers separated by commas or spaces, which is needed for 36x36
+grids. Solved puzzles are written back in the format they were read in, an
+empty line stands for a puzzle without solution and a line starting with
+"error: " for a puzzle which couldn't be read or solved.
+
+Usage::
+
+    python -m sudoku_csp.batch puzzles.txt -o solutions.txt -a BITMASK -j 8
+
+"""
+import argparse
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+import numpy as np
+
+from sudoku_csp.interfaces import AlgorithmType
+from sudoku_csp.propagation import presolve_maps
+from sudoku_csp.solver import solve
+
+SYMBOLS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ERROR_PREFIX = "error: "
+
+
+def parse_puzzle(line: str) -> np.ndarray:
+    """
+    Read a sudoku map from a line.
+
+    Parameters
+    ----------
+    line : str
+        A puzzle, in compact or separated form.
+
+    Returns
+    -------
+    np.ndarray
+
+    Raises
+    ------
+    ValueError
+        If the line isn't a sudoku puzzle.
+    """
+    line = line.strip()
+    if "," in line or " " in line:
+        values = [int(value) for value in line.replace(",", " ").split()]
+    else:
+        unknown = set(line) - set(SYMBOLS) - set("0.")
+        if unknown:
+            raise ValueError(f"Unknown symbols {''.join(sorted(unknown))!r}.")
+        values = [0 if symbol in "0." else SYMBOLS.index(symbol) + 1 for symbol in line]
+
+    length = math.isqrt(len(values))
+    if length ** 2 != len(values) or math.isqrt(length) ** 2 != length:
+        raise ValueError(f"A puzzle of {len(values)} cells isn't a sudoku.")
+    if any(value < 0 or value > length for value in values):
+        raise ValueError(
+            f"A {length}x{length} puzzle only holds values up to {length}."
+        )
+    return np.array(values, dtype=int).reshape((length, length))
+
+
+def format_puzzle(sudoku_map: np.ndarray, separator: str = "") -> str:
+    """
+    Write a sudoku map on a line.
+
+    Parameters
+    ----------
+    sudoku_map : np.ndarray
+    separator : str
+        The separator of the values, or an empty string for the compact form.
+
+    Returns
+    -------
+    str
+    """
+    if separator:
+        return separator.join(str(value) for value in sudoku_map.flatten())
+    return "".join(
+        SYMBOLS[value - 1] if value else "0" for value in sudoku_map.flatten()
+    )
+
+
+def solve_line(line: str, algorithm_type: AlgorithmType) -> str:
+    """
+    Solve the puzzle written on a line.
+
+    Parameters
+    ----------
+    line : str
+    algorithm_type : AlgorithmType
+
+    Returns
+    -------
+    str
+        The solved puzzle in the same format, an empty string if there isn't
+        any solution, or an error line if the puzzle isn't valid.
+    """
+    try:
+        result = solve(parse_puzzle(line), algorithm_type)
+    except ValueError as error:
+        return ERROR_PREFIX + str(error)
+    return "" if result is None else format_puzzle(result, line_separator(line))
+
+
+def line_separator(line: str) -> str:
+    """
+    Get the separator of the values of a puzzle line.
+
+    Parameters
+    ----------
+    line : str
+
+    Returns
+    -------
+    str
+        An empty string for the compact form.
+    """
+    line = line.strip()
+    return "," if "," in line else (" " if " " in line else "")
+
+
+def solve_lines(
+    lines: list, algorithm_type: AlgorithmType, propagation: bool = True
+) -> list:
+    """
+    Solve a chunk of puzzles.
+
+    With propagation, the candidates of all the puzzles of the same size are
+    first propagated together, and only the puzzles left unresolved are
+    searched one by one.
+
+    Parameters
+    ----------
+    lines : list[str]
+    algorithm_type : AlgorithmType
+    propagation : bool
+
+    Returns
+    -------
+    list[str]
+    """
+    if not propagation:
+        return [solve_line(line, algorithm_type) for line in lines]
+
+    results = [None] * len(lines)
+    by_length = dict()
+    for i, line in enumerate(lines):
+        try:
+            sudoku_map = parse_puzzle(line)
+        except ValueError as error:
+            results[i] = ERROR_PREFIX + str(error)
+            continue
+        by_length.setdefault(len(sudoku_map), list()).append((i, sudoku_map))
+
+    for puzzles in by_length.values():
+        presolved, solved = presolve_maps(np.stack([m for _, m in puzzles]))
+        for (i, _), sudoku_map, is_solved in zip(puzzles, presolved, solved):
+            try:
+                result = sudoku_map if is_solved else solve(sudoku_map, algorithm_type)
+            except ValueError as error:
+                results[i] = ERROR_PREFIX + str(error)
+                continue
+            results[i] = (
+                ""
+                if result is None
+                else format_puzzle(result, line_separator(lines[i]))
+            )
+    return results
+
+
+def solve_batch(
+    lines,
+    algorithm_type: AlgorithmType = AlgorithmType.BITMASK,
+    processes: int = None,
+    chunk_size: int = 64,
+    max_pending_chunks: int = None,
+    propagation: bool = True,
+):
+    """
+    Solve puzzles over a pool of processes.
+
+    The puzzles are sent to the pool by chunks and at most
+    max_pending_chunks chunks are in flight at once, so that the memory
+    stays bounded whatever the number of puzzles. The results are streamed
+    back in the input order.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        The puzzles, one per line. Empty lines are skipped.
+    algorithm_type : AlgorithmType
+        A type of algorithm to use to resolve the puzzles.
+    processes : int
+        The number of worker processes, all the CPUs by default.
+    chunk_size : int
+        The number of puzzles sent to a worker at once.
+    max_pending_chunks : int
+        The number of chunks in flight, four per worker by default.
+    propagation : bool
+        Propagate the candidates of each chunk with NumPy before searching.
+
+    Returns
+    -------
+    Iterator[str]
+        The solved puzzles, see solve_line. A chunk which fails as a whole
+        gives an error line for each of its puzzles.
+    """
+    processes = processes or os.cpu_count() or 1
+    if max_pending_chunks is None:
+        max_pending_chunks = 4 * processes
+
+    lines = (line for line in lines if line.strip())
+    executor = ProcessPoolExecutor(max_workers=processes)
+
+    def submit(chunk: list):
+        return executor.submit(solve_lines, chunk, algorithm_type, propagation), chunk
+
+    try:
+        pending = deque()
+        while True:
+            while len(pending) < max_pending_chunks:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    break
+                pending.append(submit(chunk))
+            if not pending:
+                return
+            future, chunk = pending.popleft()
+            try:
+                results = future.result()
+            except BrokenProcessPool as error:
+                # A worker died and took the pool down: its chunk is reported
+                # and the other chunks in flight are sent to a new pool.
+                results = [ERROR_PREFIX + repr(error)] * len(chunk)
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=processes)
+                pending = deque(submit(chunk) for _, chunk in pending)
+            except Exception as error:
+                results = [ERROR_PREFIX + repr(error)] * len(chunk)
+            yield from results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m sudoku_csp.batch", description="Solve a file of sudoku puzzles."
+    )
+    parser.add_argument(
+        "input", help="file with one puzzle per line, '-' for the standard input"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="file where the solutions are written"
+    )
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        default=AlgorithmType.BITMASK.name,
+        choices=[algorithm_type.name for algorithm_type in AlgorithmType],
+    )
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("-c", "--chunk-size", type=int, default=64)
+    parser.add_argument(
+        "--no-propagation",
+        action="store_true",
+        help="search every puzzle without propagating the candidates first",
+    )
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for solution in solve_batch(
+            input_file,
+            AlgorithmType[args.algorithm],
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            propagation=not args.no_propagation,
+        ):
+            output_file.write(solution + "\n")
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
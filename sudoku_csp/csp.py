@@ -4,11 +4,34 @@
 """
 import math
 import copy
+from functools import lru_cache
 
 import numpy
 import numpy as np
 
-from interfaces import Constraint
+from sudoku_csp.interfaces import Constraint, AllDifferent, NotEqual
+
+
+def neighbour_tuple(var, constraints) -> tuple:
+    """
+    Get the variables sharing one of the given constraints with a variable.
+
+    Parameters
+    ----------
+    var : any
+    constraints : Iterable[Constraint]
+        The constraints of the variable.
+
+    Returns
+    -------
+    tuple
+        Each neighbour once, in the order the constraints are given.
+    """
+    return tuple(
+        dict.fromkeys(
+            other for con in constraints for other in con.scope if other != var
+        )
+    )
 
 
 class CSP:
@@ -17,10 +40,23 @@ class CSP:
 
     """
 
-    def __init__(self, variables: list, domains: dict, constraints: list):
+    def __init__(
+        self,
+        variables: list,
+        domains: dict,
+        constraints: list,
+        var_to_const: dict = None,
+        neighbours: dict = None,
+    ):
         """
         Create a CSP instance.
 
+        The constraints are numbered by their index, unless they already
+        are, like the ones of the sudoku templates which are shared by many
+        instances. A constraint numbered otherwise belongs to another CSP.
+        The neighbours of each variable are computed once here, unless they
+        are given.
+
         Parameters
         ----------
         variables : list
@@ -29,17 +65,50 @@ class CSP:
             A dictionary containing the domain of each variable.
         constraints : list
             A list of constraint.
+        var_to_const : dict
+            The constraints of each variable, if they are already known. The
+            sets aren't modified, so they can be shared between instances.
+        neighbours : dict
+            The neighbours of each variable, if they are already known.
+
+        Raises
+        ------
+        ValueError
+            If a constraint is numbered by another CSP.
 
         """
         self.domains = domains
         self.variables = variables
         self.constraints = constraints
+        self.checks = 0
+        self.counting = False
+        # The constraint which caused the last failure, for the heuristics
+        # learning from them.
+        self.conflict = None
+
+        for i, con in enumerate(constraints):
+            if con.id is None:
+                con.id = i
+            elif con.id != i:
+                raise ValueError(
+                    f"Constraint {i} is already constraint {con.id} of another CSP."
+                )
 
-        self.var_to_const = {var: set() for var in self.variables}
-
-        for con in constraints:
-            for var in con.scope:
-                self.var_to_const[var].add(con)
+        if var_to_const is not None:
+            self.var_to_const = dict(var_to_const)
+        else:
+            self.var_to_const = {var: set() for var in self.variables}
+            for con in constraints:
+                for var in con.scope:
+                    self.var_to_const[var].add(con)
+
+        if neighbours is not None:
+            self.neighbours = dict(neighbours)
+        else:
+            self.neighbours = {
+                var: neighbour_tuple(var, self.var_to_const[var])
+                for var in self.variables
+            }
 
     def add_constraints(self, constraint: Constraint):
         """
@@ -54,10 +123,21 @@ class CSP:
         -------
         None
 
+        Raises
+        ------
+        ValueError
+            If the constraint is numbered by another CSP.
+
         """
+        if constraint.id is not None:
+            raise ValueError("The constraint already belongs to a CSP.")
+        constraint.id = len(self.constraints)
+        self.constraints.append(constraint)
         for var in constraint.scope:
-            if var in self.variables:
-                self.var_to_const[var].add(constraint)
+            if var in self.var_to_const:
+                # The sets may be shared with other instances.
+                self.var_to_const[var] = self.var_to_const[var] | {constraint}
+                self.neighbours[var] = neighbour_tuple(var, self.var_to_const[var])
 
     def consistent(self, assignment: dict) -> bool:
         """
@@ -76,16 +156,85 @@ class CSP:
         return all(
             con.satisfied(assignment)
             for con in self.constraints
-            if all(v in assignment for v in con.scope)
+            if con.partial or all(v in assignment for v in con.scope)
         )
 
-    def neighbour(self, var) -> list:
-        neighbours = list()
-        for constraint in self.var_to_const[var]:
-            for other in constraint.scope:
-                if other != var:
-                    neighbours.append(other)
-        return neighbours
+    def neighbour(self, var) -> tuple:
+        """
+        Get the variables sharing a constraint with a variable.
+
+        Parameters
+        ----------
+        var : any
+
+        Returns
+        -------
+        tuple
+            Each neighbour once.
+
+        """
+        return self.neighbours[var]
+
+    def prune(self, var, value, removals: list):
+        """
+        Remove a value from the domain of a variable and record it on a trail.
+
+        Parameters
+        ----------
+        var : any
+            The variable.
+        value : any
+            The value to remove from its domain.
+        removals : list
+            The trail where the removal is recorded.
+
+        Returns
+        -------
+        None
+
+        """
+        self.domains[var].remove(value)
+        removals.append((var, value))
+
+    def suppose(self, var, value, removals: list):
+        """
+        Reduce the domain of a variable to a single value.
+
+        Parameters
+        ----------
+        var : any
+            The variable.
+        value : any
+            The only value to keep in its domain.
+        removals : list
+            The trail where the removals are recorded.
+
+        Returns
+        -------
+        None
+
+        """
+        for other_value in list(self.domains[var]):
+            if other_value != value:
+                self.prune(var, other_value, removals)
+
+    def restore(self, removals: list):
+        """
+        Put back the values recorded on a trail in their domains.
+
+        Parameters
+        ----------
+        removals : list
+            The trail of the removals to undo.
+
+        Returns
+        -------
+        None
+
+        """
+        for var, value in reversed(removals):
+            self.domains[var].add(value)
+        removals.clear()
 
     def apply_constraints(self) -> dict:
         assignment = dict()
@@ -94,67 +243,225 @@ class CSP:
                 assignment[var] = list(self.domains[var])[0]
         return assignment
 
+    def consistent_value(self, assignment: dict, var, value) -> bool:
+        """
+        Check if giving a value to a variable keeps the assignment consistent.
+
+        Only the constraints of the variable are checked, and the assignment
+        isn't copied. When the value is rejected, the violated constraint is
+        kept in conflict.
+
+        Parameters
+        ----------
+        assignment : dict
+            A consistent assignment, where var isn't assigned yet.
+        var : any
+            The variable to assign.
+        value : any
+            The value of the variable.
+
+        Returns
+        -------
+        bool
+
+        """
+        for con in self.var_to_const[var]:
+            if con.not_equal:
+                other = con.other(var)
+                if other in assignment and assignment[other] == value:
+                    self.conflict = con
+                    return False
+            elif con.partial or all(v == var or v in assignment for v in con.scope):
+                if not con.satisfied_with(assignment, var, value):
+                    self.conflict = con
+                    return False
+        return True
+
+    def _counted_consistent_value(self, assignment: dict, var, value) -> bool:
+        """
+        consistent_value, counting the constraint checks.
+        """
+        for con in self.var_to_const[var]:
+            if con.not_equal:
+                other = con.other(var)
+                if other in assignment:
+                    self.checks += 1
+                    if assignment[other] == value:
+                        self.conflict = con
+                        return False
+            elif con.partial or all(v == var or v in assignment for v in con.scope):
+                self.checks += 1
+                if not con.satisfied_with(assignment, var, value):
+                    self.conflict = con
+                    return False
+        return True
+
+    def count_checks(self, enabled: bool = True):
+        """
+        Turn the counting of the constraint checks on or off.
+
+        It is off by default, so that the searches don't pay for the counters
+        when no statistics are collected. When it is on, consistent_value is
+        replaced by a counting version, and the inferences count their checks
+        as well.
+
+        Parameters
+        ----------
+        enabled : bool
+
+        Returns
+        -------
+        None
+        """
+        self.counting = enabled
+        if enabled:
+            self.consistent_value = self._counted_consistent_value
+        else:
+            self.__dict__.pop("consistent_value", None)
+
     def consistent_with(self, assignment: dict, new_assignment: dict) -> bool:
-        return self.consistent(assignment | new_assignment)
+        """
+        Check if a consistent assignment stays consistent with new assignments.
+
+        Parameters
+        ----------
+        assignment : dict
+            A consistent assignment.
+        new_assignment : dict
+            The new assignments to check.
+
+        Returns
+        -------
+        bool
+
+        """
+        if len(new_assignment) != 1:
+            return self.consistent(assignment | new_assignment)
+        ((var, value),) = new_assignment.items()
+        return self.consistent_value(assignment, var, value)
+
+
+def constraint_evalution(values: any):
+    return len(set(values)) == len(values)
+
+
+@lru_cache(maxsize=None)
+def sudoku_template(length: int, all_different: bool = False) -> tuple:
+    """
+    Build the variables and the constraint graph of the sudoku of a length.
+
+    They are the same for every puzzle of this length, so they are built once
+    and shared read-only by all the SudokuCSP instances.
+
+    Parameters
+    ----------
+    length : int
+        The number of cells of a row.
+    all_different : bool
+        Use an AllDifferent constraint per row, column and box instead of
+        the binary constraints between each pair of their cells.
+
+    Returns
+    -------
+    tuple
+        The variables, the constraints, the constraints and the neighbours of
+        each variable, then the rows, the columns and the boxes.
+    """
+    size = round(math.sqrt(length))
+    variables = list()
+    constraints = list()
+    scopes = set()
+
+    def add(var: str, other_var: str):
+        scope = frozenset((var, other_var))
+        if scope not in scopes:
+            scopes.add(scope)
+            constraints.append(NotEqual(var, other_var))
+
+    for x in range(length):
+        for y in range(length):
+            variables.append(f"{x}, {y}")
+            if all_different:
+                continue
+
+            for x_row in range(length):
+                if x_row != x:
+                    add(f"{x}, {y}", f"{x_row}, {y}")
+
+            for y_col in range(length):
+                if y_col != y:
+                    add(f"{x}, {y}", f"{x}, {y_col}")
+
+            for i in range(size):
+                for j in range(size):
+                    x_box = size * (x // size) + i
+                    y_box = size * (y // size) + j
+                    if x_box != x and y_box != y:
+                        add(f"{x}, {y}", f"{x_box}, {y_box}")
+
+    rows = [[f"{x}, {y}" for y in range(length)] for x in range(length)]
+    columns = [[f"{x}, {y}" for x in range(length)] for y in range(length)]
+    boxes = [
+        [f"{x_box + i}, {y_box + j}" for i in range(size) for j in range(size)]
+        for x_box in range(0, length, size)
+        for y_box in range(0, length, size)
+    ]
+    if all_different:
+        constraints = [AllDifferent(frozenset(unit)) for unit in rows + columns + boxes]
+    # The constraints are shared, so they are numbered once here rather than
+    # by each CSP.
+    for i, con in enumerate(constraints):
+        con.id = i
+
+    var_to_const = {var: set() for var in variables}
+    for con in constraints:
+        for var in con.scope:
+            var_to_const[var].add(con)
+    neighbours = {var: neighbour_tuple(var, var_to_const[var]) for var in variables}
+    return variables, constraints, var_to_const, neighbours, rows, columns, boxes
 
 
 class SudokuCSP(CSP):
-    def __init__(self, sudoku_map: np.ndarray):
-        def constraint_evalution(values: any):
-            return len(set(values)) == len(values)
+    def __init__(self, sudoku_map: np.ndarray, all_different: bool = False):
+        """
+        Create a SudokuCSP instance.
+
+        Parameters
+        ----------
+        sudoku_map : np.ndarray
+            A array containing the map of the sudoku, 0 standing for an empty
+            cell.
+        all_different : bool
+            Declare an AllDifferent constraint per row, column and box, 3N
+            constraints in all, instead of the binary constraints between
+            each pair of their cells.
 
+        """
         self.sudoku_map = sudoku_map
+        length = len(sudoku_map)
+
+        (
+            variables,
+            constraints,
+            var_to_const,
+            neighbours,
+            self.rows,
+            self.columns,
+            self.boxes,
+        ) = sudoku_template(length, all_different)
 
-        variables = list()
         domains = dict()
-        constraints = list()
-
-        size = round(math.sqrt(len(sudoku_map)))
-
-        for x in range(len(sudoku_map)):
-            for y in range(len(sudoku_map)):
-                variables.append(f"{x}, {y}")
-                domain = (
-                    set(range(1, len(sudoku_map) + 1))
+        for x in range(length):
+            for y in range(length):
+                domains[f"{x}, {y}"] = (
+                    set(range(1, length + 1))
                     if not sudoku_map[x, y]
                     else {sudoku_map[x, y]}
                 )
-                domains[f"{x}, {y}"] = domain
-
-                for x_row in range(len(sudoku_map)):
-                    constraint = Constraint(
-                        frozenset({f"{x}, {y}", f"{x_row}, {y}"}), constraint_evalution
-                    )
-                    if x_row != x and constraint not in constraints:
-                        constraints.append(constraint)
-
-                for y_col in range(len(sudoku_map)):
-                    constraint = Constraint(
-                        frozenset({f"{x}, {y}", f"{x}, {y_col}"}), constraint_evalution
-                    )
-                    if y_col != y and constraint not in constraints:
-                        constraints.append(constraint)
-
-                for i in range(size):
-                    for j in range(size):
-
-                        x_box = size * int((x / size)) + i
-                        y_box = size * int((y / size)) + j
-
-                        constraint = Constraint(
-                            frozenset(
-                                {
-                                    f"{x}, {y}",
-                                    f"{x_box}, {y_box}",
-                                }
-                            ),
-                            constraint_evalution,
-                        )
-
-                        if x_box != x and y_box != y and constraint not in constraints:
-                            constraints.append(constraint)
-
-        super().__init__(variables, domains, constraints)
+
+        super().__init__(
+            list(variables), domains, list(constraints), var_to_const, neighbours
+        )
 
     def get_resulted_map(self, assignment: dict) -> np.ndarray:
         """
@@ -174,3 +481,214 @@ class SudokuCSP(CSP):
             for y in range(0, len(self.sudoku_map)):
                 result[x, y] = assignment[f"{x}, {y}"]
         return result
+
+    def get_known_map(self) -> np.ndarray:
+        """
+        Get the map of the cells whose domain is reduced to a single value.
+
+        Returns
+        -------
+        np.ndarray
+            The map of the sudoku, 0 standing for the other cells.
+
+        """
+        result = np.zeros_like(self.sudoku_map)
+        for x in range(0, len(self.sudoku_map)):
+            for y in range(0, len(self.sudoku_map)):
+                if len(self.domains[f"{x}, {y}"]) == 1:
+                    (result[x, y],) = self.domains[f"{x}, {y}"]
+        return result
+
+
+class BitSudokuCSP:
+    """
+    A compact representation of a sudoku CSP.
+
+    Cells are numbered from 0 to N² - 1 in row-major order and the values
+    already used in each row, column and box are stored in one integer
+    bitmask per unit, the bit ``v - 1`` standing for the value ``v``.
+
+    """
+
+    def __init__(self, sudoku_map: np.ndarray):
+        """
+        Create a BitSudokuCSP instance.
+
+        Parameters
+        ----------
+        sudoku_map : np.ndarray
+            A array containing the map of the sudoku, 0 standing for an empty
+            cell.
+
+        """
+        self.sudoku_map = sudoku_map
+        self.length = len(sudoku_map)
+        self.size = round(math.sqrt(self.length))
+        self.full_mask = (1 << self.length) - 1
+
+        cells_count = self.length ** 2
+        self.row_of = [cell // self.length for cell in range(cells_count)]
+        self.col_of = [cell % self.length for cell in range(cells_count)]
+        self.box_of = [
+            (self.row_of[cell] // self.size) * self.size
+            + self.col_of[cell] // self.size
+            for cell in range(cells_count)
+        ]
+
+        # The cells of the rows, then of the columns, then of the boxes.
+        self.units = [list() for _ in range(3 * self.length)]
+        for cell in range(cells_count):
+            self.units[self.row_of[cell]].append(cell)
+            self.units[self.length + self.col_of[cell]].append(cell)
+            self.units[2 * self.length + self.box_of[cell]].append(cell)
+
+        self.rows = [0] * self.length
+        self.cols = [0] * self.length
+        self.boxes = [0] * self.length
+        self.cells = [0] * cells_count
+        self.checks = 0
+
+        self.valid = True
+        for cell in range(cells_count):
+            value = int(sudoku_map[self.row_of[cell], self.col_of[cell]])
+            if not value:
+                continue
+            if value > self.length or not self.candidates(cell) & (1 << (value - 1)):
+                self.valid = False
+            else:
+                self.assign(cell, value)
+
+    def candidates(self, cell: int) -> int:
+        """
+        Get the bitmask of the values that can still be put in a cell.
+
+        Parameters
+        ----------
+        cell : int
+            Index of the cell.
+
+        Returns
+        -------
+        int
+        """
+        return self.full_mask & ~(
+            self.rows[self.row_of[cell]]
+            | self.cols[self.col_of[cell]]
+            | self.boxes[self.box_of[cell]]
+        )
+
+    def forced(self, cell: int, value: int) -> bool:
+        """
+        Check if the filled cells force a value in an empty cell, either as
+        its only candidate or as the only cell of one of its units where the
+        value fits.
+
+        Parameters
+        ----------
+        cell : int
+            Index of the empty cell.
+        value : int
+            The value, between 1 and N included.
+
+        Returns
+        -------
+        bool
+        """
+        bit = 1 << (value - 1)
+        if self.candidates(cell) == bit:
+            return True
+        for unit in (
+            self.row_of[cell],
+            self.length + self.col_of[cell],
+            2 * self.length + self.box_of[cell],
+        ):
+            if not any(
+                other != cell and not self.cells[other] and self.candidates(other) & bit
+                for other in self.units[unit]
+            ):
+                return True
+        return False
+
+    def unit_mask(self, unit: int) -> int:
+        """
+        Get the bitmask of the values already used in a unit.
+
+        Parameters
+        ----------
+        unit : int
+            Index of the unit in units.
+
+        Returns
+        -------
+        int
+        """
+        masks = (self.rows, self.cols, self.boxes)[unit // self.length]
+        return masks[unit % self.length]
+
+    def assign(self, cell: int, value: int):
+        """
+        Put a value in an empty cell.
+
+        Parameters
+        ----------
+        cell : int
+            Index of the cell.
+        value : int
+            The value, between 1 and N included.
+
+        Returns
+        -------
+        None
+        """
+        bit = 1 << (value - 1)
+        self.cells[cell] = value
+        self.rows[self.row_of[cell]] |= bit
+        self.cols[self.col_of[cell]] |= bit
+        self.boxes[self.box_of[cell]] |= bit
+
+    def unassign(self, cell: int):
+        """
+        Remove the value of a cell.
+
+        Parameters
+        ----------
+        cell : int
+            Index of the cell.
+
+        Returns
+        -------
+        None
+        """
+        bit = ~(1 << (self.cells[cell] - 1))
+        self.cells[cell] = 0
+        self.rows[self.row_of[cell]] &= bit
+        self.cols[self.col_of[cell]] &= bit
+        self.boxes[self.box_of[cell]] &= bit
+
+    def assignment(self) -> dict:
+        """
+        Get the current assignment of the filled cells.
+
+        Returns
+        -------
+        dict
+        """
+        return {cell: value for cell, value in enumerate(self.cells) if value}
+
+    def get_resulted_map(self, assignment: dict) -> np.ndarray:
+        """
+        Get the resulted map of the CSP.
+
+        Parameters
+        ----------
+        assignment : dict
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        result = copy.deepcopy(self.sudoku_map)
+        for cell, value in assignment.items():
+            result[self.row_of[cell], self.col_of[cell]] = value
+        return result
@@ -3,13 +3,17 @@
 
 """
 import random
+import threading
 from enum import Enum
 
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from sudoku_csp.csp import SudokuCSP
-from sudoku_csp.algorithms import backtracking_search, random_domain_values
+from sudoku_csp.csp import BitSudokuCSP
+from sudoku_csp.algorithms import bitmask_search, count_solutions
+from sudoku_csp.interfaces import SearchBudget
 
 
 class SudokuDifficulty(Enum):
@@ -18,9 +22,76 @@ class SudokuDifficulty(Enum):
     HARD = "hard"
 
 
+class HTTPSessions:
+    """
+    HTTP sessions for the sudoku web services, one per thread as a requests
+    session isn't thread safe. Failed connections and gateway errors are
+    tried again, a read timeout isn't.
+    """
+
+    def __init__(self, retries: int = 2):
+        """
+        Create an HTTPSessions instance.
+
+        Parameters
+        ----------
+        retries : int
+            The number of times a failed connection or a gateway error is
+            tried again.
+        """
+        self.retries = retries
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.sessions = list()
+
+    def get(self) -> requests.Session:
+        """
+        Get the session of the calling thread, created on its first use.
+
+        Returns
+        -------
+        requests.Session
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            adapter = HTTPAdapter(
+                max_retries=Retry(
+                    total=self.retries,
+                    read=False,
+                    backoff_factor=0.2,
+                    status_forcelist=(502, 503, 504),
+                )
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def close(self):
+        """
+        Close the sessions of every thread.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions.clear()
+            self.local = threading.local()
+
+
 class Generator:
 
     generator_url = "https://sugoku.herokuapp.com/board"
+    sessions = HTTPSessions()
+    # The connect and read timeouts of each request, in seconds.
+    timeout = (3.05, 10)
+    # The number of diagonal fillings tried before giving up on a solved grid.
+    fillings = 100
 
     @classmethod
     def generate_online(
@@ -32,19 +103,113 @@ class Generator:
             )
 
         params = {"difficulty": difficulty.value}
-        response = requests.get(cls.generator_url, params=params)
+        response = cls.session().get(
+            cls.generator_url, params=params, timeout=cls.timeout
+        )
+        response.raise_for_status()
         return np.array(response.json()["board"])
 
     @classmethod
-    def generate_backtracking(
-        cls, size: int = 3, difficulty: SudokuDifficulty = SudokuDifficulty.MEDIUM
-    ):
-        sudoku_map = np.zeros((size ** 2, size ** 2), dtype=int)
+    def session(cls) -> requests.Session:
+        """
+        Get the HTTP session of the calling thread, created on its first use.
 
-        csp = SudokuCSP(sudoku_map)
+        Returns
+        -------
+        requests.Session
+        """
+        return cls.sessions.get()
 
-        assignment = backtracking_search(csp, order_domain_values=random_domain_values)
-        sudoku_map = csp.get_resulted_map(assignment)
+    @classmethod
+    def generate_solution(
+        cls, size: int = 3, budget: SearchBudget = None
+    ) -> np.ndarray:
+        """
+        Generate a random solved grid.
+
+        The boxes of the diagonal don't share any row or column, so they are
+        filled with random permutations and the bitmask search completes the
+        grid. As some fillings are much longer to complete than others, the
+        search is given up after a few nodes per cell for another filling, at
+        most fillings times.
+
+        Parameters
+        ----------
+        size : int
+            The size of the boxes.
+        budget : SearchBudget
+            The time limit and the cancellation of the generation, if any.
+
+        Returns
+        -------
+        np.ndarray
+            The grid, or None if the budget stopped the generation.
+
+        Raises
+        ------
+        RuntimeError
+            If none of the fillings could be completed.
+        """
+        length = size ** 2
+        attempt = SearchBudget(node_limit=10 * length ** 2)
+        for _ in range(cls.fillings):
+            if budget is not None and budget.exceeded():
+                return None
+            sudoku_map = np.zeros((length, length), dtype=int)
+            for box in range(size):
+                values = random.sample(range(1, length + 1), length)
+                sudoku_map[
+                    box * size : (box + 1) * size, box * size : (box + 1) * size
+                ] = np.reshape(values, (size, size))
+            csp = BitSudokuCSP(sudoku_map)
+            attempt.start()
+            assignment = bitmask_search(csp, budget=attempt)
+            if assignment is not None:
+                return csp.get_resulted_map(assignment)
+        raise RuntimeError(
+            f"No solved grid of size {size} found after {cls.fillings} fillings."
+        )
+
+    @classmethod
+    def generate_backtracking(
+        cls,
+        size: int = 3,
+        difficulty: SudokuDifficulty = SudokuDifficulty.MEDIUM,
+        budget: SearchBudget = None,
+    ):
+        """
+        Generate a puzzle with a unique solution.
+
+        The clues of a random solved grid are removed in a random order, and
+        a removal is undone when the puzzle gets a second solution, or when
+        the uniqueness can't be proven within a number of nodes proportional
+        to the number of cells. The solutions aren't counted when the other
+        clues force the removed one. When no more clue can be removed, the puzzle
+        has fewer empty cells than the difficulty asks for.
+
+        Parameters
+        ----------
+        size : int
+            The size of the boxes.
+        difficulty : SudokuDifficulty
+            How many cells are emptied: half of them for EASY, 60% for MEDIUM
+            and 70% for HARD.
+        budget : SearchBudget
+            The time limit and the cancellation of the generation, if any.
+
+        Returns
+        -------
+        np.ndarray
+            The puzzle, or None if the budget stopped the generation.
+
+        Raises
+        ------
+        RuntimeError
+            If no solved grid could be generated, see generate_solution.
+        """
+        sudoku_map = cls.generate_solution(size, budget)
+        if sudoku_map is None:
+            return None
 
         if difficulty == SudokuDifficulty.EASY:
             i = int(0.5 * (size ** 4))
@@ -55,10 +220,25 @@ class Generator:
         else:
             raise NotImplementedError("You must provide a valid difficulty value.")
 
-        while i:
-            x, y = random.randrange(len(sudoku_map)), random.randrange(len(sudoku_map))
-            if sudoku_map[y, x] != 0:
-                sudoku_map[y, x] = 0
-                i -= 1
+        attempt = SearchBudget(node_limit=20 * size ** 4)
+        csp = BitSudokuCSP(sudoku_map)
+        cells = list(range(len(csp.cells)))
+        random.shuffle(cells)
+        for cell in cells:
+            if not i:
+                break
+            if budget is not None and budget.exceeded():
+                return None
+            value = csp.cells[cell]
+            csp.unassign(cell)
+            # A clue which the others force can't let a second solution in.
+            if not csp.forced(cell, value):
+                attempt.start()
+                count = count_solutions(csp, limit=2, budget=attempt)
+                if count != 1 or attempt.status is not None:
+                    csp.assign(cell, value)
+                    continue
+            sudoku_map[csp.row_of[cell], csp.col_of[cell]] = 0
+            i -= 1
 
         return sudoku_map
@@ -6,7 +6,7 @@ This module manage the graphical user interface of the application.
 """
 
 from PySide6 import QtWidgets
-from PySide6.QtCore import QRectF, QPointF, Signal, QThread, Qt
+from PySide6.QtCore import QRectF, QPointF, Signal, QThread, Qt, QObject
 from PySide6.QtGui import QIcon, QAction, QFont, QPainter, QPen
 from PySide6.QtWidgets import (
     QMainWindow,
@@ -27,7 +27,25 @@ from PySide6.QtWidgets import (
 import numpy as np
 
 from generator import Generator, SudokuDifficulty
-from interfaces import AlgorithmType, Resolver
+from interfaces import AlgorithmType, SearchStatistics
+
+
+class Resolver(QObject):
+    """
+    A worker who manage the resolving of a problem.
+    """
+
+    result_ready = Signal()
+    error = Signal()
+
+    def do_work(self):
+        self.result_ready.emit()
+
+    def request(self):
+        pass
+
+    def cancel(self):
+        pass
 
 
 class DigitText(QGraphicsSimpleTextItem):
@@ -53,10 +71,22 @@ class MainWindow(QMainWindow):
     """
 
     resolve = Signal((AlgorithmType, np.ndarray))
-
-    def __init__(self, title: str, resolver: Resolver):
+    fetch_board = Signal(object)
+
+    def __init__(
+        self,
+        title: str,
+        resolver: Resolver,
+        puzzle_pool=None,
+        board_fetcher: Resolver = None,
+    ):
         """
         Constructs all the necessary attributes for the main window object.
+
+        The self generated puzzles are taken from puzzle_pool if one is given,
+        and generated on demand otherwise. The online puzzles are fetched by
+        board_fetcher in its own thread if one is given, and on the spot
+        otherwise.
         """
         super().__init__()
         self.setWindowTitle(title)
@@ -82,6 +112,8 @@ class MainWindow(QMainWindow):
         self.box_map = [[None for y in range(self.length)] for x in range(self.length)]
         self.digits_map = np.zeros((self.length, self.length), dtype=int)
 
+        self.resolver = resolver
+        self.puzzle_pool = puzzle_pool
         self.resolver_thread = QThread()
         self.resolve.connect(resolver.do_work)
         resolver.result_ready.connect(self.handle_result)
@@ -90,6 +122,18 @@ class MainWindow(QMainWindow):
         )
         resolver.moveToThread(self.resolver_thread)
 
+        self.board_fetcher = board_fetcher
+        self.fetcher_thread = QThread()
+        if board_fetcher is not None:
+            self.fetch_board.connect(board_fetcher.do_work)
+            board_fetcher.result_ready.connect(self.handle_fetched_board)
+            board_fetcher.error.connect(
+                lambda x: self.handle_error(
+                    "An error as occured while fetching the puzzle."
+                )
+            )
+            board_fetcher.moveToThread(self.fetcher_thread)
+
         self.setCentralWidget(QtWidgets.QWidget())
         self.centralWidget().setLayout(self.layout)
 
@@ -97,6 +141,7 @@ class MainWindow(QMainWindow):
         self.create_sudoku_view(self.size)
 
         self.resolver_thread.start()
+        self.fetcher_thread.start()
 
     def create_sudoku_view(self, n: int = 3):
 
@@ -217,25 +262,93 @@ class MainWindow(QMainWindow):
             lambda x: self.handle_resolve(AlgorithmType.AC3)
         )
 
+        solve_ac2001_action = QAction("AC-2001", self)
+        solve_ac2001_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.AC2001)
+        )
+
         solve_degree_h_action = QAction("Degree heuristic", self)
         solve_degree_h_action.triggered.connect(
             lambda x: self.handle_resolve(AlgorithmType.DEGREE_H)
         )
 
+        solve_wdeg_action = QAction("dom/wdeg", self)
+        solve_wdeg_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.WDEG)
+        )
+
         solve_least_constraining_h_action = QAction("Least constraining value", self)
         solve_least_constraining_h_action.triggered.connect(
             lambda x: self.handle_resolve(AlgorithmType.LEAST_CONSTRAINING_H)
         )
 
+        solve_bitmask_action = QAction("Bitmask", self)
+        solve_bitmask_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.BITMASK)
+        )
+
+        solve_forward_checking_action = QAction("Forward checking", self)
+        solve_forward_checking_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.FORWARD_CHECKING)
+        )
+
+        solve_mac_action = QAction("MAC", self)
+        solve_mac_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.MAC)
+        )
+
+        solve_dancing_links_action = QAction("Dancing links", self)
+        solve_dancing_links_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.DANCING_LINKS)
+        )
+
+        solve_all_different_action = QAction("AllDifferent", self)
+        solve_all_different_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.ALL_DIFFERENT)
+        )
+
+        solve_backjumping_action = QAction("Conflict-directed backjumping", self)
+        solve_backjumping_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.BACKJUMPING)
+        )
+
+        solve_portfolio_action = QAction("Portfolio", self)
+        solve_portfolio_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.PORTFOLIO)
+        )
+
+        solve_parallel_action = QAction("Parallel search", self)
+        solve_parallel_action.triggered.connect(
+            lambda x: self.handle_resolve(AlgorithmType.PARALLEL)
+        )
+
+        # The resolver thread is busy while solving, so the cancellation
+        # can't go through a queued signal.
+        cancel_action = QAction("Cancel", self)
+        cancel_action.setShortcut("Esc")
+        cancel_action.triggered.connect(lambda x: self.resolver.cancel())
+
         self.solve_menu.addActions(
             [
                 solve_backtracking_action,
                 solve_mrv_action,
                 solve_ac3_action,
+                solve_ac2001_action,
                 solve_degree_h_action,
+                solve_wdeg_action,
                 solve_least_constraining_h_action,
+                solve_bitmask_action,
+                solve_forward_checking_action,
+                solve_mac_action,
+                solve_dancing_links_action,
+                solve_all_different_action,
+                solve_backjumping_action,
+                solve_portfolio_action,
+                solve_parallel_action,
             ]
         )
+        self.solve_menu.addSeparator()
+        self.solve_menu.addAction(cancel_action)
         self.menuBar().addMenu(self.solve_menu)
 
         self.setStatusBar(QStatusBar())
@@ -273,18 +386,38 @@ class MainWindow(QMainWindow):
                     "Online generation of sudoku with size different than 3x3 is not currently supported."
                 )
                 return
+            if self.board_fetcher is not None:
+                self.info_message.setText("Fetching the puzzle...")
+                self.fetch_board.emit(action.data()["difficulty"])
+                return
             self.info_message.clear()
             self.digits_map = Generator.generate_online(
                 self.size, action.data()["difficulty"]
             )
         else:
-            self.info_message.setText(
-                "The uniqueness of this homemade generated puzzle isn't guaranteed."
-            )
-            self.digits_map = Generator.generate_backtracking(
-                self.size, action.data()["difficulty"]
-            )
+            self.info_message.clear()
+            if self.puzzle_pool is not None:
+                sudoku_map = self.puzzle_pool.take(
+                    self.size, action.data()["difficulty"]
+                )
+                if sudoku_map is None:
+                    self.info_message.setText(
+                        "The puzzle pool is empty, try again in a moment."
+                    )
+                    return
+                self.digits_map = sudoku_map
+            else:
+                self.digits_map = Generator.generate_backtracking(
+                    self.size, action.data()["difficulty"]
+                )
+
+        self.update_sudoku_view()
 
+    def handle_fetched_board(self, sudoku_map: np.ndarray):
+        self.info_message.clear()
+        if len(sudoku_map) != self.length:
+            return
+        self.digits_map = sudoku_map
         self.update_sudoku_view()
 
     def handle_resolve(self, algorithm_type: AlgorithmType):
@@ -296,10 +429,23 @@ class MainWindow(QMainWindow):
                 else:
                     self.digits_map[x, y] = 0
 
+        self.resolver.request()
         self.resolve.emit(algorithm_type, self.digits_map)
 
-    def handle_result(self, algorithm_type: AlgorithmType, sudoku_map: np.array):
-        print(f"Sudoku resolved using {algorithm_type.value} algorithm!")
+    def handle_result(
+        self,
+        algorithm_type: AlgorithmType,
+        sudoku_map: np.array,
+        statistics: SearchStatistics,
+    ):
+        # The status is compared by name, as the resolver may import the
+        # interfaces under another module name.
+        status = statistics.status.name if statistics.status else None
+        if status in ("BUDGET_EXCEEDED", "CANCELLED"):
+            self.info_message.setText(f"Solve stopped: {statistics.status.value}.")
+        else:
+            print(f"Sudoku resolved using {algorithm_type.value} algorithm!")
+        print(f"Statistics: {statistics}.")
         self.digits_map = sudoku_map
         self.update_sudoku_view()
 
@@ -6,17 +6,219 @@ class of the application.
 
 """
 
+import threading
+import time
 from enum import Enum
 
-from PySide6.QtCore import Signal, QObject
-
 
 class AlgorithmType(Enum):
     BACKTRACKING = "Backtracking"
     MRV = "MRV"
     AC3 = "AC-3"
+    AC2001 = "AC-2001"
     DEGREE_H = "Degree heuristic"
+    WDEG = "dom/wdeg"
     LEAST_CONSTRAINING_H = "Least constraining value"
+    BITMASK = "Bitmask"
+    FORWARD_CHECKING = "Forward checking"
+    MAC = "MAC"
+    DANCING_LINKS = "Dancing links"
+    ALL_DIFFERENT = "AllDifferent"
+    BACKJUMPING = "Conflict-directed backjumping"
+    PORTFOLIO = "Portfolio"
+    PARALLEL = "Parallel search"
+
+
+class SearchStatus(Enum):
+    RUNNING = "Running"
+    SOLVED = "Solved"
+    EXHAUSTED = "Exhausted"
+    BUDGET_EXCEEDED = "Budget exceeded"
+    CANCELLED = "Cancelled"
+
+
+class SearchStatistics:
+    """
+    Counters collected while solving a problem.
+
+    The searches only update them when an instance is given, so that the
+    collection costs nothing otherwise.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of assignments tried.
+    backtracks : int
+        The number of times the search went back up to a previous variable.
+    checks : int
+        The number of constraint checks.
+    pruned : int
+        The number of values removed from the domains by the pre-solver, the
+        arc consistency and the inference.
+    max_depth : int
+        The largest number of variables assigned at once by the search.
+    construction_time : float
+        The seconds spent building the CSP.
+    preprocessing_time : float
+        The seconds spent reducing the domains before the search.
+    search_time : float
+        The seconds spent searching.
+    status : SearchStatus
+        How the solve ended, None until it does.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.nodes = 0
+        self.backtracks = 0
+        self.checks = 0
+        self.pruned = 0
+        self.max_depth = 0
+        self.construction_time = 0.0
+        self.preprocessing_time = 0.0
+        self.search_time = 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Get the counters as a dictionary.
+
+        Returns
+        -------
+        dict
+        """
+        return dict(vars(self))
+
+    def add(self, other: "SearchStatistics"):
+        """
+        Add the counters and the times of another solve, whose status is
+        taken.
+
+        Parameters
+        ----------
+        other : SearchStatistics
+
+        Returns
+        -------
+        None
+        """
+        for name, value in vars(other).items():
+            if name == "status":
+                self.status = value
+            elif name == "max_depth":
+                self.max_depth = max(self.max_depth, value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def __str__(self):
+        return (
+            f"{self.status.value if self.status else 'Not run'}: "
+            f"{self.nodes} nodes, {self.backtracks} backtracks, {self.checks} checks, "
+            f"{self.pruned} pruned values, max depth {self.max_depth}; "
+            f"construction {self.construction_time:.3f}s, "
+            f"preprocessing {self.preprocessing_time:.3f}s, "
+            f"search {self.search_time:.3f}s"
+        )
+
+
+class SearchBudget:
+    """
+    Limits on a solve: a number of nodes, a time limit and a cancellation
+    flag which another thread can set.
+
+    The searches charge each node they expand to the budget and stop as soon
+    as it tells them to, leaving the reason in status.
+    A budget can be pickled along with a paused search, the copy keeping its
+    limits and whether it was cancelled.
+    """
+
+    def __init__(self, time_limit: float = None, node_limit: int = None):
+        """
+        Create a SearchBudget instance.
+
+        Parameters
+        ----------
+        time_limit : float
+            The seconds allowed from the call to start, unlimited by default.
+        node_limit : int
+            The number of nodes allowed, unlimited by default.
+        """
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.cancelled = threading.Event()
+        self.nodes = 0
+        self.deadline = None
+        self.status = None
+        self.start()
+
+    def start(self):
+        """
+        Reset the node count and the deadline for a new solve. A cancelled
+        budget stays cancelled.
+
+        Returns
+        -------
+        None
+        """
+        self.nodes = 0
+        self.status = None
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+
+    def __getstate__(self):
+        # An event can't be pickled: only whether it is set is kept, and the
+        # copy gets an event of its own.
+        state = dict(vars(self))
+        state["cancelled"] = self.cancelled.is_set()
+        return state
+
+    def __setstate__(self, state):
+        cancelled = state.pop("cancelled")
+        vars(self).update(state)
+        self.cancelled = threading.Event()
+        if cancelled:
+            self.cancelled.set()
+
+    def cancel(self):
+        """
+        Ask the search to stop. Safe to call from any thread.
+
+        Returns
+        -------
+        None
+        """
+        self.cancelled.set()
+
+    def spend_node(self) -> bool:
+        """
+        Charge a node to the budget.
+
+        Returns
+        -------
+        bool
+            False if the search must stop, in which case status tells why.
+        """
+        self.nodes += 1
+        return not self.exceeded()
+
+    def exceeded(self) -> bool:
+        """
+        Check the limits without charging a node, for the loops which run
+        outside of the searches.
+
+        Returns
+        -------
+        bool
+            True if the work must stop, in which case status tells why.
+        """
+        if self.cancelled.is_set():
+            self.status = SearchStatus.CANCELLED
+        elif self.node_limit is not None and self.nodes > self.node_limit:
+            self.status = SearchStatus.BUDGET_EXCEEDED
+        elif self.deadline is not None and time.perf_counter() > self.deadline:
+            self.status = SearchStatus.BUDGET_EXCEEDED
+        else:
+            return False
+        return True
 
 
 class Cell:
@@ -78,24 +280,89 @@ class Cell:
         self.position = (self.position[0], value)
 
 
-class Resolver(QObject):
+class VariableSelector:
     """
-    A worker who manage the resolving of a problem.
+    A stateful variable ordering heuristic.
+
+    The search notifies it of every change made to the assignment and to the
+    domains, so that it can keep its ordering up to date instead of
+    recomputing it at each node.
     """
 
-    result_ready = Signal()
-    error = Signal()
+    def setup(self, assignment: dict, csp):
+        """
+        Initialise the selector from the starting state of the search.
+
+        Parameters
+        ----------
+        assignment : dict
+            The initial assignment.
+        csp : CSP
+            The constraint satisfaction problem.
+        """
+        pass
+
+    def __call__(self, assignment: dict, csp):
+        """
+        Select the next variable to assign.
+
+        Parameters
+        ----------
+        assignment : dict
+        csp : CSP
+
+        Returns
+        -------
+        any
+        """
+        raise NotImplementedError
+
+    def assign(self, var, value, csp):
+        pass
+
+    def unassign(self, var, value, csp):
+        pass
+
+    def prune(self, var, value, csp):
+        pass
+
+    def restore(self, var, value, csp):
+        pass
 
-    def do_work(self):
-        self.result_ready.emit()
+    def fail(self, constraint, csp):
+        """
+        Be told that a constraint has rejected a value or wiped out a domain.
+
+        Parameters
+        ----------
+        constraint : Constraint
+            The failing constraint, None if the failure doesn't come from a
+            constraint.
+        csp : CSP
+        """
+        pass
 
 
 class Constraint:
     """
     A constraint is composed of a set of variable where the constraint applied
     and a evaluation function.
+
+    The hash is computed once, as the constraints are hashed over and over by
+    the algorithms, and the id is the index of the constraint in the
+    constraints of its CSP, set once by the CSP or by the sudoku template
+    which the constraint belongs to.
     """
 
+    __slots__ = ("scope", "val_func", "id", "_hash")
+
+    # Whether the constraint can be checked before all its variables are
+    # assigned.
+    partial = False
+    # Whether the constraint is a NotEqual, which the algorithms check with a
+    # direct comparison instead of calling the evaluation function.
+    not_equal = False
+
     def __init__(self, scope: frozenset, val_func: callable):
         """
         Create a Constraint instance.
@@ -109,6 +376,8 @@ class Constraint:
         """
         self.scope = scope
         self.val_func = val_func
+        self.id = None
+        self._hash = self._compute_hash()
 
     def satisfied(self, assignment: dict):
         """
@@ -125,8 +394,47 @@ class Constraint:
         """
         return self.val_func(tuple(assignment[v] for v in self.scope))
 
+    def satisfied_with(self, assignment: dict, var: any, value: any):
+        """
+        Check if the constraint is satisfied when a variable takes a value,
+        without adding it to the assignment.
+
+        Parameters
+        ----------
+        assignment : dict
+            The assignment of the other variables of the scope.
+        var : any
+            The variable to give a value to.
+        value : any
+            The value of the variable.
+
+        Returns
+        -------
+        bool
+        """
+        return self.val_func(
+            tuple(value if v == var else assignment[v] for v in self.scope)
+        )
+
     def __hash__(self):
-        return hash((self.scope, self.val_func))
+        return self._hash
+
+    def _compute_hash(self):
+        # A function hashes by its address, which changes from a process to
+        # another, so its name is hashed instead. The scope strings are still
+        # hashed with the per-process random salt: the iteration order of the
+        # sets of constraints only repeats from a run to another under a fixed
+        # PYTHONHASHSEED, as the benchmarks set it.
+        return hash(
+            (self.scope, getattr(self.val_func, "__qualname__", self.val_func))
+        )
+
+    def __getstate__(self):
+        return self.scope, self.val_func, self.id
+
+    def __setstate__(self, state):
+        self.scope, self.val_func, self.id = state
+        self._hash = self._compute_hash()
 
     def __str__(self):
         scope_str = ""
@@ -141,3 +449,98 @@ class Constraint:
             )
 
         return self.scope == other.scope and self.val_func == other.val_func
+
+
+def all_distinct(values: tuple) -> bool:
+    return len(set(values)) == len(values)
+
+
+class AllDifferent(Constraint):
+    """
+    A n-ary constraint whose variables must all take different values.
+
+    It is checked on the assigned variables of its scope only, so that a
+    conflict is found as soon as two of them get the same value.
+    """
+
+    __slots__ = ()
+
+    partial = True
+
+    def __init__(self, scope: frozenset):
+        """
+        Create an AllDifferent instance.
+
+        Parameters
+        ----------
+        scope : frozenset
+            The variables which must take different values.
+        """
+        super().__init__(frozenset(scope), all_distinct)
+
+    def satisfied(self, assignment: dict):
+        return self.val_func(
+            tuple(assignment[v] for v in self.scope if v in assignment)
+        )
+
+    def satisfied_with(self, assignment: dict, var: any, value: any):
+        return all(
+            v == var or v not in assignment or assignment[v] != value
+            for v in self.scope
+        )
+
+
+class NotEqual(Constraint):
+    """
+    A binary constraint whose two variables must take different values.
+
+    The evaluation function is kept for the generic code, but the constraint
+    is checked with a direct comparison.
+    """
+
+    __slots__ = ("first", "second")
+
+    not_equal = True
+
+    def __init__(self, first: any, second: any):
+        """
+        Create a NotEqual instance.
+
+        Parameters
+        ----------
+        first : any
+            A variable of the constraint.
+        second : any
+            The other variable.
+        """
+        super().__init__(frozenset((first, second)), all_distinct)
+        self.first = first
+        self.second = second
+
+    def other(self, var: any) -> any:
+        """
+        Get the other variable of the constraint.
+
+        Parameters
+        ----------
+        var : any
+            A variable of the constraint.
+
+        Returns
+        -------
+        any
+        """
+        return self.second if var == self.first else self.first
+
+    def satisfied(self, assignment: dict):
+        return assignment[self.first] != assignment[self.second]
+
+    def satisfied_with(self, assignment: dict, var: any, value: any):
+        return assignment[self.other(var)] != value
+
+    def __getstate__(self):
+        return super().__getstate__() + (self.first, self.second)
+
+    def __setstate__(self, state):
+        super().__setstate__(state[:3])
+        self.first, self.second = state[3:]
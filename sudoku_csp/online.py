@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Online puzzle fetching.
+
+Boards are fetched from a sudoku web service over per-thread HTTP sessions
+shared with the generator, with connect and read timeouts, a batch at a
+time, and stored in a local SQLite cache. The boards of a batch not served
+yet are handed out without any request, and when the service can't be
+reached, the boards already served are handed out again rather than
+failing.
+
+"""
+import os
+import random
+import sqlite3
+import threading
+
+import numpy as np
+import requests
+
+from sudoku_csp.batch import format_puzzle, parse_puzzle
+from sudoku_csp.generator import Generator, HTTPSessions, SudokuDifficulty
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".sudoku_csp", "online.db")
+
+
+class OnlineGenerator:
+    """
+    A client of a sudoku web service, with prefetching and a local cache.
+    """
+
+    def __init__(
+        self,
+        url: str = Generator.generator_url,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        batch_size: int = 5,
+        timeout: tuple = Generator.timeout,
+        retries: int = 2,
+        max_cached: int = 200,
+    ):
+        """
+        Create an OnlineGenerator instance.
+
+        Parameters
+        ----------
+        url : str
+            The board endpoint of the service.
+        cache_path : str
+            The SQLite database where the fetched boards are cached.
+        batch_size : int
+            The number of boards fetched at once when none is left unserved.
+        timeout : tuple[float, float]
+            The connect and read timeouts of each request, in seconds.
+        retries : int
+            The number of times a failed connection or a gateway error is
+            tried again. A read timeout isn't.
+        max_cached : int
+            The number of served boards kept per difficulty for when the
+            service is down.
+        """
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_cached = max_cached
+        self.lock = threading.Lock()
+
+        self.sessions = HTTPSessions(retries)
+
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS boards ("
+                "id INTEGER PRIMARY KEY, difficulty TEXT, board TEXT, "
+                "served INTEGER DEFAULT 0)"
+            )
+
+    def request_board(self, difficulty: SudokuDifficulty) -> np.ndarray:
+        """
+        Fetch a single board from the service.
+
+        Parameters
+        ----------
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        np.ndarray
+
+        Raises
+        ------
+        requests.RequestException
+            If the service can't be reached in time or answers with an error.
+        """
+        response = self.sessions.get().get(
+            self.url, params={"difficulty": difficulty.value}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return np.array(response.json()["board"], dtype=int)
+
+    def unserved(self, difficulty: SudokuDifficulty) -> int:
+        """
+        Get the number of fetched boards not served yet.
+
+        Parameters
+        ----------
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        int
+        """
+        with self.lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM boards WHERE difficulty = ? AND served = 0",
+                (difficulty.value,),
+            ).fetchone()
+        return count
+
+    def prefetch(self, difficulty: SudokuDifficulty) -> int:
+        """
+        Fetch boards until batch_size of them are left unserved.
+
+        Parameters
+        ----------
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        int
+            The number of fetched boards.
+
+        Raises
+        ------
+        requests.RequestException
+            If the service fails before any board is fetched.
+        """
+        fetched = 0
+        for _ in range(self.batch_size - self.unserved(difficulty)):
+            try:
+                board = self.request_board(difficulty)
+            except requests.RequestException:
+                if fetched:
+                    break
+                raise
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "INSERT INTO boards (difficulty, board) VALUES (?, ?)",
+                    (difficulty.value, format_puzzle(board, ",")),
+                )
+            fetched += 1
+        return fetched
+
+    def fetch(self, difficulty: SudokuDifficulty) -> np.ndarray:
+        """
+        Get a board, fetching a new batch if none is left unserved, or
+        serving a cached one again if the service fails.
+
+        Parameters
+        ----------
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        np.ndarray
+
+        Raises
+        ------
+        requests.RequestException
+            If the service fails and no board of this difficulty is cached.
+        """
+        difficulty = SudokuDifficulty(difficulty.value)
+        try:
+            if not self.unserved(difficulty):
+                self.prefetch(difficulty)
+        except requests.RequestException:
+            board = self._cached(difficulty)
+            if board is None:
+                raise
+            return board
+
+        with self.lock, self.connection:
+            board_id, board = self.connection.execute(
+                "SELECT id, board FROM boards WHERE difficulty = ? AND served = 0 "
+                "ORDER BY id LIMIT 1",
+                (difficulty.value,),
+            ).fetchone()
+            self.connection.execute(
+                "UPDATE boards SET served = 1 WHERE id = ?", (board_id,)
+            )
+            self.connection.execute(
+                "DELETE FROM boards WHERE id IN ("
+                "SELECT id FROM boards WHERE difficulty = ? AND served = 1 "
+                "ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (difficulty.value, self.max_cached),
+            )
+        return parse_puzzle(board)
+
+    def close(self):
+        """
+        Close the sessions and the cache.
+
+        Returns
+        -------
+        None
+        """
+        self.sessions.close()
+        self.connection.close()
+
+    def _cached(self, difficulty: SudokuDifficulty):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT board FROM boards WHERE difficulty = ?", (difficulty.value,)
+            ).fetchall()
+        return parse_puzzle(random.choice(rows)[0]) if rows else None
@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+"""Work-splitting parallel search.
+
+The first decision levels of the search tree are expanded into independent
+subproblems, each one being the list of (variable, value) decisions leading
+to it. Worker processes take the subproblems from a shared queue and search
+them with a BacktrackingSearch, a few nodes at a time. Between two steps, a
+busy worker which sees an idle one gives away the untried values of its
+shallowest level as new subproblems, so that the work keeps being spread
+until a worker finds a solution and all of them stop. The worker processes
+are started by the first search and wait for the next ones.
+
+"""
+import atexit
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+
+from sudoku_csp.csp import CSP
+from sudoku_csp.interfaces import (
+    VariableSelector,
+    SearchStatus,
+    SearchStatistics,
+    SearchBudget,
+)
+from sudoku_csp.algorithms import (
+    BacktrackingSearch,
+    backtracking_search,
+    first_unassigned_variable,
+    unorder_domain_values,
+    no_inference,
+)
+
+
+def split_search(
+    csp: CSP,
+    depth: int,
+    select_unassigned_variable=first_unassigned_variable,
+    order_domain_values=unorder_domain_values,
+    inference=no_inference,
+) -> list:
+    """
+    Expand the first levels of the search tree of a CSP.
+
+    Parameters
+    ----------
+    csp : CSP
+        The constraint satisfaction problem, left as it was.
+    depth : int
+        The number of decision levels to expand.
+    select_unassigned_variable : callable
+        How the variables are sorted.
+    order_domain_values : callable
+        How the domain ise sorted.
+    inference : callable
+        What is inferred from each new assignment.
+
+    Returns
+    -------
+    list[list[tuple]]
+        The (variable, value) decisions of each consistent subproblem.
+    """
+    subproblems = list()
+    assignment = csp.apply_constraints()
+    removals = list()
+
+    def expand(decisions: list, depth: int):
+        if depth == 0 or len(assignment) == len(csp.variables):
+            subproblems.append(list(decisions))
+            return
+        if isinstance(select_unassigned_variable, VariableSelector):
+            select_unassigned_variable.setup(assignment, csp)
+        var = select_unassigned_variable(assignment, csp)
+        for value in list(order_domain_values(var, assignment, csp)):
+            if csp.consistent_value(assignment, var, value):
+                assignment[var] = value
+                trail = list()
+                if inference(csp, var, value, assignment, trail):
+                    decisions.append((var, value))
+                    expand(decisions, depth - 1)
+                    decisions.pop()
+                csp.restore(trail)
+                del assignment[var]
+
+    if all(
+        inference(csp, var, value, assignment, removals)
+        for var, value in assignment.copy().items()
+    ):
+        expand(list(), depth)
+    csp.restore(removals)
+    return subproblems
+
+
+def _donate(
+    search: BacktrackingSearch, job: int, decisions: list, tasks, outstanding
+):
+    """
+    Give away the untried values of the shallowest level of a search which
+    has some left.
+    """
+    for depth, frame in enumerate(search.stack):
+        untried = frame.values[frame.index :]
+        if untried:
+            frame.values = frame.values[: frame.index]
+            prefix = decisions + [
+                (above.var, above.value) for above in search.stack[:depth]
+            ]
+            with outstanding.get_lock():
+                outstanding.value += len(untried)
+            for value in untried:
+                tasks.put((job, prefix + [(frame.var, value)]))
+            return
+
+
+def _search_subproblem(
+    csp: CSP,
+    job: int,
+    decisions: list,
+    select_unassigned_variable,
+    order_domain_values,
+    inference,
+    budget: SearchBudget,
+    statistics: SearchStatistics,
+    step_nodes: int,
+    tasks,
+    stop,
+    outstanding,
+    idle,
+):
+    """
+    Search a subproblem, donating work to the idle workers between steps.
+
+    Returns
+    -------
+    tuple[SearchStatus, dict]
+        How the search ended, and the solution if it found one.
+    """
+    csp.count_checks()
+    removals = list()
+    assignment = csp.apply_constraints()
+    for var, value in decisions:
+        if not csp.consistent_value(assignment, var, value):
+            csp.restore(removals)
+            return SearchStatus.EXHAUSTED, None
+        assignment[var] = value
+        csp.suppose(var, value, removals)
+
+    checks = csp.checks
+    search = BacktrackingSearch(
+        csp, select_unassigned_variable, order_domain_values, inference, budget
+    )
+    while True:
+        status = search.step(step_nodes)
+        if status is not SearchStatus.RUNNING or stop.is_set():
+            break
+        if idle.value > 0 and tasks.empty():
+            _donate(search, job, decisions, tasks, outstanding)
+    solution = search.solution if status is SearchStatus.SOLVED else None
+    search.close()
+    csp.restore(removals)
+
+    statistics.nodes += search.nodes
+    statistics.backtracks += search.backtracks
+    statistics.checks += csp.checks - checks
+    statistics.pruned += search.pruned
+    statistics.max_depth = max(statistics.max_depth, search.max_depth + len(decisions))
+    return status, solution
+
+
+def _worker(jobs, tasks, results, stop, outstanding, idle):
+    """
+    Take part in the searches of the pool until a None job comes.
+
+    A job is the number of a search and the pickled problem, with how to
+    search it. The subproblems of the tasks queue are tagged with the
+    number of their search, and the ones left over by a previous search are
+    skipped. When the search is stopped, the (job, "statistics", statistics)
+    counters of the worker are put in the results queue.
+    """
+    # The worker gives subproblems away, which mustn't keep it alive once the
+    # pool is closed and nobody reads them anymore.
+    tasks.cancel_join_thread()
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job, problem = job
+        (
+            csp,
+            select_unassigned_variable,
+            order_domain_values,
+            inference,
+            node_limit,
+            step_nodes,
+        ) = pickle.loads(problem)
+        statistics = SearchStatistics()
+        budget = SearchBudget(node_limit=node_limit) if node_limit is not None else None
+
+        with idle.get_lock():
+            idle.value += 1
+        while not stop.is_set():
+            try:
+                task_job, decisions = tasks.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if task_job != job:
+                continue
+            with idle.get_lock():
+                idle.value -= 1
+
+            status, solution = _search_subproblem(
+                csp,
+                job,
+                decisions,
+                select_unassigned_variable,
+                order_domain_values,
+                inference,
+                budget,
+                statistics,
+                step_nodes,
+                tasks,
+                stop,
+                outstanding,
+                idle,
+            )
+
+            with idle.get_lock():
+                idle.value += 1
+            if status is SearchStatus.SOLVED:
+                results.put((job, "solution", solution))
+                stop.set()
+            elif status is SearchStatus.EXHAUSTED:
+                with outstanding.get_lock():
+                    outstanding.value -= 1
+                    if outstanding.value == 0:
+                        results.put((job, "exhausted", None))
+            elif status is not SearchStatus.RUNNING:
+                results.put((job, "stopped", status))
+                break
+        results.put((job, "statistics", statistics))
+
+
+class ParallelPool:
+    """
+    The processes which share the subproblems of the parallel searches.
+
+    They are started once and wait for the problem of each search, as
+    starting an interpreter per process costs more than solving most
+    sudokus, even 25x25 ones. A search ends when the stop event is set, and
+    it is only over once every worker has sent its counters, so that the
+    next search starts with idle workers and fresh shared counters.
+    """
+
+    def __init__(self, processes: int):
+        """
+        Create a ParallelPool instance and start its processes.
+
+        Parameters
+        ----------
+        processes : int
+            The number of worker processes.
+        """
+        context = multiprocessing.get_context("spawn")
+        # Each worker has a queue of its own for the jobs, so that every one
+        # of them gets the problem of every search.
+        self.jobs = [context.Queue() for _ in range(processes)]
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.stop = context.Event()
+        self.outstanding = context.Value("i", 0)
+        self.idle = context.Value("i", 0)
+        self.searches = 0
+        self.processes = [
+            context.Process(
+                target=_worker,
+                args=(
+                    jobs,
+                    self.tasks,
+                    self.results,
+                    self.stop,
+                    self.outstanding,
+                    self.idle,
+                ),
+                daemon=True,
+            )
+            for jobs in self.jobs
+        ]
+        for process in self.processes:
+            process.start()
+
+    def alive(self) -> bool:
+        """
+        Tell whether all the worker processes are still running.
+
+        Returns
+        -------
+        bool
+        """
+        return all(process.is_alive() for process in self.processes)
+
+    def search(
+        self,
+        csp: CSP,
+        subproblems: list,
+        select_unassigned_variable=first_unassigned_variable,
+        order_domain_values=unorder_domain_values,
+        inference=no_inference,
+        step_nodes: int = 256,
+        statistics: SearchStatistics = None,
+        budget: SearchBudget = None,
+    ):
+        """
+        Search the subproblems of a CSP over the workers, until one of them
+        finds a solution or all of them are exhausted.
+
+        Parameters
+        ----------
+        csp : CSP
+            The constraint satisfaction problem.
+        subproblems : list[list[tuple]]
+            The (variable, value) decisions of each subproblem, see
+            split_search.
+        select_unassigned_variable : callable
+            How the variables are sorted.
+        order_domain_values : callable
+            How the domain ise sorted.
+        inference : callable
+            What is inferred from each new assignment.
+        step_nodes : int
+            The number of nodes a worker expands between two checks for idle
+            workers and for the end of the search.
+        statistics : SearchStatistics
+            Where the counters of all the workers are added, if given.
+        budget : SearchBudget
+            The limits of the search, if any, see parallel_search.
+
+        Returns
+        -------
+        dict
+            The solution, or None if there isn't any or the budget stopped
+            the search.
+        """
+        self.searches += 1
+        self.stop.clear()
+        self.outstanding.value = len(subproblems)
+        self.idle.value = 0
+
+        node_limit = budget.node_limit if budget is not None else None
+        # The problem is pickled once rather than by the feeder thread of
+        # every job queue.
+        problem = pickle.dumps(
+            (
+                csp,
+                select_unassigned_variable,
+                order_domain_values,
+                inference,
+                node_limit,
+                step_nodes,
+            )
+        )
+        for jobs in self.jobs:
+            jobs.put((self.searches, problem))
+        for decisions in subproblems:
+            self.tasks.put((self.searches, decisions))
+
+        solution = None
+        reported = 0
+
+        def receive(job, kind, payload):
+            nonlocal solution, reported
+            if job != self.searches:
+                return False
+            if kind == "solution" and solution is None:
+                solution = payload
+            elif kind == "stopped" and budget is not None:
+                budget.status = payload
+            elif kind == "statistics":
+                reported += 1
+                if statistics is not None:
+                    statistics.add(payload)
+            return kind in ("solution", "exhausted", "stopped")
+
+        try:
+            while True:
+                if budget is not None and budget.cancelled.is_set():
+                    budget.status = SearchStatus.CANCELLED
+                    break
+                if (
+                    budget is not None
+                    and budget.deadline is not None
+                    and time.perf_counter() > budget.deadline
+                ):
+                    budget.status = SearchStatus.BUDGET_EXCEEDED
+                    break
+                try:
+                    if receive(*self.results.get(timeout=0.05)):
+                        break
+                except queue.Empty:
+                    if not self.alive():
+                        raise RuntimeError(
+                            "A parallel search process died during the search."
+                        )
+        finally:
+            self.stop.set()
+            while reported < len(self.processes):
+                try:
+                    receive(*self.results.get(timeout=0.05))
+                except queue.Empty:
+                    if not self.alive():
+                        break
+        return solution
+
+    def close(self):
+        """
+        Stop the worker processes.
+
+        Returns
+        -------
+        None
+        """
+        self.stop.set()
+        for jobs in self.jobs:
+            jobs.put(None)
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+# The pool of the parallel searches, started by the first one.
+_parallel_pool = None
+
+
+def parallel_pool(processes: int) -> ParallelPool:
+    """
+    Get the pool of the parallel searches, starting it, or starting a new
+    one when it has another number of processes or one of them died.
+
+    Parameters
+    ----------
+    processes : int
+        The number of worker processes.
+
+    Returns
+    -------
+    ParallelPool
+    """
+    global _parallel_pool
+    if _parallel_pool is not None and (
+        len(_parallel_pool.processes) != processes or not _parallel_pool.alive()
+    ):
+        _parallel_pool.close()
+        _parallel_pool = None
+    if _parallel_pool is None:
+        _parallel_pool = ParallelPool(processes)
+        atexit.register(_parallel_pool.close)
+    return _parallel_pool
+
+
+def parallel_search(
+    csp: CSP,
+    select_unassigned_variable=first_unassigned_variable,
+    order_domain_values=unorder_domain_values,
+    inference=no_inference,
+    processes: int = None,
+    split_depth: int = 2,
+    step_nodes: int = 256,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
+):
+    """
+    Search a CSP over the parallel search pool.
+
+    The first split_depth levels of the search tree are expanded into
+    subproblems, which the workers share through a queue and split further
+    when some of them are idle. All the workers stop as soon as one of them
+    finds a solution. With a single process, the CSP is searched in this
+    one, as a worker would only add the cost of sending it the problem.
+
+    Parameters
+    ----------
+    csp : CSP
+        The constraint satisfaction problem.
+    select_unassigned_variable : callable
+        How the variables are sorted.
+    order_domain_values : callable
+        How the domain ise sorted.
+    inference : callable
+        What is inferred from each new assignment.
+    processes : int
+        The number of worker processes, all the CPUs by default.
+    split_depth : int
+        The number of decision levels expanded before the workers start.
+    step_nodes : int
+        The number of nodes a worker expands between two checks for idle
+        workers and for the end of the search.
+    statistics : SearchStatistics
+        Where the counters of all the workers are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any. The time limit and the
+        cancellation apply to the whole search, the node limit to each
+        worker.
+
+    Returns
+    -------
+    dict
+        The solution, or None if there isn't any or the budget stopped the
+        search.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return backtracking_search(
+            csp,
+            select_unassigned_variable,
+            order_domain_values,
+            inference,
+            statistics,
+            budget,
+        )
+
+    subproblems = split_search(
+        csp, split_depth, select_unassigned_variable, order_domain_values, inference
+    )
+    if not subproblems:
+        return None
+    pool = parallel_pool(processes)
+    return pool.search(
+        csp,
+        subproblems,
+        select_unassigned_variable,
+        order_domain_values,
+        inference,
+        step_nodes,
+        statistics,
+        budget,
+    )
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""Pre-generated puzzle pool.
+
+Puzzles are generated ahead of time by a pool of background processes and
+kept in a SQLite database, one stock per (size, difficulty), so that asking
+for a puzzle doesn't have to wait for a grid to be solved and dug out. Each
+stock is refilled up to the high-water mark as soon as it drains, and it
+survives the application restarts. An empty stock doesn't block: the puzzle
+has to be asked again once the stock has been refilled.
+
+"""
+import multiprocessing
+import os
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from sudoku_csp.batch import format_puzzle, parse_puzzle
+from sudoku_csp.generator import Generator, SudokuDifficulty
+from sudoku_csp.interfaces import SearchBudget
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".sudoku_csp", "puzzles.db")
+
+# The event which cancels the generations of a pool process, set when the
+# pool is closed.
+_cancelled = None
+
+
+def _start_process(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _generate(size: int, difficulty: str) -> np.ndarray:
+    """
+    Generate a puzzle in a pool process, or None if the pool has been closed
+    meanwhile.
+    """
+    budget = SearchBudget()
+    budget.cancelled = _cancelled
+    return Generator.generate_backtracking(size, SudokuDifficulty(difficulty), budget)
+
+
+class PuzzlePool:
+    """
+    A persistent stock of generated puzzles per (size, difficulty), refilled
+    in the background.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        high_water_mark: int = 20,
+        processes: int = 1,
+        stocks: list = None,
+    ):
+        """
+        Create a PuzzlePool instance and start refilling it.
+
+        Parameters
+        ----------
+        path : str
+            The SQLite database where the puzzles are stored.
+        high_water_mark : int
+            The number of puzzles kept in stock for each (size, difficulty).
+        processes : int
+            The number of processes generating the puzzles.
+        stocks : list[tuple[int, SudokuDifficulty]]
+            The (size, difficulty) stocks to fill from the start. The other
+            ones are filled once a puzzle has been taken from them.
+        """
+        self.high_water_mark = high_water_mark
+        self.processes = processes
+        self.stocks = set()
+        self.lock = threading.Lock()
+        self.wake_up = threading.Event()
+        self.stopped = threading.Event()
+        self.context = multiprocessing.get_context("spawn")
+        self.cancelled = self.context.Event()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS puzzles ("
+                "id INTEGER PRIMARY KEY, size INTEGER, difficulty TEXT, puzzle TEXT)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS puzzles_stock ON puzzles (size, difficulty)"
+            )
+
+        for size, difficulty in stocks or list():
+            self.stocks.add((size, difficulty.value))
+        self.refill_thread = threading.Thread(target=self._refill, daemon=True)
+        self.refill_thread.start()
+        self.wake_up.set()
+
+    def count(self, size: int, difficulty: SudokuDifficulty) -> int:
+        """
+        Get the number of puzzles in a stock.
+
+        Parameters
+        ----------
+        size : int
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        int
+        """
+        with self.lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM puzzles WHERE size = ? AND difficulty = ?",
+                (size, difficulty.value),
+            ).fetchone()
+        return count
+
+    def take(self, size: int, difficulty: SudokuDifficulty) -> np.ndarray:
+        """
+        Take a puzzle out of its stock, and have the stock refilled.
+
+        Parameters
+        ----------
+        size : int
+        difficulty : SudokuDifficulty
+
+        Returns
+        -------
+        np.ndarray
+            The puzzle, or None if the stock is empty.
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT id, puzzle FROM puzzles WHERE size = ? AND difficulty = ? "
+                "ORDER BY id LIMIT 1",
+                (size, difficulty.value),
+            ).fetchone()
+            if row is not None:
+                self.connection.execute("DELETE FROM puzzles WHERE id = ?", (row[0],))
+            self.stocks.add((size, difficulty.value))
+        self.wake_up.set()
+
+        if row is None:
+            return None
+        return parse_puzzle(row[1])
+
+    def close(self):
+        """
+        Stop the background generation, without waiting for the running
+        generations, which are cancelled. The puzzles in stock are kept.
+
+        Returns
+        -------
+        None
+        """
+        self.stopped.set()
+        self.cancelled.set()
+        self.wake_up.set()
+        self.refill_thread.join()
+        self.connection.close()
+
+    def _missing(self) -> list:
+        """
+        Get the stocks under the high-water mark with the number of puzzles
+        they miss.
+        """
+        with self.lock:
+            stocks = list(self.stocks)
+        missing = list()
+        for size, difficulty in sorted(stocks):
+            count = self.count(size, SudokuDifficulty(difficulty))
+            if count < self.high_water_mark:
+                missing.append((size, difficulty, self.high_water_mark - count))
+        return missing
+
+    def _store(self, size: int, difficulty: str, sudoku_map: np.ndarray):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO puzzles (size, difficulty, puzzle) VALUES (?, ?, ?)",
+                (size, difficulty, format_puzzle(sudoku_map, ",")),
+            )
+
+    def _executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            self.processes,
+            mp_context=self.context,
+            initializer=_start_process,
+            initargs=(self.cancelled,),
+        )
+
+    def _refill(self):
+        """
+        Generate puzzles for the stocks under the high-water mark until they
+        are full, then wait for a stock to drain.
+
+        A failed generation is reported and submitted again. When a process
+        dies, the executor is replaced, and the generations it was running
+        are submitted to the new one.
+        """
+        executor = self._executor()
+        pending = dict()
+        try:
+            while not self.stopped.is_set():
+                if not pending:
+                    self.wake_up.wait()
+                self.wake_up.clear()
+                if self.stopped.is_set():
+                    break
+
+                for size, difficulty, missing in self._missing():
+                    in_flight = sum(
+                        1 for stock in pending.values() if stock == (size, difficulty)
+                    )
+                    for _ in range(min(missing - in_flight, self.processes)):
+                        future = executor.submit(_generate, size, difficulty)
+                        pending[future] = (size, difficulty)
+
+                if not pending:
+                    continue
+                broken = False
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    size, difficulty = pending.pop(future)
+                    try:
+                        sudoku_map = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                    except Exception:
+                        print(traceback.format_exc())
+                    else:
+                        if sudoku_map is not None:
+                            self._store(size, difficulty, sudoku_map)
+                if done:
+                    # Check again what is missing before waiting for a drain.
+                    self.wake_up.set()
+
+                if broken:
+                    print("A puzzle generation process died, restarting the pool.")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    pending.clear()
+                    # Don't restart in a loop if the processes keep dying.
+                    if self.stopped.wait(1):
+                        break
+                    executor = self._executor()
+                    self.wake_up.set()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
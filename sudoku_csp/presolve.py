@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Logical pre-solver.
+
+Human solving techniques applied to the domains of a sudoku CSP before the
+search: naked and hidden singles, pairs and triples, pointing pairs and
+box-line reduction. They are applied until none of them removes anything.
+
+"""
+from collections import Counter
+from itertools import combinations
+
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import SearchBudget
+
+
+def _eliminate(csp: SudokuCSP, var: str, value: int, removals: list) -> int:
+    if value in csp.domains[var]:
+        csp.prune(var, value, removals)
+        return 1
+    return 0
+
+
+def _places(csp: SudokuCSP, unit: list) -> dict:
+    """
+    Get the cells of a unit where each value can still be put.
+    """
+    return {
+        value: [var for var in unit if value in csp.domains[var]]
+        for value in range(1, len(unit) + 1)
+    }
+
+
+def naked_singles(csp: SudokuCSP, removals: list) -> int:
+    """
+    Remove the value of each resolved cell from the other cells of its units.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    for unit in csp.rows + csp.columns + csp.boxes:
+        for var in unit:
+            if len(csp.domains[var]) == 1:
+                (value,) = csp.domains[var]
+                for other_var in unit:
+                    if other_var != var:
+                        removed += _eliminate(csp, other_var, value, removals)
+    return removed
+
+
+def hidden_singles(csp: SudokuCSP, removals: list) -> int:
+    """
+    Put each value which fits in a single cell of a unit in this cell.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    for unit in csp.rows + csp.columns + csp.boxes:
+        for value, cells in _places(csp, unit).items():
+            if len(cells) == 1 and len(csp.domains[cells[0]]) > 1:
+                removed += len(csp.domains[cells[0]]) - 1
+                csp.suppose(cells[0], value, removals)
+    return removed
+
+
+def naked_subsets(csp: SudokuCSP, removals: list, size: int) -> int:
+    """
+    Find groups of cells of a unit sharing as many candidates as there are
+    cells, and remove these candidates from the other cells of the unit.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+    size : int
+        The number of cells of a group, 2 for pairs and 3 for triples.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    for unit in csp.rows + csp.columns + csp.boxes:
+        open_cells = [var for var in unit if 1 < len(csp.domains[var]) <= size]
+        for cells in combinations(open_cells, size):
+            values = set().union(*(csp.domains[var] for var in cells))
+            if len(values) == size:
+                for other_var in unit:
+                    if other_var not in cells:
+                        for value in values:
+                            removed += _eliminate(csp, other_var, value, removals)
+    return removed
+
+
+def hidden_subsets(csp: SudokuCSP, removals: list, size: int) -> int:
+    """
+    Find groups of values of a unit which only fit in as many cells as there
+    are values, and remove the other candidates of these cells.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+    size : int
+        The number of values of a group, 2 for pairs and 3 for triples.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    for unit in csp.rows + csp.columns + csp.boxes:
+        places = _places(csp, unit)
+        open_values = [
+            value for value, cells in places.items() if 1 < len(cells) <= size
+        ]
+        for values in combinations(open_values, size):
+            cells = set().union(*(places[value] for value in values))
+            if len(cells) == size:
+                for var in cells:
+                    for value in list(csp.domains[var]):
+                        if value not in values:
+                            removed += _eliminate(csp, var, value, removals)
+    return removed
+
+
+def pointing(csp: SudokuCSP, removals: list) -> int:
+    """
+    When the cells of a box where a value fits are all on one row or column,
+    remove this value from the rest of the row or column.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    lines = [(line, set(line)) for line in csp.rows + csp.columns]
+    for box in csp.boxes:
+        box_cells = set(box)
+        for value, cells in _places(csp, box).items():
+            if len(cells) < 2:
+                continue
+            for line, line_cells in lines:
+                if line_cells.issuperset(cells):
+                    for other_var in line:
+                        if other_var not in box_cells:
+                            removed += _eliminate(csp, other_var, value, removals)
+    return removed
+
+
+def box_line_reduction(csp: SudokuCSP, removals: list) -> int:
+    """
+    When the cells of a row or column where a value fits are all in one box,
+    remove this value from the rest of the box.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+    removals : list
+        The trail where the removals are recorded.
+
+    Returns
+    -------
+    int
+        The number of removed values.
+    """
+    removed = 0
+    boxes = [(box, set(box)) for box in csp.boxes]
+    for line in csp.rows + csp.columns:
+        line_cells = set(line)
+        for value, cells in _places(csp, line).items():
+            if len(cells) < 2:
+                continue
+            for box, box_cells in boxes:
+                if box_cells.issuperset(cells):
+                    for other_var in box:
+                        if other_var not in line_cells:
+                            removed += _eliminate(csp, other_var, value, removals)
+    return removed
+
+
+RULES = (
+    ("naked single", naked_singles),
+    ("hidden single", hidden_singles),
+    ("naked pair", lambda csp, removals: naked_subsets(csp, removals, 2)),
+    ("hidden pair", lambda csp, removals: hidden_subsets(csp, removals, 2)),
+    ("pointing", pointing),
+    ("box-line reduction", box_line_reduction),
+    ("naked triple", lambda csp, removals: naked_subsets(csp, removals, 3)),
+    ("hidden triple", lambda csp, removals: hidden_subsets(csp, removals, 3)),
+)
+
+
+def logical_presolve(
+    csp: SudokuCSP, removals: list = None, budget: SearchBudget = None
+) -> Counter:
+    """
+    Reduce the domains of a sudoku CSP with logical rules until none of them
+    removes anything, or until the budget is exceeded.
+
+    The rules are tried from the cheapest to the most expensive, and the
+    loop goes back to the cheapest one as soon as a rule removes a value.
+
+    Parameters
+    ----------
+    csp : SudokuCSP
+        The sudoku problem, whose domains are reduced in place.
+    removals : list
+        The trail where the removals are recorded.
+    budget : SearchBudget
+        The limits of the pre-solver, if any.
+
+    Returns
+    -------
+    Counter
+        The number of values removed by each rule which fired.
+    """
+    removals = list() if removals is None else removals
+    fired = Counter()
+    while True:
+        if budget is not None and budget.exceeded():
+            return fired
+        for name, rule in RULES:
+            removed = rule(csp, removals)
+            if removed:
+                fired[name] += removed
+                break
+        else:
+            return fired
+
+        if not all(csp.domains[var] for var in csp.variables):
+            return fired
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Vectorized candidate propagation.
+
+The candidates of a whole batch of puzzles are held in a boolean tensor of
+shape (puzzles, N, N, N), where candidates[p, x, y, v] tells whether the
+value v + 1 can still be put in the cell (x, y) of the puzzle p. Row, column
+and box elimination, naked singles and hidden singles are applied to every
+puzzle at once with array operations.
+
+"""
+import math
+
+import numpy as np
+
+
+def candidates_from_maps(sudoku_maps: np.ndarray) -> np.ndarray:
+    """
+    Build the candidates tensor of a batch of sudoku maps.
+
+    Parameters
+    ----------
+    sudoku_maps : np.ndarray
+        A (puzzles, N, N) array of sudoku maps, 0 standing for an empty cell.
+
+    Returns
+    -------
+    np.ndarray
+        A (puzzles, N, N, N) boolean tensor.
+    """
+    length = sudoku_maps.shape[-1]
+    values = np.arange(1, length + 1)
+    given = sudoku_maps[..., None] == values
+    return np.where((sudoku_maps > 0)[..., None], given, True)
+
+
+def maps_from_candidates(candidates: np.ndarray) -> np.ndarray:
+    """
+    Get the sudoku maps of the cells reduced to a single candidate.
+
+    Parameters
+    ----------
+    candidates : np.ndarray
+        A (puzzles, N, N, N) boolean tensor.
+
+    Returns
+    -------
+    np.ndarray
+        A (puzzles, N, N) array, 0 standing for a cell which isn't resolved.
+    """
+    single = candidates.sum(axis=-1) == 1
+    return np.where(single, candidates.argmax(axis=-1) + 1, 0)
+
+
+def _boxes(tensor: np.ndarray, size: int) -> np.ndarray:
+    """
+    View a (puzzles, N, N, ...) tensor as (puzzles, box row, row in box,
+    box column, column in box, ...).
+    """
+    shape = tensor.shape
+    return tensor.reshape(shape[:1] + (size, size, size, size) + shape[3:])
+
+
+def _unit_counts(tensor: np.ndarray, size: int) -> tuple:
+    """
+    Count the true entries of a (puzzles, N, N, N) tensor per row, column and
+    box, broadcastable back to the tensor shape.
+    """
+    rows = tensor.sum(axis=2, keepdims=True, dtype=np.uint8)
+    cols = tensor.sum(axis=1, keepdims=True, dtype=np.uint8)
+    boxes = _boxes(tensor, size).sum(axis=(2, 4), keepdims=True, dtype=np.uint8)
+    boxes = np.broadcast_to(boxes, _boxes(tensor, size).shape).reshape(tensor.shape)
+    return rows, cols, boxes
+
+
+def propagate(candidates: np.ndarray, max_rounds: int = None) -> np.ndarray:
+    """
+    Apply row, column and box elimination plus naked and hidden singles
+    until nothing changes in any puzzle.
+
+    Parameters
+    ----------
+    candidates : np.ndarray
+        A (puzzles, N, N, N) boolean tensor, reduced in place.
+    max_rounds : int
+        The maximum number of rounds, unlimited by default.
+
+    Returns
+    -------
+    np.ndarray
+        The reduced candidates.
+    """
+    size = math.isqrt(candidates.shape[-1])
+    active = np.arange(len(candidates))
+    rounds = 0
+    while active.size and (max_rounds is None or rounds < max_rounds):
+        rounds += 1
+        batch = candidates[active]
+        before = np.count_nonzero(batch, axis=(1, 2, 3))
+
+        # Naked singles: remove the value of every resolved cell from its units.
+        fixed = batch & (batch.sum(axis=-1, keepdims=True, dtype=np.uint8) == 1)
+        rows, cols, boxes = _unit_counts(fixed, size)
+        batch &= fixed | ((rows == 0) & (cols == 0) & (boxes == 0))
+
+        # Hidden singles: a value with a single place left in a unit goes there.
+        rows, cols, boxes = _unit_counts(batch, size)
+        hidden = batch & ((rows == 1) | (cols == 1) | (boxes == 1))
+        batch &= ~hidden.any(axis=-1, keepdims=True) | hidden
+
+        # Only the puzzles which changed are kept for the next round.
+        candidates[active] = batch
+        active = active[np.count_nonzero(batch, axis=(1, 2, 3)) != before]
+    return candidates
+
+
+def solved(candidates: np.ndarray) -> np.ndarray:
+    """
+    Tell which puzzles of a batch are completely and correctly resolved.
+
+    Parameters
+    ----------
+    candidates : np.ndarray
+        A (puzzles, N, N, N) boolean tensor.
+
+    Returns
+    -------
+    np.ndarray
+        A (puzzles,) boolean array.
+    """
+    size = math.isqrt(candidates.shape[-1])
+    rows, cols, boxes = _unit_counts(candidates, size)
+    return (
+        (candidates.sum(axis=-1) == 1).all(axis=(1, 2))
+        & (rows == 1).all(axis=(1, 2, 3))
+        & (cols == 1).all(axis=(1, 2, 3))
+        & (boxes == 1).all(axis=(1, 2, 3))
+    )
+
+
+def presolve_maps(sudoku_maps: np.ndarray) -> tuple:
+    """
+    Propagate the candidates of a batch of sudoku maps.
+
+    Parameters
+    ----------
+    sudoku_maps : np.ndarray
+        A (puzzles, N, N) array of sudoku maps.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The maps completed with the resolved cells, and which of them are
+        fully solved.
+    """
+    candidates = propagate(candidates_from_maps(sudoku_maps))
+    return maps_from_candidates(candidates), solved(candidates)
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""Sudoku solving entry point.
+
+This module map each algorithm type to the search which implements it, so
+that the GUI worker and the headless tools solve a sudoku the same way.
+
+"""
+import atexit
+import multiprocessing
+import queue
+import time
+import traceback
+from collections import deque
+
+import numpy as np
+
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchStatus,
+    SearchStatistics,
+    SearchBudget,
+)
+from sudoku_csp.csp import SudokuCSP, BitSudokuCSP
+from sudoku_csp.presolve import logical_presolve
+from sudoku_csp.parallel import parallel_search
+from sudoku_csp.algorithms import (
+    backtracking_search,
+    unorder_domain_values,
+    RandomDomainValues,
+    MinimumRemainingValues,
+    most_constrained_variable,
+    WeightedDegree,
+    least_constraining_value,
+    AC3,
+    AC2001,
+    bitmask_search,
+    forward_checking,
+    maintain_arc_consistency,
+    dancing_links_search,
+    maintain_all_different,
+    conflict_directed_backjumping,
+    propagate_all_different,
+)
+
+
+def _stopped(
+    statistics: SearchStatistics,
+    status: SearchStatus,
+    construction_time: float,
+    preprocessing_time: float,
+):
+    """
+    Record in the statistics, if given, a solve which ended before the
+    search, and return its None result.
+    """
+    if statistics is not None:
+        statistics.construction_time += construction_time
+        statistics.preprocessing_time += preprocessing_time
+        statistics.status = status
+    return None
+
+
+def solve(
+    sudoku_map: np.ndarray,
+    algorithm_type: AlgorithmType = AlgorithmType.BACKTRACKING,
+    verbose: bool = False,
+    presolve: bool = True,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
+    seed: int = None,
+):
+    """
+    Solve a sudoku using the choosen algorithm.
+
+    Unless it is disabled, the logical pre-solver reduces the domains before
+    the algorithm runs. When a SearchStatistics instance is given, the
+    counters of the search and the time spent in each phase are added to it,
+    and its status tells how the solve ended. When a SearchBudget is given,
+    it is started and the solve stops as soon as it is exceeded or
+    cancelled, the preprocessing included.
+
+    Parameters
+    ----------
+    sudoku_map : np.ndarray
+        A array containing the map of the sudoku.
+    algorithm_type : AlgorithmType
+        A type of algorithm to use to resolve the sudoku.
+    verbose : bool
+        Print the preprocessing information.
+    presolve : bool
+        Run the logical pre-solver first, except before the bitmask search
+        which propagates the singles itself.
+    statistics : SearchStatistics
+        Where the counters and the phase times are added, if given.
+    budget : SearchBudget
+        The limits of the search, if any.
+    seed : int
+        When given, the backtracking searches try the values of each variable
+        in a random order drawn from this seed, except with the least
+        constraining value heuristic. The bitmask and dancing links searches
+        ignore it.
+
+    Returns
+    -------
+    np.ndarray
+        The resolved map, or None if there isn't any solution or if the
+        budget stopped the search.
+    """
+    algorithm_type = AlgorithmType[algorithm_type.name]
+    if budget is not None:
+        budget.start()
+    if algorithm_type is AlgorithmType.PORTFOLIO:
+        return solve_portfolio(
+            sudoku_map,
+            verbose=verbose,
+            presolve=presolve,
+            statistics=statistics,
+            budget=budget,
+        )
+
+    order_domain_values = unorder_domain_values
+    if seed is not None:
+        order_domain_values = RandomDomainValues(seed)
+
+    start = time.perf_counter()
+    if algorithm_type is AlgorithmType.BITMASK:
+        # The bitmask search propagates the singles itself, and doesn't pay
+        # for building the generic CSP the logical rules work on.
+        csp = BitSudokuCSP(sudoku_map)
+        presolve = False
+    else:
+        csp = SudokuCSP(
+            sudoku_map, all_different=algorithm_type is AlgorithmType.ALL_DIFFERENT
+        )
+        if statistics is not None:
+            csp.count_checks()
+    construction_time = time.perf_counter() - start
+    if budget is not None and budget.exceeded():
+        return _stopped(statistics, budget.status, construction_time, 0.0)
+
+    start = time.perf_counter()
+    if presolve:
+        fired = logical_presolve(csp, budget=budget)
+        if verbose and fired:
+            print(
+                "Logical pre-solver: "
+                + ", ".join(f"{rule} x{count}" for rule, count in fired.items())
+                + "."
+            )
+        if statistics is not None:
+            statistics.pruned += sum(fired.values())
+        if not all(csp.domains.values()):
+            return _stopped(
+                statistics,
+                SearchStatus.EXHAUSTED,
+                construction_time,
+                time.perf_counter() - start,
+            )
+    preprocessing_time = time.perf_counter() - start
+
+    assignment = None
+    checks = csp.checks
+
+    start = time.perf_counter()
+    if algorithm_type in (AlgorithmType.AC3, AlgorithmType.AC2001):
+        values = sum(len(domain) for domain in csp.domains.values())
+        if algorithm_type is AlgorithmType.AC3:
+            csp, revisions = AC3(csp, budget)
+        else:
+            csp, revisions = AC2001(csp, budget)
+        if verbose:
+            print(f"{algorithm_type.value} done in {revisions} revisions.")
+        if statistics is not None:
+            statistics.checks += csp.checks - checks
+            statistics.pruned += values - sum(
+                len(domain) for domain in csp.domains.values()
+            )
+    elif algorithm_type is AlgorithmType.ALL_DIFFERENT:
+        values = sum(len(domain) for domain in csp.domains.values())
+        consistent = propagate_all_different(
+            csp, deque(csp.constraints), list(), budget
+        )
+        if statistics is not None:
+            statistics.checks += csp.checks - checks
+            statistics.pruned += values - sum(
+                len(domain) for domain in csp.domains.values()
+            )
+    preprocessing_time += time.perf_counter() - start
+    if budget is not None and budget.status is not None:
+        return _stopped(
+            statistics, budget.status, construction_time, preprocessing_time
+        )
+
+    start = time.perf_counter()
+
+    if algorithm_type is AlgorithmType.BACKTRACKING:
+        assignment = backtracking_search(
+            csp,
+            order_domain_values=order_domain_values,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.MRV:
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            order_domain_values=order_domain_values,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.DEGREE_H:
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=most_constrained_variable,
+            order_domain_values=order_domain_values,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.WDEG:
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=WeightedDegree(),
+            order_domain_values=order_domain_values,
+            inference=forward_checking,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.LEAST_CONSTRAINING_H:
+        assignment = backtracking_search(
+            csp,
+            order_domain_values=least_constraining_value,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type in (AlgorithmType.AC3, AlgorithmType.AC2001):
+        assignment = backtracking_search(
+            csp,
+            order_domain_values=order_domain_values,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.BITMASK:
+        assignment = bitmask_search(csp, statistics=statistics, budget=budget)
+    elif algorithm_type == AlgorithmType.FORWARD_CHECKING:
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            order_domain_values=order_domain_values,
+            inference=forward_checking,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.MAC:
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            order_domain_values=order_domain_values,
+            inference=maintain_arc_consistency,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.DANCING_LINKS:
+        assignment = dancing_links_search(csp, statistics=statistics, budget=budget)
+    elif algorithm_type == AlgorithmType.ALL_DIFFERENT:
+        if consistent:
+            assignment = backtracking_search(
+                csp,
+                select_unassigned_variable=MinimumRemainingValues(),
+                order_domain_values=order_domain_values,
+                inference=maintain_all_different,
+                statistics=statistics,
+                budget=budget,
+            )
+    elif algorithm_type == AlgorithmType.BACKJUMPING:
+        assignment = conflict_directed_backjumping(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            order_domain_values=order_domain_values,
+            statistics=statistics,
+            budget=budget,
+        )
+    elif algorithm_type == AlgorithmType.PARALLEL:
+        assignment = parallel_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            order_domain_values=order_domain_values,
+            inference=forward_checking,
+            statistics=statistics,
+            budget=budget,
+        )
+
+    if statistics is not None:
+        statistics.construction_time += construction_time
+        statistics.preprocessing_time += preprocessing_time
+        statistics.search_time += time.perf_counter() - start
+        if assignment is not None:
+            statistics.status = SearchStatus.SOLVED
+        elif budget is not None and budget.status is not None:
+            statistics.status = budget.status
+        else:
+            statistics.status = SearchStatus.EXHAUSTED
+
+    if assignment is None:
+        return None
+    return csp.get_resulted_map(assignment)
+
+
+# The strategies raced by the portfolio, as (algorithm type, seed) pairs.
+PORTFOLIO_STRATEGIES = (
+    (AlgorithmType.BITMASK, None),
+    (AlgorithmType.MRV, 1),
+    (AlgorithmType.AC3, 2),
+    (AlgorithmType.WDEG, 3),
+)
+
+
+def _portfolio_worker(tasks, results, stop):
+    """
+    Solve the strategies of the portfolio races until a None task comes.
+
+    Each task is solved with a SearchBudget whose cancellation flag is the
+    stop event shared by the pool, so that the losers of a race give up as
+    soon as it is set. The (race, index, result, statistics) outcome is put
+    in the results queue, with None statistics if the strategy failed.
+    """
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        race, index, sudoku_map, algorithm_type, seed, presolve, limits = task
+        budget = SearchBudget(*limits)
+        budget.cancelled = stop
+        statistics = SearchStatistics()
+        try:
+            result = solve(
+                sudoku_map,
+                algorithm_type,
+                presolve=presolve,
+                statistics=statistics,
+                budget=budget,
+                seed=seed,
+            )
+        except Exception:
+            print(traceback.format_exc())
+            results.put((race, index, None, None))
+        else:
+            results.put((race, index, result, statistics))
+
+
+class PortfolioPool:
+    """
+    The processes which race the portfolio strategies.
+
+    They are started once and wait for the strategies of each race, as
+    starting an interpreter per strategy costs much more than solving most
+    sudokus. When a race is over, the stop event cancels the budgets of the
+    strategies still running.
+    """
+
+    def __init__(self, processes: int):
+        """
+        Create a PortfolioPool instance and start its processes.
+
+        Parameters
+        ----------
+        processes : int
+            The number of worker processes, which is the number of strategies
+            raced at the same time.
+        """
+        context = multiprocessing.get_context("spawn")
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.stop = context.Event()
+        self.races = 0
+        self.processes = [
+            context.Process(
+                target=_portfolio_worker,
+                args=(self.tasks, self.results, self.stop),
+                daemon=True,
+            )
+            for _ in range(processes)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def alive(self) -> bool:
+        """
+        Tell whether all the worker processes are still running.
+
+        Returns
+        -------
+        bool
+        """
+        return all(process.is_alive() for process in self.processes)
+
+    def race(
+        self,
+        sudoku_map: np.ndarray,
+        strategies: tuple,
+        presolve: bool,
+        budget: SearchBudget = None,
+    ) -> tuple:
+        """
+        Race the strategies on a sudoku, until one of them either solves it
+        or proves that there isn't any solution.
+
+        The time and node limits of the budget apply to each strategy, and
+        the budget is polled for cancellation while waiting. The losers are
+        stopped, and their outcomes are collected before returning, so that
+        the next race starts with idle workers.
+
+        Parameters
+        ----------
+        sudoku_map : np.ndarray
+        strategies : tuple[tuple[AlgorithmType, int]]
+            The (algorithm type, seed) pairs to race, at most one per process.
+        presolve : bool
+        budget : SearchBudget
+
+        Returns
+        -------
+        tuple
+            The (index, result, statistics) outcome of the winning strategy,
+            or None, and the status of the race.
+        """
+        limits = (None, None)
+        if budget is not None:
+            limits = (budget.time_limit, budget.node_limit)
+        self.races += 1
+        self.stop.clear()
+        for index, (algorithm_type, seed) in enumerate(strategies):
+            self.tasks.put(
+                (self.races, index, sudoku_map, algorithm_type, seed, presolve, limits)
+            )
+
+        winner = None
+        pending = len(strategies)
+        status = SearchStatus.EXHAUSTED
+        while pending:
+            if budget is not None and not self.stop.is_set():
+                if budget.cancelled.is_set():
+                    status = SearchStatus.CANCELLED
+                    self.stop.set()
+                elif (
+                    budget.deadline is not None
+                    and time.perf_counter() > budget.deadline
+                ):
+                    status = SearchStatus.BUDGET_EXCEEDED
+                    self.stop.set()
+
+            try:
+                race, index, result, statistics = self.results.get(timeout=0.05)
+            except queue.Empty:
+                if not self.alive():
+                    raise RuntimeError("A portfolio process died during the race.")
+                continue
+            if race != self.races:
+                continue
+
+            pending -= 1
+            if statistics is None or winner is not None:
+                continue
+            if statistics.status in (SearchStatus.SOLVED, SearchStatus.EXHAUSTED):
+                winner = (index, result, statistics)
+                self.stop.set()
+            elif not self.stop.is_set():
+                status = statistics.status
+        return winner, status
+
+    def close(self):
+        """
+        Stop the worker processes.
+
+        Returns
+        -------
+        None
+        """
+        self.stop.set()
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+# The pool of the portfolio races, started by the first one.
+_portfolio_pool = None
+
+
+def portfolio_pool(processes: int) -> PortfolioPool:
+    """
+    Get the pool of the portfolio races, starting it, or starting a new one
+    when it is too small or one of its processes died.
+
+    Parameters
+    ----------
+    processes : int
+        The number of strategies to race at the same time.
+
+    Returns
+    -------
+    PortfolioPool
+    """
+    global _portfolio_pool
+    if _portfolio_pool is not None and (
+        len(_portfolio_pool.processes) < processes or not _portfolio_pool.alive()
+    ):
+        _portfolio_pool.close()
+        _portfolio_pool = None
+    if _portfolio_pool is None:
+        _portfolio_pool = PortfolioPool(processes)
+        atexit.register(_portfolio_pool.close)
+    return _portfolio_pool
+
+
+def solve_portfolio(
+    sudoku_map: np.ndarray,
+    strategies: tuple = PORTFOLIO_STRATEGIES,
+    verbose: bool = False,
+    presolve: bool = True,
+    statistics: SearchStatistics = None,
+    budget: SearchBudget = None,
+):
+    """
+    Race several strategies on the same sudoku, each in a process of the
+    portfolio pool.
+
+    The first strategy which either solves the sudoku or proves that there
+    isn't any solution wins, and the others are cancelled. The time and node
+    limits of the budget apply to each strategy, and the budget is polled
+    for cancellation while waiting.
+
+    Parameters
+    ----------
+    sudoku_map : np.ndarray
+        A array containing the map of the sudoku.
+    strategies : tuple[tuple[AlgorithmType, int]]
+        The (algorithm type, seed) pairs to race, see solve.
+    verbose : bool
+        Print the winning strategy.
+    presolve : bool
+        Run the logical pre-solver first.
+    statistics : SearchStatistics
+        Where the counters of the winning strategy are added, if given.
+    budget : SearchBudget
+        The limits of the race, if any.
+
+    Returns
+    -------
+    np.ndarray
+        The resolved map, or None if there isn't any solution or if no
+        strategy finished within the budget.
+    """
+    winner, status = portfolio_pool(len(strategies)).race(
+        sudoku_map, strategies, presolve, budget
+    )
+
+    if winner is None:
+        if budget is not None and status is not SearchStatus.EXHAUSTED:
+            budget.status = status
+        if statistics is not None:
+            statistics.status = status
+        return None
+
+    index, result, strategy_statistics = winner
+    algorithm_type, seed = strategies[index]
+    if verbose:
+        print(f"Portfolio won by {algorithm_type.value} (seed {seed}).")
+    if statistics is not None:
+        statistics.add(strategy_statistics)
+    return result
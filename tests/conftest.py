@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from sudoku_csp.batch import parse_puzzle  # noqa: E402
+
+
+@pytest.fixture
+def corpus():
+    """
+    Load the puzzles of a benchmark corpus.
+    """
+
+    def load(name: str) -> list:
+        path = os.path.join(ROOT_DIRECTORY, "benchmarks", "corpora", f"{name}.txt")
+        with open(path) as corpus_file:
+            return [parse_puzzle(line) for line in corpus_file if line.strip()]
+
+    return load
+
+
+@pytest.fixture
+def check_solution():
+    """
+    Check that a grid is solved and keeps the clues of its puzzle.
+    """
+
+    def check(puzzle: np.ndarray, grid: np.ndarray):
+        length = len(puzzle)
+        size = round(length ** 0.5)
+        values = set(range(1, length + 1))
+        assert grid is not None
+        assert np.all((puzzle == 0) | (grid == puzzle))
+        for i in range(length):
+            assert set(grid[i, :]) == values
+            assert set(grid[:, i]) == values
+            x, y = size * (i // size), size * (i % size)
+            assert set(grid[x : x + size, y : y + size].flatten()) == values
+
+    return check
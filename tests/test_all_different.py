@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import all_different_filter, propagate_all_different
+from sudoku_csp.csp import CSP, SudokuCSP
+from sudoku_csp.interfaces import AlgorithmType, AllDifferent
+from sudoku_csp.solver import solve
+
+
+def all_different_csp(domains: dict) -> tuple:
+    constraint = AllDifferent(frozenset(domains))
+    csp = CSP(
+        list(domains),
+        {var: set(domain) for var, domain in domains.items()},
+        [constraint],
+    )
+    return csp, constraint
+
+
+def test_filter_removes_the_values_of_a_hall_set():
+    csp, constraint = all_different_csp(
+        {"a": {1, 2}, "b": {1, 2}, "c": {1, 2, 3}, "d": {1, 2, 3, 4}}
+    )
+    removals = list()
+    consistent, revised = all_different_filter(csp, constraint, removals)
+    assert consistent
+    assert csp.domains == {"a": {1, 2}, "b": {1, 2}, "c": {3}, "d": {4}}
+    assert set(revised) == {"c", "d"}
+
+    csp.restore(removals)
+    assert csp.domains["d"] == {1, 2, 3, 4}
+
+
+def test_filter_keeps_the_values_of_alternating_cycles():
+    csp, constraint = all_different_csp({"a": {1, 2}, "b": {2, 3}, "c": {1, 3}})
+    consistent, revised = all_different_filter(csp, constraint, list())
+    assert consistent
+    assert not revised
+    assert csp.domains == {"a": {1, 2}, "b": {2, 3}, "c": {1, 3}}
+
+
+def test_filter_detects_a_missing_matching():
+    csp, constraint = all_different_csp({"a": {1, 2}, "b": {1, 2}, "c": {1, 2}})
+    consistent, _ = all_different_filter(csp, constraint, list())
+    assert not consistent
+
+
+def test_propagation_reaches_the_fixpoint(corpus):
+    puzzle = corpus("hard_9x9")[0]
+    csp = SudokuCSP(puzzle, all_different=True)
+    assert propagate_all_different(csp, deque(csp.constraints), list())
+    for constraint in csp.constraints:
+        _, revised = all_different_filter(csp, constraint, list())
+        assert not revised
+
+
+def test_propagation_fails_on_a_contradiction():
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, 0] = puzzle[0, 1] = 5
+    csp = SudokuCSP(puzzle, all_different=True)
+    assert not propagate_all_different(csp, deque(csp.constraints), list())
+
+
+@pytest.mark.parametrize("name", ["hard_9x9", "pathological_9x9"])
+def test_all_different_solves(corpus, check_solution, name):
+    for puzzle in corpus(name)[:3]:
+        check_solution(puzzle, solve(puzzle, AlgorithmType.ALL_DIFFERENT))
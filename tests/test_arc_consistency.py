@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+
+from sudoku_csp.algorithms import AC2001, AC3, propagate_arcs
+from sudoku_csp.csp import CSP, SudokuCSP, constraint_evalution
+from sudoku_csp.interfaces import Constraint
+
+
+def sum_is_not_three(values: tuple) -> bool:
+    return sum(values) != 3
+
+
+def sum_is_three(values: tuple) -> bool:
+    return sum(values) == 3
+
+
+def generic_sudoku(puzzle) -> CSP:
+    """
+    Build the CSP of a sudoku with generic binary constraints instead of
+    NotEqual ones, so that the revisions check the supports one by one.
+    """
+    template = SudokuCSP(puzzle)
+    constraints = [
+        Constraint(constraint.scope, constraint_evalution)
+        for constraint in template.constraints
+    ]
+    return CSP(
+        list(template.variables),
+        {var: set(domain) for var, domain in template.domains.items()},
+        constraints,
+    )
+
+
+def test_ac2001_reaches_the_ac3_fixpoint_with_fewer_checks(corpus):
+    for puzzle in corpus("hard_9x9")[:3]:
+        first, second = generic_sudoku(puzzle), generic_sudoku(puzzle)
+        first.count_checks()
+        second.count_checks()
+        _, ac3_revisions = AC3(first)
+        _, ac2001_revisions = AC2001(second)
+        assert first.domains == second.domains
+        assert sum(map(len, first.domains.values())) < 81 * 9
+        # The same arcs are revised, but the residual supports spare most of
+        # the support checks.
+        assert ac2001_revisions == ac3_revisions
+        assert second.checks < first.checks
+
+
+def test_ac3_on_not_equal_constraints_matches_the_generic_ones(corpus):
+    puzzle = corpus("hard_9x9")[0]
+    generic, csp = generic_sudoku(puzzle), SudokuCSP(puzzle)
+    AC3(generic)
+    AC3(csp)
+    assert generic.domains == csp.domains
+
+
+def test_a_shrunk_domain_requeues_the_other_constraints_of_the_arc():
+    first = Constraint(frozenset("xy"), sum_is_not_three)
+    second = Constraint(frozenset("xy"), sum_is_three)
+    csp = CSP(["x", "y"], {"x": {1, 2, 3}, "y": {2}}, [first, second])
+    # x loses 1 on the first constraint, which leaves y without support on
+    # the second one.
+    consistent, revisions = propagate_arcs(csp, deque([("x", "y", first)]), list())
+    assert not consistent
+    assert revisions == 2
+    assert csp.conflict is second
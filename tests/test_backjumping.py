@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import (
+    MinimumRemainingValues,
+    NogoodStore,
+    conflict_directed_backjumping,
+)
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchBudget,
+    SearchStatistics,
+    SearchStatus,
+)
+from sudoku_csp.solver import solve
+
+
+@pytest.mark.parametrize("name", ["hard_9x9", "pathological_9x9"])
+def test_backjumping_solves(corpus, check_solution, name):
+    for puzzle in corpus(name):
+        csp = SudokuCSP(puzzle)
+        assignment = conflict_directed_backjumping(
+            csp, select_unassigned_variable=MinimumRemainingValues()
+        )
+        check_solution(puzzle, csp.get_resulted_map(assignment))
+
+
+def test_backjumping_leaves_the_domains_as_they_were(corpus):
+    csp = SudokuCSP(corpus("hard_9x9")[0])
+    domains = {var: set(domain) for var, domain in csp.domains.items()}
+    conflict_directed_backjumping(
+        csp, select_unassigned_variable=MinimumRemainingValues()
+    )
+    assert csp.domains == domains
+
+
+def test_no_solution():
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, :8] = range(1, 9)
+    puzzle[1, 8] = 9
+    statistics = SearchStatistics()
+    assert solve(puzzle, AlgorithmType.BACKJUMPING, statistics=statistics) is None
+    assert statistics.status is SearchStatus.EXHAUSTED
+
+
+def test_budget_stops_the_search(corpus):
+    statistics = SearchStatistics()
+    budget = SearchBudget(node_limit=5)
+    puzzle = corpus("pathological_9x9")[0]
+    result = solve(
+        puzzle,
+        AlgorithmType.BACKJUMPING,
+        presolve=False,
+        statistics=statistics,
+        budget=budget,
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.BUDGET_EXCEEDED
+
+
+def test_nogood_store():
+    store = NogoodStore(limit=2)
+    first = frozenset({("a", 1), ("b", 2)})
+    second = frozenset({("a", 1), ("c", 3)})
+    store.add(first)
+    store.add(second)
+    assert store.violated({"a": 1}, "b", 2) == first
+    assert store.violated({"a": 2}, "b", 2) is None
+    assert store.violated({"a": 1}, "b", 3) is None
+
+    # The first nogood has just been used, so the second one is evicted.
+    store.add(frozenset({("d", 4)}))
+    assert len(store) == 2
+    assert store.violated({"a": 1}, "c", 3) is None
+    assert store.violated({"b": 2}, "a", 1) == first
+    assert ("c", 3) not in store.index
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+from sudoku_csp.algorithms import (
+    BacktrackingSearch,
+    MinimumRemainingValues,
+    forward_checking,
+    minimum_remaining_value,
+    recursive_backtracking,
+)
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import AlgorithmType, SearchBudget, SearchStatus
+from sudoku_csp.solver import solve
+
+
+def new_search(puzzle, budget: SearchBudget = None) -> BacktrackingSearch:
+    return BacktrackingSearch(
+        SudokuCSP(puzzle),
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+        budget=budget,
+    )
+
+
+def test_paused_search_reaches_the_same_solution(corpus):
+    puzzle = corpus("pathological_9x9")[0]
+    search = new_search(puzzle)
+    expected = search.run()
+    nodes = search.nodes
+
+    search = new_search(puzzle)
+    pauses = 0
+    while search.step(max_nodes=50) is SearchStatus.RUNNING:
+        pauses += 1
+        assert search.nodes == 50 * pauses
+    assert pauses > 1
+    assert search.status is SearchStatus.SOLVED
+    assert search.solution == expected
+    assert search.nodes == nodes
+
+
+def test_pickled_search_resumes(corpus):
+    puzzle = corpus("pathological_9x9")[0]
+    search = new_search(puzzle)
+    expected = search.run()
+
+    search = new_search(puzzle, SearchBudget(node_limit=10 ** 6))
+    assert search.step(max_nodes=100) is SearchStatus.RUNNING
+    assert search.step(max_nodes=100) is SearchStatus.RUNNING
+    search = pickle.loads(pickle.dumps(search))
+    assert search.nodes == 200
+    # The selector sets are rebuilt by the copy, so ties may be broken in
+    # another order, but the solution is unique.
+    assert search.step() is SearchStatus.SOLVED
+    assert search.solution == expected
+
+    # The copy of the budget gets an event of its own.
+    search.budget.cancel()
+    assert search.budget.cancelled.is_set()
+
+
+def test_budget_pause_resumes_after_pickling(corpus):
+    puzzle = corpus("pathological_9x9")[0]
+    expected = new_search(puzzle).run()
+
+    budget = SearchBudget()
+    budget.cancel()
+    search = new_search(puzzle, budget)
+    assert search.step() is SearchStatus.CANCELLED
+    search = pickle.loads(pickle.dumps(search))
+    assert search.budget.cancelled.is_set()
+    assert search.step() is SearchStatus.CANCELLED
+
+    search.budget.cancelled.clear()
+    assert search.step() is SearchStatus.SOLVED
+    assert search.solution == expected
+
+
+def test_recursive_backtracking_matches_the_explicit_stack(corpus, check_solution):
+    for puzzle in corpus("easy_9x9")[:3]:
+        csp = SudokuCSP(puzzle)
+        assignment = recursive_backtracking(
+            csp.apply_constraints(),
+            csp,
+            select_unassigned_variable=minimum_remaining_value,
+            inference=forward_checking,
+        )
+        check_solution(puzzle, csp.get_resulted_map(assignment))
+        assert assignment == new_search(puzzle).run()
+
+
+def test_degree_heuristic(corpus, check_solution):
+    for puzzle in corpus("easy_9x9")[:3]:
+        check_solution(puzzle, solve(puzzle, AlgorithmType.DEGREE_H))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from sudoku_csp.batch import (
+    ERROR_PREFIX,
+    format_puzzle,
+    main,
+    parse_puzzle,
+    solve_batch,
+    solve_line,
+    solve_lines,
+)
+from sudoku_csp.interfaces import AlgorithmType
+
+# The top right cell can only hold a 9, which its column already has.
+NO_SOLUTION = "123456780" + "000000009" + "0" * 63
+
+
+def test_puzzle_formats(corpus):
+    puzzle = corpus("hard_9x9")[0]
+    line = format_puzzle(puzzle)
+    assert np.array_equal(parse_puzzle(line), puzzle)
+    assert np.array_equal(parse_puzzle(line.replace("0", ".")), puzzle)
+    for separator in (",", " "):
+        assert np.array_equal(parse_puzzle(format_puzzle(puzzle, separator)), puzzle)
+
+    puzzle = corpus("medium_16x16")[0]
+    line = format_puzzle(puzzle)
+    assert len(line) == 256
+    assert "G" in line
+    assert np.array_equal(parse_puzzle(line), puzzle)
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ("12345678x" + "0" * 72, "Unknown symbols 'x'"),
+        ("0" * 80, "A puzzle of 80 cells"),
+        ("0" * 36, "A puzzle of 36 cells"),
+        ("A" + "0" * 80, "only holds values up to 9"),
+    ],
+)
+def test_invalid_lines(line, message):
+    with pytest.raises(ValueError, match=message):
+        parse_puzzle(line)
+    result = solve_line(line, AlgorithmType.BITMASK)
+    assert result.startswith(ERROR_PREFIX)
+    assert message in result
+
+
+def test_solved_lines_keep_their_format(corpus, check_solution):
+    puzzle = corpus("hard_9x9")[0]
+    for separator in ("", ",", " "):
+        result = solve_line(format_puzzle(puzzle, separator), AlgorithmType.BITMASK)
+        assert (separator in result) if separator else result.isdigit()
+        check_solution(puzzle, parse_puzzle(result))
+    assert solve_line(NO_SOLUTION, AlgorithmType.BITMASK) == ""
+
+
+def batch_lines(corpus) -> list:
+    lines = [format_puzzle(puzzle) for puzzle in corpus("hard_9x9")]
+    lines.insert(3, "not-a-sudoku")
+    lines.insert(5, NO_SOLUTION)
+    lines.insert(7, format_puzzle(corpus("medium_16x16")[0], ","))
+    return lines
+
+
+@pytest.mark.parametrize("propagation", [False, True])
+def test_solve_lines_reports_each_line(corpus, check_solution, propagation):
+    lines = batch_lines(corpus)
+    results = solve_lines(lines, AlgorithmType.BITMASK, propagation=propagation)
+    assert len(results) == len(lines)
+    assert results[3].startswith(ERROR_PREFIX + "Unknown symbols")
+    assert results[5] == ""
+    for line, result in zip(lines, results):
+        if line not in ("not-a-sudoku", NO_SOLUTION):
+            check_solution(parse_puzzle(line), parse_puzzle(result))
+            assert ("," in result) == ("," in line)
+
+
+def test_batch_keeps_the_input_order(corpus):
+    lines = batch_lines(corpus)
+    expected = solve_lines(lines, AlgorithmType.BITMASK, propagation=False)
+    # Small chunks and few of them in flight, with empty lines to skip.
+    results = solve_batch(
+        [line + "\n" for line in lines] + ["\n", "  \n"],
+        AlgorithmType.BITMASK,
+        processes=2,
+        chunk_size=2,
+        max_pending_chunks=2,
+    )
+    assert list(results) == expected
+
+
+def test_main(corpus, check_solution, tmp_path):
+    lines = batch_lines(corpus)
+    input_path, output_path = tmp_path / "puzzles.txt", tmp_path / "solutions.txt"
+    input_path.write_text("\n".join(lines) + "\n")
+    main([str(input_path), "-o", str(output_path), "-j", "1", "-c", "4"])
+    results = output_path.read_text().splitlines()
+    assert results == solve_lines(lines, AlgorithmType.BITMASK)
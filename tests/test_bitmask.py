@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from sudoku_csp.algorithms import bitmask_search
+from sudoku_csp.csp import BitSudokuCSP
+from sudoku_csp.interfaces import SearchBudget, SearchStatistics, SearchStatus
+
+
+def solved_grid(corpus) -> np.ndarray:
+    puzzle = corpus("hard_9x9")[0]
+    csp = BitSudokuCSP(puzzle)
+    return csp.get_resulted_map(bitmask_search(csp))
+
+
+def test_masks_follow_the_cells():
+    csp = BitSudokuCSP(np.zeros((9, 9), dtype=int))
+    assert csp.candidates(40) == csp.full_mask == 0b111111111
+    csp.assign(0, 5)
+    assert csp.rows[0] == csp.cols[0] == csp.boxes[0] == 1 << 4
+    assert csp.candidates(8) == csp.candidates(72) == csp.candidates(20) == 0b111101111
+    assert csp.candidates(40) == csp.full_mask
+    assert csp.unit_mask(9) == csp.cols[0]
+    csp.unassign(0)
+    assert csp.rows[0] == csp.cols[0] == csp.boxes[0] == 0
+    assert csp.assignment() == dict()
+
+
+def test_naked_singles(corpus):
+    grid = solved_grid(corpus)
+    # Each cell of an empty row has a single candidate left by its column.
+    puzzle = grid.copy()
+    puzzle[4, :] = 0
+    csp = BitSudokuCSP(puzzle)
+    assert all(bin(csp.candidates(36 + col)).count("1") == 1 for col in range(9))
+    statistics = SearchStatistics()
+    result = csp.get_resulted_map(bitmask_search(csp, statistics))
+    assert np.array_equal(result, grid)
+    assert statistics.nodes == 0
+
+
+def test_hidden_singles(corpus):
+    grid = solved_grid(corpus)
+    # All the 1s but the one of the first row, which fits a single cell of
+    # the row although that cell has other candidates.
+    puzzle = np.where(grid == 1, 1, 0)
+    col = list(grid[0]).index(1)
+    puzzle[0, col] = 0
+    csp = BitSudokuCSP(puzzle)
+    assert bin(csp.candidates(col)).count("1") > 1
+
+    # The search stops at its first node, after the propagation of the root.
+    budget = SearchBudget(node_limit=0)
+    assert bitmask_search(csp, budget=budget) is None
+    assert budget.status is SearchStatus.BUDGET_EXCEEDED
+    assert csp.cells[col] == 1
+
+
+def test_value_without_a_cell():
+    # The 1 of the top left box has nowhere to go.
+    puzzle = np.zeros((4, 4), dtype=int)
+    puzzle[0, 2] = puzzle[2, 0] = 1
+    puzzle[1, 1] = 2
+    csp = BitSudokuCSP(puzzle)
+    statistics = SearchStatistics()
+    assert bitmask_search(csp, statistics) is None
+    assert statistics.nodes == 0
+    # The cells filled by the propagation are emptied.
+    assert csp.assignment() == {2: 1, 5: 2, 8: 1}
+
+
+def test_invalid_clues():
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, 0] = puzzle[0, 8] = 3
+    csp = BitSudokuCSP(puzzle)
+    assert not csp.valid
+    assert bitmask_search(csp) is None
+
+
+def test_bitmask_search_solves(corpus, check_solution):
+    for name in ("hard_9x9", "pathological_9x9", "medium_16x16"):
+        for puzzle in corpus(name):
+            csp = BitSudokuCSP(puzzle)
+            check_solution(puzzle, csp.get_resulted_map(bitmask_search(csp)))
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import pickle
+import threading
+import time
+
+import pytest
+
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchBudget,
+    SearchStatistics,
+    SearchStatus,
+)
+from sudoku_csp.solver import solve
+
+# Plain backtracking takes minutes on the second pathological grid.
+SLOW = AlgorithmType.BACKTRACKING
+
+
+def test_node_limit():
+    budget = SearchBudget(node_limit=3)
+    assert all(budget.spend_node() for _ in range(3))
+    assert budget.status is None
+    assert not budget.spend_node()
+    assert budget.status is SearchStatus.BUDGET_EXCEEDED
+    assert budget.exceeded()
+
+    # A new solve starts from zero.
+    budget.start()
+    assert budget.nodes == 0
+    assert budget.status is None
+    assert budget.spend_node()
+
+
+def test_time_limit(monkeypatch):
+    budget = SearchBudget(time_limit=10)
+    assert not budget.exceeded()
+    now = time.perf_counter()
+    monkeypatch.setattr(time, "perf_counter", lambda: now + 11)
+    assert budget.exceeded()
+    assert budget.status is SearchStatus.BUDGET_EXCEEDED
+
+    # The deadline is set again from the new start.
+    budget.start()
+    assert not budget.exceeded()
+
+
+def test_cancel_wins_and_lasts():
+    budget = SearchBudget(node_limit=0)
+    budget.cancel()
+    assert not budget.spend_node()
+    assert budget.status is SearchStatus.CANCELLED
+    budget.start()
+    assert budget.exceeded()
+    assert budget.status is SearchStatus.CANCELLED
+
+
+def test_unlimited_budget():
+    budget = SearchBudget()
+    assert budget.deadline is None
+    assert all(budget.spend_node() for _ in range(1000))
+    assert budget.status is None
+
+
+def test_pickled_budget():
+    budget = SearchBudget(time_limit=5, node_limit=10)
+    budget.spend_node()
+    copy = pickle.loads(pickle.dumps(budget))
+    assert (copy.time_limit, copy.node_limit, copy.nodes) == (5, 10, 1)
+    assert copy.deadline == budget.deadline
+    assert not copy.cancelled.is_set()
+    budget.cancel()
+    assert not copy.cancelled.is_set()
+    assert pickle.loads(pickle.dumps(budget)).cancelled.is_set()
+
+
+@pytest.mark.parametrize(
+    "algorithm_type",
+    [SLOW, AlgorithmType.FORWARD_CHECKING, AlgorithmType.BACKJUMPING],
+)
+def test_solve_stops_at_the_node_limit(corpus, algorithm_type):
+    statistics = SearchStatistics()
+    budget = SearchBudget(node_limit=100)
+    result = solve(
+        corpus("pathological_9x9")[1],
+        algorithm_type,
+        presolve=False,
+        statistics=statistics,
+        budget=budget,
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.BUDGET_EXCEEDED
+    assert statistics.nodes <= 100
+
+
+def test_solve_stops_at_the_time_limit(corpus):
+    statistics = SearchStatistics()
+    start = time.perf_counter()
+    result = solve(
+        corpus("pathological_9x9")[1],
+        SLOW,
+        presolve=False,
+        statistics=statistics,
+        budget=SearchBudget(time_limit=0.2),
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.BUDGET_EXCEEDED
+    assert time.perf_counter() - start < 2
+
+
+def test_solve_is_cancelled_from_another_thread(corpus, check_solution):
+    budget = SearchBudget()
+    statistics = SearchStatistics()
+    threading.Timer(0.2, budget.cancel).start()
+    start = time.perf_counter()
+    result = solve(
+        corpus("pathological_9x9")[1],
+        SLOW,
+        presolve=False,
+        statistics=statistics,
+        budget=budget,
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.CANCELLED
+    assert time.perf_counter() - start < 2
+
+    # A budget within its limits doesn't change the result.
+    puzzle = corpus("hard_9x9")[0]
+    budget = SearchBudget(time_limit=60, node_limit=10 ** 6)
+    check_solution(puzzle, solve(puzzle, AlgorithmType.MRV, budget=budget))
+    assert budget.status is None
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import (
+    AC3,
+    AC2001,
+    backtracking_search,
+    forward_checking,
+    revise,
+)
+from sudoku_csp.csp import CSP, SudokuCSP
+from sudoku_csp.interfaces import AllDifferent, Constraint, NotEqual, all_distinct
+
+HASHES = """
+from sudoku_csp.interfaces import AllDifferent, Constraint, NotEqual, all_distinct
+print(hash(Constraint(frozenset(("a", "b")), all_distinct)))
+print(hash(AllDifferent(frozenset("abc"))))
+print(hash(NotEqual("a", "b")))
+"""
+
+
+def sum_is_nine(values: tuple) -> bool:
+    return sum(values) == 9
+
+
+def generic_csp(csp: SudokuCSP) -> CSP:
+    """
+    Copy a sudoku CSP, with generic constraints in place of its NotEqual ones.
+    """
+    return CSP(
+        list(csp.variables),
+        {var: set(domain) for var, domain in csp.domains.items()},
+        [Constraint(con.scope, all_distinct) for con in csp.constraints],
+    )
+
+
+def constraints() -> list:
+    return [
+        Constraint(frozenset("abc"), sum_is_nine),
+        AllDifferent(frozenset("abc")),
+        NotEqual("a", "b"),
+    ]
+
+
+def test_constraints_are_slotted():
+    for constraint in constraints():
+        assert not hasattr(constraint, "__dict__")
+        with pytest.raises(AttributeError):
+            constraint.weight = 1
+
+
+@pytest.mark.parametrize("constraint", constraints(), ids=type)
+def test_pickled_constraint(constraint):
+    CSP(sorted(constraint.scope), {var: {1, 2} for var in "abc"}, [constraint])
+    copy = pickle.loads(pickle.dumps(constraint))
+    assert type(copy) is type(constraint)
+    assert copy == constraint
+    assert hash(copy) == hash(constraint)
+    assert copy.id == constraint.id == 0
+    assert copy.satisfied({"a": 1, "b": 2, "c": 6}) == constraint.satisfied(
+        {"a": 1, "b": 2, "c": 6}
+    )
+    # The copy can be found in the sets of the original constraints.
+    assert copy in {constraint}
+
+
+def test_pickled_not_equal_keeps_its_variables():
+    copy = pickle.loads(pickle.dumps(NotEqual("a", "b")))
+    assert (copy.first, copy.second) == ("a", "b")
+    assert copy.other("a") == "b"
+
+
+def test_hash():
+    first, second = NotEqual("a", "b"), NotEqual("b", "a")
+    assert first == second
+    assert hash(first) == hash(second)
+    # The hash only depends on the scope and on the name of the function.
+    assert hash(first) == hash(Constraint(frozenset("ab"), all_distinct))
+    assert hash(first) != hash(Constraint(frozenset("ab"), sum_is_nine))
+
+
+def test_hash_is_stable_across_processes():
+    environment = dict(os.environ, PYTHONHASHSEED="0")
+    runs = [
+        subprocess.run(
+            [sys.executable, "-c", HASHES],
+            cwd=Path(__file__).parents[1],
+            env=environment,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        for _ in range(2)
+    ]
+    assert len(runs[0].split()) == 3
+    assert runs[0] == runs[1]
+
+
+def test_not_equal_matches_the_generic_constraint():
+    fast, generic = NotEqual("a", "b"), Constraint(frozenset("ab"), all_distinct)
+    assert fast.not_equal and not generic.not_equal
+    for a in range(1, 4):
+        for b in range(1, 4):
+            assignment = {"a": a, "b": b}
+            assert fast.satisfied(assignment) == generic.satisfied(assignment)
+            for var, other in (("a", "b"), ("b", "a")):
+                partial = {other: assignment[other]}
+                assert fast.satisfied_with(
+                    partial, var, assignment[var]
+                ) == generic.satisfied_with(partial, var, assignment[var])
+
+
+def test_not_equal_revision_matches_the_generic_one():
+    csp = CSP(["a", "b"], {}, [NotEqual("a", "b")])
+    generic = Constraint(frozenset("ab"), all_distinct)
+    for domain in ({1}, {1, 2}, {2, 3}):
+        for other_domain in ({1}, {2}, {1, 2}):
+            results = list()
+            for constraint in (csp.constraints[0], generic):
+                csp.domains = {"a": set(domain), "b": set(other_domain)}
+                removals = list()
+                revised = revise(csp, "a", "b", constraint, removals)
+                results.append((revised, csp.domains["a"], removals))
+            assert results[0] == results[1]
+
+
+def test_not_equal_propagation_matches_the_generic_one(corpus):
+    for puzzle in corpus("hard_9x9")[:3]:
+        for propagation in (AC3, AC2001):
+            csp = SudokuCSP(puzzle)
+            generic = generic_csp(csp)
+            propagation(csp)
+            propagation(generic)
+            assert csp.domains == generic.domains
+
+        csp = SudokuCSP(puzzle)
+        generic = generic_csp(csp)
+        csp.count_checks()
+        generic.count_checks()
+        solution = backtracking_search(csp, inference=forward_checking)
+        assert solution == backtracking_search(generic, inference=forward_checking)
+        # The fast path counts a single check per neighbour, instead of one
+        # per value of its domain.
+        assert 0 < csp.checks < generic.checks
+        assert np.all(csp.get_resulted_map(solution) > 0)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import random
+
+import numpy as np
+
+from sudoku_csp.csp import CSP, SudokuCSP, sudoku_template
+from sudoku_csp.interfaces import Constraint, NotEqual
+
+
+def sum_is_nine(values: tuple) -> bool:
+    return sum(values) == 9
+
+
+def random_assignment(csp: CSP, rng: random.Random) -> dict:
+    """
+    Draw a consistent partial assignment by giving random values to the
+    variables in a random order, skipping the values which conflict.
+    """
+    assignment = dict()
+    for var in rng.sample(csp.variables, len(csp.variables) // 2):
+        values = list(csp.domains[var])
+        rng.shuffle(values)
+        for value in values:
+            if csp.consistent(assignment | {var: value}):
+                assignment[var] = value
+                break
+    return assignment
+
+
+def test_consistent_value_matches_a_full_check(corpus):
+    rng = random.Random(0)
+    for all_different in (False, True):
+        csp = SudokuCSP(corpus("hard_9x9")[0], all_different=all_different)
+        for _ in range(5):
+            assignment = random_assignment(csp, rng)
+            for var in csp.variables:
+                if var in assignment:
+                    continue
+                for value in range(1, 10):
+                    assert csp.consistent_value(
+                        assignment, var, value
+                    ) == csp.consistent(assignment | {var: value})
+
+
+def test_consistent_value_only_checks_the_constraints_of_the_variable():
+    csp = SudokuCSP(np.zeros((9, 9), dtype=int))
+    csp.count_checks()
+    assignment = {"0, 0": 1, "8, 8": 1, "4, 4": 5}
+    assert csp.consistent_value(assignment, "0, 8", 2)
+    # Only the assigned neighbours of the variable are compared.
+    assert csp.checks == 2
+
+    assert not csp.consistent_value(assignment, "0, 8", 1)
+    assert csp.conflict.scope in (
+        frozenset(("0, 8", "0, 0")),
+        frozenset(("0, 8", "8, 8")),
+    )
+    assert not csp.consistent_value(assignment, "4, 0", 5)
+    assert csp.conflict.scope == frozenset(("4, 0", "4, 4"))
+
+
+def test_consistent_value_waits_for_the_whole_scope():
+    variables = ["a", "b", "c"]
+    sum_constraint = Constraint(frozenset(variables), sum_is_nine)
+    csp = CSP(
+        variables,
+        {var: set(range(1, 6)) for var in variables},
+        [sum_constraint, NotEqual("a", "b")],
+    )
+    assert csp.consistent_value({"a": 1}, "b", 1) is False
+    assert csp.consistent_value({"a": 1}, "b", 2)
+    assert csp.consistent_value({"a": 1, "b": 2}, "c", 6)
+    assert not csp.consistent_value({"a": 1, "b": 2}, "c", 5)
+    assert csp.conflict is sum_constraint
+
+
+def test_sudoku_template_is_shared(corpus):
+    first, second = corpus("hard_9x9")[:2]
+    csp, other = SudokuCSP(first), SudokuCSP(second)
+    template = sudoku_template(9, False)
+    variables, constraints, var_to_const, neighbours = template[:4]
+    assert sudoku_template(9, False) is template
+    # The constraints and their graph are built once per grid size...
+    assert len(constraints) == 81 * 20 // 2
+    assert [con.id for con in constraints] == list(range(len(constraints)))
+    for instance in (csp, other):
+        assert all(a is b for a, b in zip(instance.constraints, constraints))
+        assert instance.var_to_const["4, 4"] is var_to_const["4, 4"]
+        assert instance.neighbours["4, 4"] is neighbours["4, 4"]
+    assert len(neighbours["4, 4"]) == 20
+    # ...but each instance has its own lists, dictionaries and domains.
+    assert csp.constraints is not other.constraints
+    assert csp.variables is not variables
+    assert csp.var_to_const is not other.var_to_const
+    other.domains["0, 0"].clear()
+    assert csp.domains["0, 0"]
+
+    # Each size and each kind of constraints has its own template.
+    assert len(SudokuCSP(np.zeros((4, 4), dtype=int)).constraints) == 16 * 7 // 2
+    units = SudokuCSP(first, all_different=True).constraints
+    assert len(units) == 27
+    assert all(a is b for a, b in zip(units, sudoku_template(9, True)[1]))
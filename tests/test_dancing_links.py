@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import (
+    count_solutions,
+    dancing_links_search,
+    dancing_links_solutions,
+)
+from sudoku_csp.csp import BitSudokuCSP, SudokuCSP
+from sudoku_csp.interfaces import SearchBudget, SearchStatistics, SearchStatus
+
+
+@pytest.mark.parametrize(
+    "name", ["easy_9x9", "hard_9x9", "pathological_9x9", "medium_16x16"]
+)
+def test_dancing_links_solves(corpus, check_solution, name):
+    for puzzle in corpus(name)[:3]:
+        csp = SudokuCSP(puzzle)
+        check_solution(puzzle, csp.get_resulted_map(dancing_links_search(csp)))
+
+
+def test_solutions_are_distinct_and_complete(check_solution):
+    puzzle = np.zeros((4, 4), dtype=int)
+    csp = SudokuCSP(puzzle)
+    solutions = list()
+    for assignment in dancing_links_solutions(csp):
+        grid = csp.get_resulted_map(assignment)
+        check_solution(puzzle, grid)
+        solutions.append(grid.tobytes())
+    assert len(solutions) == len(set(solutions)) == 288
+
+
+def test_no_solution():
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, :8] = range(1, 9)
+    puzzle[1, 8] = 9
+    assert dancing_links_search(SudokuCSP(puzzle)) is None
+
+
+def test_count_solutions(corpus):
+    puzzles = corpus("pathological_9x9")
+    assert count_solutions(BitSudokuCSP(puzzles[0]), limit=2) == 1
+    assert count_solutions(BitSudokuCSP(puzzles[3]), limit=2) == 2
+    assert count_solutions(BitSudokuCSP(np.zeros((4, 4), dtype=int))) == 288
+
+
+def test_budget_stops_the_enumeration():
+    csp = SudokuCSP(np.zeros((9, 9), dtype=int))
+    budget = SearchBudget(node_limit=10)
+    statistics = SearchStatistics()
+    solutions = list(dancing_links_solutions(csp, statistics, budget))
+    assert budget.status is SearchStatus.BUDGET_EXCEEDED
+    assert solutions == list()
+    assert statistics.nodes <= 11
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import random
+
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import count_solutions
+from sudoku_csp.csp import BitSudokuCSP
+from sudoku_csp.generator import Generator, SudokuDifficulty
+from sudoku_csp.interfaces import SearchBudget
+
+
+@pytest.mark.parametrize("difficulty", list(SudokuDifficulty))
+def test_generated_puzzles_have_a_unique_solution(difficulty):
+    random.seed(0)
+    for _ in range(10):
+        puzzle = Generator.generate_backtracking(3, difficulty)
+        assert puzzle.shape == (9, 9)
+        assert count_solutions(BitSudokuCSP(puzzle)) == 1
+
+
+def test_generated_16x16_puzzle_has_a_unique_solution():
+    random.seed(0)
+    puzzle = Generator.generate_backtracking(4, SudokuDifficulty.EASY)
+    assert (puzzle == 0).sum() == 128
+    assert count_solutions(BitSudokuCSP(puzzle), limit=2) == 1
+
+
+def test_generated_solution_is_solved(check_solution):
+    random.seed(0)
+    grid = Generator.generate_solution(3)
+    check_solution(np.zeros((9, 9), dtype=int), grid)
+
+
+def test_cancelled_generation():
+    budget = SearchBudget()
+    budget.cancel()
+    assert Generator.generate_backtracking(3, budget=budget) is None
+
+
+def test_generation_gives_up(monkeypatch):
+    monkeypatch.setattr(Generator, "fillings", 0)
+    with pytest.raises(RuntimeError):
+        Generator.generate_solution(3)
+
+
+def test_forced():
+    random.seed(0)
+    grid = Generator.generate_solution(3)
+    csp = BitSudokuCSP(grid)
+    # The other clues of a solved grid leave a single candidate.
+    csp.unassign(40)
+    assert csp.forced(40, grid[4, 4])
+
+    # Without its 1, the first row can only put it back in the same cell,
+    # which has other candidates.
+    puzzle = np.where(grid == 1, 1, 0)
+    col = list(grid[0]).index(1)
+    puzzle[0, col] = 0
+    csp = BitSudokuCSP(puzzle)
+    assert bin(csp.candidates(col)).count("1") > 1
+    assert csp.forced(col, 1)
+    assert not csp.forced(col, 2)
+    assert not BitSudokuCSP(np.zeros((9, 9), dtype=int)).forced(40, 1)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import (
+    MinimumRemainingValues,
+    backtracking_search,
+    forward_checking,
+    maintain_arc_consistency,
+)
+from sudoku_csp.csp import CSP, SudokuCSP
+from sudoku_csp.interfaces import Constraint, NotEqual
+
+
+def sum_is_nine(values: tuple) -> bool:
+    return sum(values) == 9
+
+
+def snapshot(csp: CSP) -> dict:
+    return {var: set(domain) for var, domain in csp.domains.items()}
+
+
+def test_forward_checking_prunes_the_neighbours():
+    csp = SudokuCSP(np.zeros((9, 9), dtype=int))
+    domains = snapshot(csp)
+    var, value = "4, 4", 5
+    removals = list()
+    assert forward_checking(csp, var, value, {var: value}, removals)
+    assert len(removals) == 20
+    assert set(removals) == {(other, value) for other in csp.neighbours[var]}
+    assert all(value not in csp.domains[other] for other in csp.neighbours[var])
+
+    csp.restore(removals)
+    assert csp.domains == domains
+    assert removals == []
+
+
+def test_forward_checking_reports_a_wipe_out():
+    puzzle = np.zeros((4, 4), dtype=int)
+    csp = SudokuCSP(puzzle)
+    csp.domains["0, 1"] = {1}
+    removals = list()
+    assert not forward_checking(csp, "0, 0", 1, {"0, 0": 1}, removals)
+    assert csp.conflict.scope == frozenset(("0, 0", "0, 1"))
+    csp.restore(removals)
+    assert csp.domains["0, 1"] == {1}
+
+
+def test_forward_checking_waits_for_the_other_variables():
+    variables = ["a", "b", "c"]
+    csp = CSP(
+        variables,
+        {var: set(range(1, 6)) for var in variables},
+        [Constraint(frozenset(variables), sum_is_nine), NotEqual("a", "b")],
+    )
+    removals = list()
+    assert forward_checking(csp, "a", 2, {"a": 2}, removals)
+    assert removals == [("b", 2)]
+    assert forward_checking(csp, "b", 3, {"a": 2, "b": 3}, removals)
+    assert csp.domains["c"] == {4}
+    csp.restore(removals)
+    assert all(domain == set(range(1, 6)) for domain in csp.domains.values())
+
+
+def test_arc_consistency_prunes_more_than_forward_checking(corpus):
+    csp = SudokuCSP(corpus("hard_9x9")[0])
+    domains = snapshot(csp)
+    var = next(var for var in csp.variables if len(csp.domains[var]) > 1)
+    for value in sorted(domains[var]):
+        checked, maintained = list(), list()
+        forward_consistent = forward_checking(csp, var, value, {var: value}, checked)
+        csp.restore(checked)
+        consistent = maintain_arc_consistency(csp, var, value, {var: value}, maintained)
+        # MAC also reduces the domain of the variable itself.
+        assert set(checked) <= set(maintained)
+        assert consistent <= forward_consistent
+        csp.restore(maintained)
+        assert csp.domains == domains
+
+
+@pytest.mark.parametrize("inference", [forward_checking, maintain_arc_consistency])
+def test_search_restores_the_domains(corpus, check_solution, inference):
+    for puzzle in corpus("hard_9x9")[:3] + corpus("pathological_9x9")[:2]:
+        csp = SudokuCSP(puzzle)
+        domains = snapshot(csp)
+        assignment = backtracking_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            inference=inference,
+        )
+        check_solution(puzzle, csp.get_resulted_map(assignment))
+        assert csp.domains == domains
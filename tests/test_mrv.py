@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from sudoku_csp.algorithms import (
+    BacktrackingSearch,
+    MinimumRemainingValues,
+    backtracking_search,
+    forward_checking,
+    no_inference,
+)
+from sudoku_csp.csp import CSP, SudokuCSP
+from sudoku_csp.interfaces import Constraint, NotEqual, SearchStatus
+
+
+def sum_is_nine(values: tuple) -> bool:
+    return sum(values) == 9
+
+
+def check_buckets(selector: MinimumRemainingValues, search: BacktrackingSearch):
+    """
+    Check the bucket queue against the remaining values and degrees
+    recomputed from the assignment and the domains.
+    """
+    csp, assignment = search.csp, search.assignment
+    assert selector.assigned == assignment
+    sizes = [0] * len(selector.sizes)
+    for var in csp.variables:
+        if var in assignment:
+            continue
+        taken = [
+            assignment[other] for other in csp.neighbours[var] if other in assignment
+        ]
+        remaining = 0
+        for value in csp.domains[var]:
+            assert selector.conflicts[var][value] == taken.count(value)
+            remaining += not taken.count(value)
+        degree = sum(1 for other in csp.neighbours[var] if other not in assignment)
+        assert selector.remaining[var] == remaining
+        assert selector.degree[var] == degree
+        assert var in selector.buckets[remaining][degree]
+        sizes[remaining] += 1
+    assert selector.sizes == sizes
+    assert sum(map(len, sum(selector.buckets, []))) == sum(sizes)
+
+
+@pytest.mark.parametrize("inference", [no_inference, forward_checking])
+def test_buckets_follow_the_search(corpus, inference):
+    rng = random.Random(0)
+    for puzzle in corpus("hard_9x9")[:3] + corpus("pathological_9x9")[:2]:
+        selector = MinimumRemainingValues()
+        search = BacktrackingSearch(
+            SudokuCSP(puzzle), select_unassigned_variable=selector, inference=inference
+        )
+        check_buckets(selector, search)
+        for _ in range(30):
+            if search.step(max_nodes=rng.randint(1, 40)) is not SearchStatus.RUNNING:
+                break
+            check_buckets(selector, search)
+        search.close()
+
+
+def test_larger_constraints_wait_for_their_other_variables():
+    variables = ["a", "b", "c"]
+    csp = CSP(
+        variables,
+        {var: set(range(1, 6)) for var in variables},
+        [
+            Constraint(frozenset(variables), sum_is_nine),
+            NotEqual("a", "b"),
+            NotEqual("b", "c"),
+        ],
+    )
+    solution = backtracking_search(
+        csp, select_unassigned_variable=MinimumRemainingValues()
+    )
+    assert solution is not None
+    assert csp.consistent(solution)
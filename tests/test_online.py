@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import requests
+
+from sudoku_csp.generator import Generator, SudokuDifficulty
+from sudoku_csp.online import OnlineGenerator
+
+BOARD = [[(3 * (x % 3) + x // 3 + y) % 9 + 1 for y in range(9)] for x in range(9)]
+
+
+class BoardHandler(BaseHTTPRequestHandler):
+    """
+    Answer each request with a new board, the first cell counting the
+    requests, after the delay of the server.
+    """
+
+    def do_GET(self):
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        board = [list(row) for row in BOARD]
+        board[0][0] = 0
+        board[8][8] = self.server.requests % 10
+        body = json.dumps({"board": board}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BoardHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.delay = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/board"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def online_generator(server, tmp_path):
+    online_generator = OnlineGenerator(
+        server.url,
+        cache_path=str(tmp_path / "online.db"),
+        batch_size=3,
+        timeout=(1, 0.2),
+        retries=0,
+    )
+    yield online_generator
+    online_generator.close()
+
+
+def test_fetch_prefetches_a_batch(server, online_generator):
+    boards = [online_generator.fetch(SudokuDifficulty.EASY) for _ in range(3)]
+    assert server.requests == 3
+    assert [board[8, 8] for board in boards] == [1, 2, 3]
+    assert online_generator.unserved(SudokuDifficulty.EASY) == 0
+
+    online_generator.fetch(SudokuDifficulty.EASY)
+    assert server.requests == 6
+    assert online_generator.unserved(SudokuDifficulty.EASY) == 2
+
+
+def test_prefetch_tops_up_the_batch(server, online_generator):
+    online_generator.fetch(SudokuDifficulty.EASY)
+    assert online_generator.prefetch(SudokuDifficulty.EASY) == 1
+    assert online_generator.unserved(SudokuDifficulty.EASY) == 3
+    assert online_generator.prefetch(SudokuDifficulty.MEDIUM) == 3
+    assert server.requests == 7
+
+
+def test_read_timeout(server, online_generator):
+    server.delay = 1
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        online_generator.request_board(SudokuDifficulty.EASY)
+    assert time.perf_counter() - start < 0.9
+    assert server.requests == 1
+
+
+def test_timeout_without_cache_raises(server, online_generator):
+    server.delay = 1
+    with pytest.raises(requests.RequestException):
+        online_generator.fetch(SudokuDifficulty.EASY)
+
+
+def test_cache_fallback_when_the_service_is_down(server, online_generator):
+    served = [online_generator.fetch(SudokuDifficulty.EASY) for _ in range(3)]
+    server.shutdown()
+    server.server_close()
+
+    board = online_generator.fetch(SudokuDifficulty.EASY)
+    assert any(np.array_equal(board, other) for other in served)
+    with pytest.raises(requests.RequestException):
+        online_generator.fetch(SudokuDifficulty.HARD)
+
+
+def test_generator_sessions_are_per_thread():
+    sessions = list()
+    thread = threading.Thread(target=lambda: sessions.append(Generator.session()))
+    thread.start()
+    thread.join()
+    assert Generator.session() is Generator.session()
+    assert sessions[0] is not Generator.session()
+
+
+def test_generate_online(server, monkeypatch):
+    monkeypatch.setattr(Generator, "generator_url", server.url)
+    board = Generator.generate_online(3, SudokuDifficulty.EASY)
+    assert board.shape == (9, 9)
+    assert server.requests == 1
+
+
+def test_online_sessions_are_per_thread(server, online_generator):
+    sessions = list()
+
+    def fetch():
+        online_generator.fetch(SudokuDifficulty.EASY)
+        sessions.append(online_generator.sessions.get())
+
+    threads = [threading.Thread(target=fetch) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(sessions) == 2
+    assert sessions[0] is not sessions[1]
+    assert set(map(id, online_generator.sessions.sessions)) == set(map(id, sessions))
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import queue
+
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import (
+    BacktrackingSearch,
+    MinimumRemainingValues,
+    backtracking_solutions,
+    forward_checking,
+    unorder_domain_values,
+)
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchBudget,
+    SearchStatistics,
+    SearchStatus,
+)
+from sudoku_csp.parallel import (
+    _donate,
+    _search_subproblem,
+    parallel_pool,
+    parallel_search,
+)
+from sudoku_csp.solver import solve
+
+PROCESSES = 2
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    pool = parallel_pool(PROCESSES)
+    yield pool
+    pool.close()
+
+
+def new_search(csp: SudokuCSP) -> BacktrackingSearch:
+    return BacktrackingSearch(
+        csp,
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+    )
+
+
+def donate(search: BacktrackingSearch) -> list:
+    """
+    Let a search give its work away, and get the donated subproblems.
+    """
+    tasks = queue.Queue()
+    outstanding = multiprocessing.Value("i", 0)
+    _donate(search, 1, list(), tasks, outstanding)
+    donated = list()
+    while not tasks.empty():
+        job, decisions = tasks.get()
+        assert job == 1
+        donated.append(decisions)
+    assert outstanding.value == len(donated) > 0
+    return donated
+
+
+def solutions(csp: SudokuCSP, decisions: list) -> set:
+    assignment = dict(decisions)
+    if not csp.consistent(assignment):
+        return set()
+    for var, value in assignment.items():
+        csp.domains[var] = {value}
+    return {
+        frozenset(solution.items())
+        for solution in backtracking_solutions(csp, inference=forward_checking)
+    }
+
+
+def test_donated_subproblems_partition_the_search():
+    puzzle = np.zeros((4, 4), dtype=int)
+    search = new_search(SudokuCSP(puzzle))
+    assert search.step(max_nodes=3) is SearchStatus.RUNNING
+    donated = donate(search)
+
+    kept = set()
+    while search.step() is SearchStatus.SOLVED:
+        kept.add(frozenset(search.solution.items()))
+    found = [solutions(SudokuCSP(puzzle), decisions) for decisions in donated]
+    # Every 4x4 grid is found exactly once, either by the donor or by one of
+    # the subproblems.
+    assert len(kept) + sum(map(len, found)) == 288
+    assert len(kept.union(*found)) == 288
+
+
+def test_donated_subproblems_are_solved(corpus, check_solution):
+    for puzzle in corpus("hard_9x9")[:3]:
+        expected = new_search(SudokuCSP(puzzle)).run()
+
+        csp = SudokuCSP(puzzle)
+        search = new_search(csp)
+        assert search.step(max_nodes=2) is SearchStatus.RUNNING
+        donated = donate(search)
+        solved = [search.solution] if search.step() is SearchStatus.SOLVED else []
+        search.close()
+
+        for decisions in donated:
+            # Without idle workers, the subproblem is searched to the end.
+            status, solution = _search_subproblem(
+                csp,
+                1,
+                decisions,
+                MinimumRemainingValues(),
+                unorder_domain_values,
+                forward_checking,
+                None,
+                SearchStatistics(),
+                16,
+                queue.Queue(),
+                multiprocessing.Event(),
+                multiprocessing.Value("i", 0),
+                multiprocessing.Value("i", 0),
+            )
+            assert status in (SearchStatus.SOLVED, SearchStatus.EXHAUSTED)
+            if status is SearchStatus.SOLVED:
+                solved.append(solution)
+        # The puzzle has a single solution, found in a single part.
+        assert solved == [expected]
+        check_solution(puzzle, csp.get_resulted_map(expected))
+
+
+def test_parallel_search_splits_the_work(corpus, check_solution, pool):
+    searches = pool.searches
+    for puzzle in corpus("pathological_9x9") + corpus("hard_9x9")[:3]:
+        csp = SudokuCSP(puzzle)
+        statistics = SearchStatistics()
+        # A single subproblem, which keeps being split between the workers.
+        assignment = parallel_search(
+            csp,
+            select_unassigned_variable=MinimumRemainingValues(),
+            inference=forward_checking,
+            processes=PROCESSES,
+            split_depth=0,
+            step_nodes=16,
+            statistics=statistics,
+        )
+        check_solution(puzzle, csp.get_resulted_map(assignment))
+        assert statistics.nodes > 0
+    assert parallel_pool(PROCESSES) is pool
+    assert pool.alive()
+    assert pool.searches == searches + 7
+
+
+def test_no_solution():
+    # The 1 of the top left box has nowhere to go, which only shows during
+    # the search.
+    puzzle = np.zeros((4, 4), dtype=int)
+    puzzle[0, 2] = puzzle[2, 0] = 1
+    puzzle[1, 1] = 2
+    csp = SudokuCSP(puzzle)
+    statistics = SearchStatistics()
+    assignment = parallel_search(
+        csp,
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+        processes=PROCESSES,
+        split_depth=1,
+        statistics=statistics,
+    )
+    assert assignment is None
+    assert statistics.nodes > 0
+
+
+def test_budget(corpus, check_solution):
+    puzzle = corpus("pathological_9x9")[1]
+    budget = SearchBudget(node_limit=10)
+    assignment = parallel_search(
+        SudokuCSP(puzzle),
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+        processes=PROCESSES,
+        split_depth=0,
+        budget=budget,
+    )
+    assert assignment is None
+    assert budget.status is SearchStatus.BUDGET_EXCEEDED
+
+    budget = SearchBudget()
+    budget.cancel()
+    assignment = parallel_search(
+        SudokuCSP(puzzle),
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+        processes=PROCESSES,
+        budget=budget,
+    )
+    assert assignment is None
+    assert budget.status is SearchStatus.CANCELLED
+
+    # The stopped searches are over, the next one is served.
+    puzzle = corpus("hard_9x9")[0]
+    csp = SudokuCSP(puzzle)
+    assignment = parallel_search(
+        csp,
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+        processes=PROCESSES,
+    )
+    check_solution(puzzle, csp.get_resulted_map(assignment))
+
+
+def test_solve(corpus, check_solution):
+    for puzzle in corpus("pathological_9x9"):
+        statistics = SearchStatistics()
+        result = solve(puzzle, AlgorithmType.PARALLEL, statistics=statistics)
+        check_solution(puzzle, result)
+        assert statistics.status is SearchStatus.SOLVED
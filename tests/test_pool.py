@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from sudoku_csp.algorithms import count_solutions
+from sudoku_csp.csp import BitSudokuCSP
+from sudoku_csp.generator import SudokuDifficulty
+from sudoku_csp.pool import PuzzlePool
+
+
+def wait_for(condition, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def pool_path(tmp_path):
+    return str(tmp_path / "puzzles.db")
+
+
+def test_take_from_an_empty_stock_starts_filling_it(pool_path):
+    pool = PuzzlePool(pool_path, high_water_mark=2)
+    try:
+        assert pool.take(2, SudokuDifficulty.EASY) is None
+        wait_for(lambda: pool.count(2, SudokuDifficulty.EASY) == 2)
+        puzzle = pool.take(2, SudokuDifficulty.EASY)
+        assert puzzle.shape == (4, 4)
+        assert count_solutions(BitSudokuCSP(puzzle), limit=2) == 1
+    finally:
+        pool.close()
+
+
+def test_stocks_survive_the_pool(pool_path):
+    pool = PuzzlePool(
+        pool_path, high_water_mark=2, stocks=[(3, SudokuDifficulty.EASY)]
+    )
+    wait_for(lambda: pool.count(3, SudokuDifficulty.EASY) == 2)
+    pool.close()
+
+    pool = PuzzlePool(pool_path, high_water_mark=2)
+    try:
+        assert pool.count(3, SudokuDifficulty.EASY) == 2
+        assert pool.take(3, SudokuDifficulty.EASY).shape == (9, 9)
+        assert pool.count(3, SudokuDifficulty.EASY) == 1
+    finally:
+        pool.close()
+
+
+def test_close_doesnt_wait_for_the_generations(pool_path):
+    pool = PuzzlePool(
+        pool_path, high_water_mark=2, stocks=[(5, SudokuDifficulty.HARD)]
+    )
+    time.sleep(1)
+    start = time.monotonic()
+    pool.close()
+    assert time.monotonic() - start < 2
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchBudget,
+    SearchStatistics,
+    SearchStatus,
+)
+from sudoku_csp.solver import (
+    PORTFOLIO_STRATEGIES,
+    portfolio_pool,
+    solve,
+    solve_portfolio,
+)
+
+# Plain backtracking takes minutes on the second pathological grid.
+SLOW_STRATEGIES = ((AlgorithmType.BACKTRACKING, None), (AlgorithmType.BACKTRACKING, 1))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    pool = portfolio_pool(len(PORTFOLIO_STRATEGIES))
+    yield pool
+    pool.close()
+
+
+def test_portfolio_solves(corpus, check_solution, pool):
+    for puzzle in corpus("pathological_9x9") + corpus("hard_9x9")[:3]:
+        statistics = SearchStatistics()
+        result = solve(puzzle, AlgorithmType.PORTFOLIO, statistics=statistics)
+        check_solution(puzzle, result)
+        assert statistics.status is SearchStatus.SOLVED
+    assert portfolio_pool(len(PORTFOLIO_STRATEGIES)) is pool
+    assert pool.alive()
+
+
+def test_no_solution():
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, :8] = range(1, 9)
+    puzzle[1, 8] = 9
+    statistics = SearchStatistics()
+    assert solve(puzzle, AlgorithmType.PORTFOLIO, statistics=statistics) is None
+    assert statistics.status is SearchStatus.EXHAUSTED
+
+
+def test_cancel_stops_every_strategy(corpus, check_solution):
+    budget = SearchBudget()
+    statistics = SearchStatistics()
+    threading.Timer(0.5, budget.cancel).start()
+    start = time.perf_counter()
+    result = solve_portfolio(
+        corpus("pathological_9x9")[1],
+        SLOW_STRATEGIES,
+        presolve=False,
+        statistics=statistics,
+        budget=budget,
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.CANCELLED
+    assert time.perf_counter() - start < 5
+
+    # The losers of the cancelled race are done, the next race is served.
+    puzzle = corpus("easy_9x9")[0]
+    check_solution(puzzle, solve(puzzle, AlgorithmType.PORTFOLIO))
+
+
+def test_time_limit(corpus):
+    statistics = SearchStatistics()
+    budget = SearchBudget(time_limit=0.5)
+    budget.start()
+    result = solve_portfolio(
+        corpus("pathological_9x9")[1],
+        SLOW_STRATEGIES,
+        presolve=False,
+        statistics=statistics,
+        budget=budget,
+    )
+    assert result is None
+    assert statistics.status is SearchStatus.BUDGET_EXCEEDED
+
+
+def test_seeded_solve_keeps_the_global_random_state(corpus, check_solution):
+    puzzle = corpus("hard_9x9")[0]
+    np.random.seed(0)
+    expected = np.random.random()
+    nodes = list()
+    for _ in range(2):
+        np.random.seed(0)
+        statistics = SearchStatistics()
+        result = solve(puzzle, AlgorithmType.MRV, statistics=statistics, seed=1)
+        check_solution(puzzle, result)
+        assert np.random.random() == expected
+        nodes.append(statistics.nodes)
+    # The same seed draws the same value orders.
+    assert nodes[0] == nodes[1]
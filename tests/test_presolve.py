@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from sudoku_csp.algorithms import bitmask_search
+from sudoku_csp.csp import BitSudokuCSP, SudokuCSP
+from sudoku_csp.interfaces import SearchBudget
+from sudoku_csp.presolve import (
+    box_line_reduction,
+    hidden_singles,
+    hidden_subsets,
+    logical_presolve,
+    naked_singles,
+    naked_subsets,
+    pointing,
+)
+
+ALL_VALUES = set(range(1, 10))
+
+
+def empty_csp() -> SudokuCSP:
+    return SudokuCSP(np.zeros((9, 9), dtype=int))
+
+
+def cells(row: int, cols) -> list:
+    return [f"{row}, {col}" for col in cols]
+
+
+def remove_everywhere_but(csp: SudokuCSP, unit: list, places: list, values):
+    for var in unit:
+        if var not in places:
+            csp.domains[var] -= set(values)
+
+
+def test_naked_singles():
+    csp = empty_csp()
+    csp.domains["4, 4"] = {5}
+    removals = list()
+    assert naked_singles(csp, removals) == 20
+    assert all(5 not in csp.domains[var] for var in csp.neighbours["4, 4"])
+    assert csp.domains["4, 4"] == {5}
+    assert len(removals) == 20
+
+
+def test_hidden_singles():
+    csp = empty_csp()
+    remove_everywhere_but(csp, csp.rows[0], cells(0, [4]), [7])
+    assert hidden_singles(csp, list()) == 8
+    assert csp.domains["0, 4"] == {7}
+
+
+def test_naked_pairs():
+    csp = empty_csp()
+    pair = cells(0, [0, 1])
+    for var in pair:
+        csp.domains[var] = {1, 2}
+    # The pair is in the first row and in the first box, which share a cell.
+    assert naked_subsets(csp, list(), 2) == 7 * 2 + 6 * 2
+    for var in set(csp.rows[0] + csp.boxes[0]) - set(pair):
+        assert csp.domains[var] == ALL_VALUES - {1, 2}
+
+
+def test_hidden_pairs():
+    csp = empty_csp()
+    pair = cells(0, [0, 1])
+    remove_everywhere_but(csp, csp.rows[0], pair, [1, 2])
+    assert hidden_subsets(csp, list(), 2) == 2 * 7
+    for var in pair:
+        assert csp.domains[var] == {1, 2}
+
+
+def test_naked_triples():
+    csp = empty_csp()
+    triple = cells(0, [0, 1, 2])
+    for var, domain in zip(triple, ({1, 2}, {2, 3}, {1, 3})):
+        csp.domains[var] = domain
+    assert naked_subsets(csp, list(), 3) == 6 * 3 + 6 * 3
+    for var in set(csp.rows[0] + csp.boxes[0]) - set(triple):
+        assert csp.domains[var] == ALL_VALUES - {1, 2, 3}
+
+
+def test_hidden_triples():
+    csp = empty_csp()
+    triple = cells(0, [0, 1, 2])
+    remove_everywhere_but(csp, csp.rows[0], triple, [1, 2, 3])
+    assert hidden_subsets(csp, list(), 3) == 3 * 6
+    for var in triple:
+        assert csp.domains[var] == {1, 2, 3}
+
+
+def test_pointing():
+    csp = empty_csp()
+    # In the first box, the 5 only fits in the first row.
+    remove_everywhere_but(csp, csp.boxes[0], cells(0, range(3)), [5])
+    assert pointing(csp, list()) == 6
+    for var in cells(0, range(3, 9)):
+        assert 5 not in csp.domains[var]
+    assert all(5 in csp.domains[var] for var in cells(1, range(3, 9)))
+
+
+def test_box_line_reduction():
+    csp = empty_csp()
+    # In the first row, the 5 only fits in the first box.
+    remove_everywhere_but(csp, csp.rows[0], cells(0, range(3)), [5])
+    assert box_line_reduction(csp, list()) == 6
+    for var in cells(1, range(3)) + cells(2, range(3)):
+        assert 5 not in csp.domains[var]
+    assert all(5 in csp.domains[var] for var in cells(1, range(3, 9)))
+
+
+def test_rules_keep_the_solution(corpus):
+    for puzzle in corpus("hard_9x9") + corpus("pathological_9x9")[:3]:
+        bit_csp = BitSudokuCSP(puzzle)
+        solution = bit_csp.get_resulted_map(bitmask_search(bit_csp))
+        csp = SudokuCSP(puzzle)
+        domains = {var: set(domain) for var, domain in csp.domains.items()}
+        removals = list()
+        fired = logical_presolve(csp, removals)
+        assert fired
+        assert sum(fired.values()) == len(removals)
+        for x in range(9):
+            for y in range(9):
+                assert solution[x, y] in csp.domains[f"{x}, {y}"]
+        csp.restore(removals)
+        assert csp.domains == domains
+
+
+def test_presolve_stops_with_its_budget(corpus):
+    csp = SudokuCSP(corpus("hard_9x9")[0])
+    domains = {var: set(domain) for var, domain in csp.domains.items()}
+    budget = SearchBudget()
+    budget.cancel()
+    assert not logical_presolve(csp, budget=budget)
+    assert csp.domains == domains
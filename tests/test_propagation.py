@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.presolve import hidden_singles, naked_singles
+from sudoku_csp.propagation import (
+    candidates_from_maps,
+    maps_from_candidates,
+    presolve_maps,
+    propagate,
+    solved,
+)
+
+
+def singles_domains(puzzle: np.ndarray) -> SudokuCSP:
+    """
+    Apply the naked and hidden singles to the domains of a sudoku CSP until
+    neither of them removes anything.
+    """
+    csp = SudokuCSP(puzzle)
+    removals = list()
+    while naked_singles(csp, removals) + hidden_singles(csp, removals):
+        pass
+    return csp
+
+
+def test_maps_and_candidates(corpus):
+    puzzles = np.stack(corpus("hard_9x9"))
+    candidates = candidates_from_maps(puzzles)
+    assert candidates.shape == (10, 9, 9, 9)
+    assert candidates.dtype == bool
+    # The clues have a single candidate, the empty cells all of them.
+    counts = candidates.sum(axis=-1)
+    assert np.array_equal(counts == 1, puzzles > 0)
+    assert np.all(counts[puzzles == 0] == 9)
+    assert np.array_equal(maps_from_candidates(candidates), puzzles)
+
+
+def test_propagation_matches_the_csp_domains(corpus):
+    for name in ("hard_9x9", "pathological_9x9", "medium_16x16"):
+        puzzles = np.stack(corpus(name))
+        candidates = propagate(candidates_from_maps(puzzles))
+        for puzzle, reduced in zip(puzzles, candidates):
+            csp = singles_domains(puzzle)
+            length = len(puzzle)
+            for x in range(length):
+                for y in range(length):
+                    domain = set(np.flatnonzero(reduced[x, y]) + 1)
+                    assert domain == csp.domains[f"{x}, {y}"]
+
+
+def test_rounds_are_limited(corpus):
+    puzzles = np.stack(corpus("hard_9x9"))
+    candidates = candidates_from_maps(puzzles)
+    assert np.array_equal(propagate(candidates.copy(), max_rounds=0), candidates)
+    once = propagate(candidates.copy(), max_rounds=1)
+    full = propagate(candidates.copy())
+    assert np.all(full <= once) and np.all(once <= candidates)
+    assert np.count_nonzero(full) < np.count_nonzero(once)
+
+
+def test_presolve_maps(corpus, check_solution):
+    puzzles = np.stack(corpus("easy_9x9") + corpus("pathological_9x9"))
+    maps, is_solved = presolve_maps(puzzles)
+    assert maps.shape == puzzles.shape
+    assert np.all((puzzles == 0) | (maps == puzzles))
+    # The singles solve the easy puzzles, but not all the pathological ones.
+    assert is_solved[:10].all()
+    assert not is_solved[10:].all()
+    assert np.array_equal(is_solved, (maps > 0).all(axis=(1, 2)))
+    for puzzle, sudoku_map in zip(puzzles[is_solved], maps[is_solved]):
+        check_solution(puzzle, sudoku_map)
+
+
+def test_solved_rejects_conflicts(corpus):
+    grid = presolve_maps(np.stack(corpus("easy_9x9")[:1]))[0]
+    assert solved(candidates_from_maps(grid)).all()
+    grid[0, 0, :2] = grid[0, 0, 1::-1]
+    assert not solved(candidates_from_maps(grid)).any()
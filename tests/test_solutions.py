@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from sudoku_csp.algorithms import (
+    MinimumRemainingValues,
+    backtracking_solutions,
+    count_solutions,
+    forward_checking,
+)
+from sudoku_csp.csp import BitSudokuCSP, SudokuCSP
+from sudoku_csp.interfaces import SearchBudget, SearchStatistics
+
+EMPTY = np.zeros((4, 4), dtype=int)
+
+
+def snapshot(csp: SudokuCSP) -> dict:
+    return {var: set(domain) for var, domain in csp.domains.items()}
+
+
+def test_every_solution_once():
+    csp = SudokuCSP(EMPTY)
+    domains = snapshot(csp)
+    solutions = list(backtracking_solutions(csp, inference=forward_checking))
+    assert len(solutions) == count_solutions(BitSudokuCSP(EMPTY)) == 288
+    assert len({frozenset(solution.items()) for solution in solutions}) == 288
+    assert all(csp.consistent(solution) for solution in solutions)
+    assert all(len(solution) == 16 for solution in solutions)
+    assert csp.domains == domains
+
+
+def test_unique_solution(corpus, check_solution):
+    puzzle = corpus("hard_9x9")[0]
+    csp = SudokuCSP(puzzle)
+    (solution,) = backtracking_solutions(
+        csp,
+        select_unassigned_variable=MinimumRemainingValues(),
+        inference=forward_checking,
+    )
+    check_solution(puzzle, csp.get_resulted_map(solution))
+
+
+def test_limit():
+    csp = SudokuCSP(EMPTY)
+    assert len(list(backtracking_solutions(csp, limit=5))) == 5
+    assert list(backtracking_solutions(csp, limit=0)) == []
+
+
+def test_closing_early_cleans_up():
+    full = SearchStatistics()
+    list(backtracking_solutions(SudokuCSP(EMPTY), statistics=full))
+
+    csp = SudokuCSP(EMPTY)
+    domains = snapshot(csp)
+    statistics = SearchStatistics()
+    solutions = backtracking_solutions(
+        csp, inference=forward_checking, statistics=statistics
+    )
+    for _ in range(3):
+        next(solutions)
+    # The search is paused on the third solution, with its values pruned.
+    assert csp.domains != domains
+    assert csp.counting
+    assert statistics.nodes == 0
+
+    solutions.close()
+    assert csp.domains == domains
+    assert not csp.counting
+    # Only the part of the tree leading to the third solution was explored.
+    assert 0 < statistics.nodes < full.nodes
+    assert statistics.checks > 0
+    assert next(solutions, None) is None
+
+
+def test_budget_ends_the_enumeration():
+    csp = SudokuCSP(EMPTY)
+    domains = snapshot(csp)
+    budget = SearchBudget(node_limit=40)
+    solutions = list(backtracking_solutions(csp, budget=budget))
+    assert 0 < len(solutions) < 288
+    assert budget.exceeded()
+    assert csp.domains == domains
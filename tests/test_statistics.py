@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from sudoku_csp.algorithms import backtracking_search, forward_checking
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import (
+    AlgorithmType,
+    SearchBudget,
+    SearchStatistics,
+    SearchStatus,
+)
+from sudoku_csp.solver import solve
+
+GRID = np.array([[1, 2, 3, 4], [3, 4, 1, 2], [2, 1, 4, 3], [4, 3, 2, 1]])
+
+
+def test_add():
+    total = SearchStatistics()
+    assert str(total).startswith("Not run: 0 nodes")
+    for nodes, max_depth, status in ((10, 5, SearchStatus.EXHAUSTED), (3, 2, None)):
+        statistics = SearchStatistics()
+        statistics.nodes = nodes
+        statistics.backtracks = nodes // 2
+        statistics.max_depth = max_depth
+        statistics.search_time = 0.5
+        statistics.status = status
+        total.add(statistics)
+    assert total.nodes == 13
+    assert total.backtracks == 6
+    assert total.max_depth == 5
+    assert total.search_time == 1.0
+    # The status of the last solve is taken.
+    assert total.status is None
+    assert total.as_dict() == vars(total)
+    assert total.as_dict() is not vars(total)
+
+
+def test_search_counters():
+    puzzle = GRID.copy()
+    puzzle[0, 0] = 0
+    statistics = SearchStatistics()
+    assert backtracking_search(SudokuCSP(puzzle), statistics=statistics)
+    # The 1 is compared with the 7 neighbours of the cell.
+    assert (statistics.nodes, statistics.backtracks, statistics.checks) == (1, 0, 7)
+    assert statistics.max_depth == 1
+    assert statistics.pruned == 0
+
+    puzzle = GRID.copy()
+    puzzle[0, :] = 0
+    checked, inferred = SearchStatistics(), SearchStatistics()
+    assert backtracking_search(SudokuCSP(puzzle), statistics=checked)
+    assert backtracking_search(
+        SudokuCSP(puzzle), inference=forward_checking, statistics=inferred
+    )
+    for statistics in (checked, inferred):
+        assert (statistics.nodes, statistics.backtracks) == (4, 0)
+        assert statistics.max_depth == 4
+    # Forward checking removes the values of the clues from the empty row,
+    # which costs checks of its own.
+    assert (checked.pruned, inferred.pruned) == (0, 12)
+    assert inferred.checks > checked.checks
+
+
+def test_checks_are_only_counted_with_statistics(corpus):
+    csp = SudokuCSP(corpus("hard_9x9")[0])
+    assert backtracking_search(csp) is not None
+    assert not csp.counting
+    assert csp.checks == 0
+
+
+def test_solve_statistics(corpus):
+    # The singles alone solve the second pathological puzzle.
+    for puzzle in corpus("pathological_9x9")[::2]:
+        presolved, searched = SearchStatistics(), SearchStatistics()
+        solve(puzzle, AlgorithmType.FORWARD_CHECKING, statistics=presolved)
+        solve(
+            puzzle,
+            AlgorithmType.FORWARD_CHECKING,
+            presolve=False,
+            statistics=searched,
+        )
+        for statistics in (presolved, searched):
+            assert statistics.status is SearchStatus.SOLVED
+            assert 0 < statistics.backtracks < statistics.nodes
+            assert 0 < statistics.max_depth <= (puzzle == 0).sum()
+            assert statistics.checks > 0
+            assert statistics.construction_time > 0
+            assert statistics.search_time > 0
+        assert presolved.preprocessing_time > searched.preprocessing_time
+
+    # The counters of several solves add up.
+    statistics = SearchStatistics()
+    for _ in range(2):
+        solve(puzzle, AlgorithmType.FORWARD_CHECKING, statistics=statistics)
+    assert statistics.nodes == 2 * presolved.nodes
+    assert statistics.pruned == 2 * presolved.pruned
+
+
+@pytest.mark.parametrize("algorithm_type", [AlgorithmType.MRV, AlgorithmType.BITMASK])
+def test_solve_status(corpus, algorithm_type):
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, :8] = range(1, 9)
+    puzzle[1, 8] = 9
+    statistics = SearchStatistics()
+    assert solve(puzzle, algorithm_type, statistics=statistics) is None
+    assert statistics.status is SearchStatus.EXHAUSTED
+
+    puzzle = corpus("pathological_9x9")[0]
+    statistics = SearchStatistics()
+    budget = SearchBudget(node_limit=5)
+    assert solve(puzzle, algorithm_type, statistics=statistics, budget=budget) is None
+    assert statistics.status is SearchStatus.BUDGET_EXCEEDED
+    assert statistics.nodes <= 5
+
+    statistics = SearchStatistics()
+    budget = SearchBudget()
+    budget.cancel()
+    assert solve(puzzle, algorithm_type, statistics=statistics, budget=budget) is None
+    assert statistics.status is SearchStatus.CANCELLED
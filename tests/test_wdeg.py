@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from sudoku_csp.algorithms import (
+    BacktrackingSearch,
+    WeightedDegree,
+    forward_checking,
+)
+from sudoku_csp.csp import SudokuCSP
+from sudoku_csp.interfaces import AlgorithmType, SearchStatus
+from sudoku_csp.solver import solve
+
+
+def empty_csp() -> SudokuCSP:
+    return SudokuCSP(np.zeros((4, 4), dtype=int))
+
+
+def test_weighted_degrees_start_at_the_degrees():
+    csp = empty_csp()
+    selector = WeightedDegree()
+    selector.setup(dict(), csp)
+    assert selector.weights == [1] * len(csp.constraints)
+    assert selector.wdeg == {var: len(csp.neighbours[var]) for var in csp.variables}
+
+
+def test_failure_increases_the_weights():
+    csp = empty_csp()
+    selector = WeightedDegree()
+    selector.setup(dict(), csp)
+    constraint = next(iter(csp.var_to_const["0, 0"]))
+    var, other_var = sorted(constraint.scope)
+    degree = selector.wdeg[var]
+
+    selector.fail(constraint, csp)
+    selector.fail(constraint, csp)
+    assert selector.weights[constraint.id] == 3
+    assert selector.wdeg[var] == selector.wdeg[other_var] == degree + 2
+    # The other constraints keep their weight.
+    assert sum(selector.weights) == len(csp.constraints) + 2
+
+    # A failure without a known culprit changes nothing.
+    selector.fail(None, csp)
+    assert sum(selector.weights) == len(csp.constraints) + 2
+
+
+def test_assignment_removes_the_weight_of_the_constraints():
+    csp = empty_csp()
+    selector = WeightedDegree()
+    selector.setup(dict(), csp)
+    constraint = next(iter(csp.var_to_const["0, 0"]))
+    var, other_var = sorted(constraint.scope)
+    selector.fail(constraint, csp)
+    wdeg = dict(selector.wdeg)
+
+    selector.assign(var, 1, csp)
+    # The constraint has no other unassigned variable left for other_var.
+    assert selector.wdeg[other_var] == wdeg[other_var] - 2
+    for neighbour in set(csp.neighbours[var]) - {other_var}:
+        assert selector.wdeg[neighbour] == wdeg[neighbour] - 1
+
+    selector.unassign(var, 1, csp)
+    assert selector.wdeg == wdeg
+
+
+def test_smallest_domain_first_then_highest_weighted_degree():
+    csp = empty_csp()
+    selector = WeightedDegree()
+    selector.setup(dict(), csp)
+    csp.domains["3, 3"] = {1, 2}
+    selector.prune("3, 3", 3, csp)
+    assert selector(dict(), csp) == "3, 3"
+
+    # The weights break the ties between the smallest domains, but do not
+    # override them.
+    csp.domains["1, 2"] = {1, 2}
+    selector.prune("1, 2", 3, csp)
+    constraint = next(iter(csp.var_to_const["1, 2"] - csp.var_to_const["3, 3"]))
+    selector.fail(constraint, csp)
+    assert selector(dict(), csp) == "1, 2"
+    for _ in range(10):
+        selector.fail(next(iter(csp.var_to_const["0, 0"])), csp)
+    assert selector(dict(), csp) == "1, 2"
+
+
+def test_search_learns_the_weights(corpus, check_solution):
+    for puzzle in corpus("pathological_9x9")[:2]:
+        csp = SudokuCSP(puzzle)
+        domains = {var: set(domain) for var, domain in csp.domains.items()}
+        selector = WeightedDegree()
+        search = BacktrackingSearch(
+            csp, select_unassigned_variable=selector, inference=forward_checking
+        )
+        assert search.run() is not None
+        assert search.status is SearchStatus.SOLVED
+        check_solution(puzzle, csp.get_resulted_map(search.solution))
+        assert search.backtracks > 0
+        assert sum(selector.weights) > len(csp.constraints)
+        search.close()
+        assert csp.domains == domains
+
+
+def test_wdeg_solves_16x16(corpus, check_solution):
+    for puzzle in corpus("medium_16x16")[:3]:
+        check_solution(puzzle, solve(puzzle, AlgorithmType.WDEG))